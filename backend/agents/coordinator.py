@@ -5,6 +5,8 @@ Part of the multi-agent AI system for EAILI5
 
 import asyncio
 import json
+import os
+import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import logging
@@ -42,6 +44,16 @@ class CoordinatorAgent:
         
         # Conversation history
         self.conversation_history: Dict[str, List[Dict]] = {}
+        
+        # Comprehensive token analysis: run independent stages concurrently,
+        # each bounded by its own timeout (seconds)
+        self.parallel_analysis = os.getenv("TOKEN_ANALYSIS_PARALLEL", "true").lower() == "true"
+        self.stage_timeouts = {
+            "research": float(os.getenv("TOKEN_ANALYSIS_RESEARCH_TIMEOUT", "30")),
+            "web_search": float(os.getenv("TOKEN_ANALYSIS_WEB_SEARCH_TIMEOUT", "25")),
+            "social_sentiment": float(os.getenv("TOKEN_ANALYSIS_SOCIAL_TIMEOUT", "35")),
+            "trading_strategy": float(os.getenv("TOKEN_ANALYSIS_TRADING_TIMEOUT", "30")),
+        }
     
     async def process_message(self, message: str, user_id: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -323,44 +335,124 @@ class CoordinatorAgent:
         2.5. Social Sentiment Agent - Analyzes social sentiment and community buzz
         3. Trading Strategy Agent - Analyzes price patterns and trading signals
         4. Educator Agent - Synthesizes everything into clear, actionable insights
+        
+        Steps 1-3 are independent and run concurrently unless parallel mode is
+        disabled; see analyze_token_comprehensive_stream.
+        """
+        final_analysis = ""
+        async for event in self.analyze_token_comprehensive_stream(message, user_id, learning_level, context):
+            if event.get("type") == "result":
+                final_analysis = event["content"]
+        return final_analysis
+    
+    async def analyze_token_comprehensive_stream(self, message: str, user_id: str, learning_level: int, context: Dict[str, Any] = None):
+        """
+        Run the comprehensive token analysis, yielding progress as it goes
+        
+        The research, web search, social sentiment and trading strategy stages
+        fan out concurrently; the educator synthesis is the only join point. Each
+        stage has its own timeout and falls back to a placeholder on timeout or
+        error, so one slow upstream degrades the answer instead of failing it.
+        
+        Yields:
+            - {'type': 'status', 'agent': ..., 'stage': ..., 'state': 'started'|'completed'|'timeout'|'failed', ...}
+            - {'type': 'result', 'content': '...'} once, with the final analysis
         """
+        token_data = context.get('token_data', {}) if context else {}
+        token_symbol = token_data.get('symbol', 'this token')
+        
         try:
-            token_data = context.get('token_data', {}) if context else {}
-            token_symbol = token_data.get('symbol', 'this token')
-            token_address = token_data.get('address', '')
+            stages = self._build_analysis_stages(user_id, learning_level, context, token_data)
+            results: Dict[str, str] = {}
+            
+            if self.parallel_analysis:
+                for stage in stages:
+                    yield self._stage_status_event(stage, "started")
+                
+                tasks = [asyncio.create_task(self._run_analysis_stage(stage)) for stage in stages]
+                try:
+                    # Report each branch as soon as it finishes
+                    for next_done in asyncio.as_completed(tasks):
+                        stage, result, state, duration_ms = await next_done
+                        results[stage["name"]] = result
+                        yield self._stage_status_event(stage, state, duration_ms)
+                finally:
+                    # Consumer went away (e.g. chat cancelled) - don't leave branches running
+                    for task in tasks:
+                        if not task.done():
+                            task.cancel()
+            else:
+                for stage in stages:
+                    yield self._stage_status_event(stage, "started")
+                    stage, result, state, duration_ms = await self._run_analysis_stage(stage)
+                    results[stage["name"]] = result
+                    yield self._stage_status_event(stage, state, duration_ms)
+            
+            on_chain_analysis = results["research"]
+            web_research = results["web_search"]
+            social_analysis = results["social_sentiment"]
+            price_analysis = results["trading_strategy"]
+            
+            # Step 4: Educator Agent - Synthesize all findings
+            yield {"type": "status", "agent": "educator", "stage": "synthesis", "state": "started",
+                   "message": "Synthesizing the analysis..."}
+            synthesis_context = {
+                **(context or {}),
+                'on_chain_analysis': on_chain_analysis,
+                'web_research': web_research,
+                'social_analysis': social_analysis,
+                'price_analysis': price_analysis,
+                'token_data': token_data
+            }
+            
+            final_analysis = await self.educator_agent.process(
+                message=f"Based on all the research about {token_symbol}, provide a comprehensive analysis with specific data points: 1) Liquidity analysis: {on_chain_analysis} - cite specific numbers and red flags, 2) News developments: {web_research} - extract key events and timeline, 3) Social sentiment: {social_analysis} - include platform breakdowns and volume metrics, 4) Price action: {price_analysis} - reference technical levels and volume patterns, 5) Overall assessment: synthesize findings into clear bullish/bearish stance with specific risk factors and quantitative backing. Structure as professional analysis with metrics, not casual explanation.",
+                user_id=user_id,
+                learning_level=learning_level,
+                context=synthesis_context
+            )
+            
+            yield {"type": "result", "content": final_analysis}
             
-            # Step 1: Research Agent - On-chain analysis
+        except Exception as e:
+            logger.error(f"Error in comprehensive token analysis: {e}")
+            yield {"type": "result", "content": f"I analyzed {token_symbol} but encountered some issues. Let me give you what I found from the available data: {token_data.get('symbol', 'Token')} is trading at ${token_data.get('price', 0):.2f} with a safety score of {token_data.get('safetyScore', 0)}/100. The 24h volume is ${token_data.get('volume24h', 0):,.0f}. I recommend being cautious and asking specific questions about what concerns you most."}
+    
+    def _build_analysis_stages(self, user_id: str, learning_level: int, context: Optional[Dict[str, Any]], token_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Independent stages of the comprehensive token analysis"""
+        token_symbol = token_data.get('symbol', 'this token')
+        token_address = token_data.get('address', '')
+        
+        # Step 1: Research Agent - On-chain analysis
+        async def research():
             research_context = {
                 **(context or {}),
                 'focus': 'on_chain_metrics',
                 'token_data': token_data
             }
-            on_chain_analysis = await self.research_agent.process(
+            return await self.research_agent.process(
                 message=f"Analyze the on-chain metrics for {token_symbol}: holders, liquidity, volume, and market cap. What do these numbers tell us about the token's health?",
                 user_id=user_id,
                 learning_level=learning_level,
                 context=research_context
             )
-            
-            # Step 2: Web Search Agent - Latest news and team info
-            web_search_query = f"Latest news and information about {token_symbol} cryptocurrency token team developers"
+        
+        # Step 2: Web Search Agent - Latest news and team info
+        async def web_search():
             web_context = {
                 **(context or {}),
                 'search_focus': 'team_and_news',
                 'token_data': token_data
             }
-            try:
-                web_research = await self.web_search_agent.process(
-                    message=web_search_query,
-                    user_id=user_id,
-                    learning_level=learning_level,
-                    context=web_context
-                )
-            except Exception as e:
-                logger.warning(f"Web search failed: {e}")
-                web_research = "I couldn't find recent news, but I'll analyze the on-chain data."
-            
-            # Step 2.5: Social Sentiment Agent - Community sentiment analysis
+            return await self.web_search_agent.process(
+                message=f"Latest news and information about {token_symbol} cryptocurrency token team developers",
+                user_id=user_id,
+                learning_level=learning_level,
+                context=web_context
+            )
+        
+        # Step 2.5: Social Sentiment Agent - Community sentiment analysis
+        async def social_sentiment():
             # Fetch sentiment data ONCE to avoid duplicate API calls
             sentiment_data = None
             if token_address and self.sentiment_service:
@@ -378,49 +470,72 @@ class CoordinatorAgent:
                 'token_data': token_data,
                 'sentiment_data': sentiment_data  # ✅ Pass pre-fetched data
             }
-            try:
-                social_analysis = await self.social_sentiment_agent.process(
-                    message=f"Analyze the social sentiment and community buzz for {token_symbol}. What's the community saying on Reddit, Farcaster, and other platforms? Are there any sentiment shifts or anomalies?",
-                    user_id=user_id,
-                    learning_level=learning_level,
-                    context=social_sentiment_context
-                )
-            except Exception as e:
-                logger.warning(f"Social sentiment analysis failed: {e}")
-                social_analysis = "I couldn't analyze social sentiment, but I'll focus on the other data."
-            
-            # Step 3: Trading Strategy Agent - Price analysis
+            return await self.social_sentiment_agent.process(
+                message=f"Analyze the social sentiment and community buzz for {token_symbol}. What's the community saying on Reddit, Farcaster, and other platforms? Are there any sentiment shifts or anomalies?",
+                user_id=user_id,
+                learning_level=learning_level,
+                context=social_sentiment_context
+            )
+        
+        # Step 3: Trading Strategy Agent - Price analysis
+        async def trading_strategy():
             trading_context = {
                 **(context or {}),
                 'focus': 'price_action',
                 'token_data': token_data
             }
-            price_analysis = await self.trading_strategy_agent.process(
+            return await self.trading_strategy_agent.process(
                 message=f"Analyze the price action and trading patterns for {token_symbol}. Based on the 24h change of {token_data.get('priceChange24h', 0)}% and volume of ${token_data.get('volume24h', 0):,.0f}, what should traders know?",
                 user_id=user_id,
                 learning_level=learning_level,
                 context=trading_context
             )
-            
-            # Step 4: Educator Agent - Synthesize all findings
-            synthesis_context = {
-                **(context or {}),
-                'on_chain_analysis': on_chain_analysis,
-                'web_research': web_research,
-                'social_analysis': social_analysis,
-                'price_analysis': price_analysis,
-                'token_data': token_data
-            }
-            
-            final_analysis = await self.educator_agent.process(
-                message=f"Based on all the research about {token_symbol}, provide a comprehensive analysis with specific data points: 1) Liquidity analysis: {on_chain_analysis} - cite specific numbers and red flags, 2) News developments: {web_research} - extract key events and timeline, 3) Social sentiment: {social_analysis} - include platform breakdowns and volume metrics, 4) Price action: {price_analysis} - reference technical levels and volume patterns, 5) Overall assessment: synthesize findings into clear bullish/bearish stance with specific risk factors and quantitative backing. Structure as professional analysis with metrics, not casual explanation.",
-                user_id=user_id,
-                learning_level=learning_level,
-                context=synthesis_context
-            )
-            
-            return final_analysis
-            
+        
+        return [
+            {"name": "research", "agent": "research", "label": "on-chain metrics", "run": research,
+             "fallback": "On-chain metrics were unavailable, so I'll rely on the market data provided."},
+            {"name": "web_search", "agent": "web_search", "label": "latest news", "run": web_search,
+             "fallback": "I couldn't find recent news, but I'll analyze the on-chain data."},
+            {"name": "social_sentiment", "agent": "social_sentiment", "label": "social sentiment", "run": social_sentiment,
+             "fallback": "I couldn't analyze social sentiment, but I'll focus on the other data."},
+            {"name": "trading_strategy", "agent": "trading_strategy", "label": "price action", "run": trading_strategy,
+             "fallback": "Price action analysis was unavailable, so I'll focus on the other data."},
+        ]
+    
+    async def _run_analysis_stage(self, stage: Dict[str, Any]):
+        """Run one stage under its timeout, degrading to the stage fallback"""
+        start = time.monotonic()
+        timeout = self.stage_timeouts.get(stage["name"], 30.0)
+        try:
+            result = await asyncio.wait_for(stage["run"](), timeout=timeout)
+            state = "completed"
+        except asyncio.TimeoutError:
+            logger.warning(f"Token analysis stage {stage['name']} timed out after {timeout}s")
+            result, state = stage["fallback"], "timeout"
         except Exception as e:
-            logger.error(f"Error in comprehensive token analysis: {e}")
-            return f"I analyzed {token_symbol} but encountered some issues. Let me give you what I found from the available data: {token_data.get('symbol', 'Token')} is trading at ${token_data.get('price', 0):.2f} with a safety score of {token_data.get('safetyScore', 0)}/100. The 24h volume is ${token_data.get('volume24h', 0):,.0f}. I recommend being cautious and asking specific questions about what concerns you most."
+            logger.warning(f"Token analysis stage {stage['name']} failed: {e}")
+            result, state = stage["fallback"], "failed"
+        
+        if not result:
+            result = stage["fallback"]
+        duration_ms = round((time.monotonic() - start) * 1000, 1)
+        return stage, result, state, duration_ms
+    
+    def _stage_status_event(self, stage: Dict[str, Any], state: str, duration_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Status event for the chat stream describing a stage transition"""
+        messages = {
+            "started": f"Analyzing {stage['label']}...",
+            "completed": f"Finished analyzing {stage['label']}",
+            "timeout": f"{stage['label'].capitalize()} took too long, continuing without it",
+            "failed": f"{stage['label'].capitalize()} unavailable, continuing without it"
+        }
+        event = {
+            "type": "status",
+            "agent": stage["agent"],
+            "stage": stage["name"],
+            "state": state,
+            "message": messages[state]
+        }
+        if duration_ms is not None:
+            event["duration_ms"] = duration_ms
+        return event
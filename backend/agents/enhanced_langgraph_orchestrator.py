@@ -4,6 +4,7 @@ Part of the EAILI5 multi-agent system
 """
 
 import asyncio
+import os
 from typing import Dict, List, Any, Optional, TypedDict, Annotated
 import logging
 from datetime import datetime
@@ -14,6 +15,7 @@ from .context.context_builder import ContextBuilder
 from .context.user_state_tracker import UserStateTracker
 from .tools.tool_registry import ToolRegistry
 from .tools.tool_executor import ToolExecutor
+from services.answer_cache import SemanticAnswerCache
 
 logger = logging.getLogger(__name__)
 
@@ -80,11 +82,28 @@ class EnhancedLangGraphOrchestrator:
         self.tool_registry = ToolRegistry()
         self.tool_executor = ToolExecutor(self.tool_registry)
         
+        # Replays answers to repeated questions instead of calling the specialist again
+        self.answer_cache = SemanticAnswerCache(redis_service)
+        
+        # Run all required specialist agents concurrently, at most this many at
+        # once per request (override per request with context["max_agent_concurrency"])
+        self.parallel_agents = os.getenv("AGENT_PARALLEL_EXECUTION", "true").lower() == "true"
+        self.max_agent_concurrency = int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))
+        self.specialist_nodes = {
+            "research": self._enhanced_research_node,
+            "educator": self._enhanced_educator_node,
+            "portfolio": self._enhanced_portfolio_node,
+            "trading_strategy": self._enhanced_trading_strategy_node,
+            "web_search": self._enhanced_web_search_node,
+            "social_sentiment": self._enhanced_social_sentiment_node,
+        }
+        
     async def initialize(self, agents: Dict[str, Any], tools: Dict[str, Any]):
         """Initialize the enhanced orchestrator"""
         try:
             self.agents = agents
             self.tools = tools
+            self.answer_cache.embeddings_service = tools.get("openai")
             
             # Initialize memory and context systems
             await self.memory_manager.initialize()
@@ -119,6 +138,7 @@ class EnhancedLangGraphOrchestrator:
             workflow.add_node("trading_strategy", self._enhanced_trading_strategy_node)
             workflow.add_node("web_search", self._enhanced_web_search_node)
             workflow.add_node("social_sentiment", self._enhanced_social_sentiment_node)
+            workflow.add_node("parallel_specialists", self._parallel_specialists_node)
             workflow.add_node("synthesizer", self._enhanced_synthesizer_node)
             workflow.add_node("memory_updater", self._memory_updater_node)
             
@@ -155,6 +175,7 @@ class EnhancedLangGraphOrchestrator:
                     "trading_strategy": "trading_strategy",
                     "web_search": "web_search",
                     "social_sentiment": "social_sentiment",
+                    "parallel_specialists": "parallel_specialists",
                     "synthesizer": "synthesizer"
                 }
             )
@@ -166,6 +187,7 @@ class EnhancedLangGraphOrchestrator:
             workflow.add_edge("trading_strategy", "synthesizer")
             workflow.add_edge("web_search", "synthesizer")
             workflow.add_edge("social_sentiment", "synthesizer")
+            workflow.add_edge("parallel_specialists", "synthesizer")
             
             # Synthesizer leads to memory update
             workflow.add_edge("synthesizer", "memory_updater")
@@ -683,6 +705,40 @@ class EnhancedLangGraphOrchestrator:
             logger.error(f"Error in enhanced social sentiment: {e}")
             return state
     
+    async def _parallel_specialists_node(self, state: EnhancedAgentState) -> EnhancedAgentState:
+        """Fan out to every pending specialist agent concurrently, then merge their results"""
+        try:
+            pending = self._pending_specialists(state)
+            cap = state["context"].get("max_agent_concurrency") or self.max_agent_concurrency
+            semaphore = asyncio.Semaphore(max(1, int(cap)))
+            
+            async def run_branch(agent_name: str) -> EnhancedAgentState:
+                # Each branch writes into its own response/completion containers so
+                # concurrent nodes never mutate the shared state
+                branch_state = {**state, "agent_responses": {}, "completed_agents": []}
+                async with semaphore:
+                    return await self.specialist_nodes[agent_name](branch_state)
+            
+            results = await asyncio.gather(*(run_branch(agent) for agent in pending), return_exceptions=True)
+            
+            # Merge in required_agents order so the synthesizer sees a deterministic state
+            for agent_name, branch_state in zip(pending, results):
+                if isinstance(branch_state, Exception):
+                    logger.error(f"Parallel branch {agent_name} failed: {branch_state}")
+                    continue
+                state["agent_responses"].update(branch_state.get("agent_responses", {}))
+                for completed in branch_state.get("completed_agents", []):
+                    if completed not in state["completed_agents"]:
+                        state["completed_agents"].append(completed)
+            
+            state["current_agent"] = "parallel_specialists"
+            logger.info(f"Parallel specialists completed {state['completed_agents']} (cap {cap}) for user {state['user_id']}")
+            return state
+            
+        except Exception as e:
+            logger.error(f"Error in parallel specialists: {e}")
+            return state
+    
     async def _enhanced_synthesizer_node(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Enhanced synthesizer with memory and context awareness"""
         try:
@@ -884,7 +940,7 @@ class EnhancedLangGraphOrchestrator:
             intent = await coordinator.analyze_intent(message, context)
             
             # Check if this is token analysis with token_data in context
-            token_data = kwargs.get('token_data') or context.get('token_data')
+            token_data = kwargs.get('token_data') or (kwargs.get('context') or {}).get('token_data')
             if intent == "token_analysis" and token_data:
                 # Use multi-agent synthesis for comprehensive token analysis
                 yield {"type": "status", "agent": "coordinator", "message": "Initiating comprehensive token analysis..."}
@@ -898,14 +954,19 @@ class EnhancedLangGraphOrchestrator:
                     "recent_messages": []
                 }
                 
-                # Call coordinator's comprehensive analysis method
+                # Run the comprehensive analysis, forwarding per-stage status as each branch finishes
                 learning_level = kwargs.get("learning_level", 0)
-                final_analysis = await coordinator.analyze_token_comprehensive(
+                final_analysis = ""
+                async for event in coordinator.analyze_token_comprehensive_stream(
                     message=message,
                     user_id=user_id,
                     learning_level=learning_level,
                     context=enhanced_context
-                )
+                ):
+                    if event.get("type") == "result":
+                        final_analysis = event["content"]
+                    else:
+                        yield event
                 
                 # Stream the comprehensive analysis
                 yield {"type": "chunk", "content": final_analysis}
@@ -930,6 +991,22 @@ class EnhancedLangGraphOrchestrator:
                 }
                 
             else:
+                learning_level = kwargs.get("learning_level", 0)
+                
+                # Replay a cached answer through the same chunk/complete protocol
+                cached_answer = await self.answer_cache.lookup(message, intent, learning_level)
+                if cached_answer:
+                    yield {"type": "chunk", "content": cached_answer["content"]}
+                    suggestions = await coordinator._generate_suggestions(intent, learning_level, context)
+                    yield {
+                        "type": "complete",
+                        "suggestions": suggestions,
+                        "learning_level": learning_level,
+                        "messageId": message_id,
+                        "cached": True
+                    }
+                    return
+                
                 # Single agent routing for non-token analysis
                 agent_name = self._get_agent_from_intent(intent)
                 yield {"type": "status", "agent": "coordinator", "message": f"Routing to {agent_name} agent..."}
@@ -962,7 +1039,8 @@ class EnhancedLangGraphOrchestrator:
                 }
                 
                 # Process message through specialist agent
-                learning_level = kwargs.get("learning_level", 0)
+                answer_parts = []
+                answer_failed = False
                 
                 # Check if it's the educator agent and use streaming
                 if hasattr(specialist_agent, "process_stream"):
@@ -973,6 +1051,10 @@ class EnhancedLangGraphOrchestrator:
                         learning_level=learning_level,
                         context=enhanced_context
                     ):
+                        if chunk.get("type") == "chunk":
+                            answer_parts.append(chunk.get("content", ""))
+                        elif chunk.get("type") == "error":
+                            answer_failed = True
                         yield chunk
                 else:
                     # Agent doesn't support streaming, use regular method and stream the result
@@ -985,11 +1067,16 @@ class EnhancedLangGraphOrchestrator:
                     
                     # Stream the response as-is (don't break into characters)
                     if isinstance(response, str):
+                        answer_parts.append(response)
                         yield {"type": "chunk", "content": response}
                     elif isinstance(response, dict):
                         response_text = response.get("message", "")
+                        answer_parts.append(response_text)
                         yield {"type": "chunk", "content": response_text}
                 
+                if not answer_failed:
+                    await self.answer_cache.store(message, intent, learning_level, "".join(answer_parts))
+                
                 # Generate suggestions based on intent
                 suggestions = await coordinator._generate_suggestions(intent, learning_level, context)
                 
@@ -1251,6 +1338,10 @@ class EnhancedLangGraphOrchestrator:
             if set(state["required_agents"]) == set(state["completed_agents"]):
                 return "synthesizer"
             
+            # Fan out when more than one specialist is still pending
+            if self.parallel_agents and len(self._pending_specialists(state)) > 1:
+                return "parallel_specialists"
+            
             # Route to next required agent
             for agent in state["required_agents"]:
                 if agent not in state["completed_agents"]:
@@ -1262,6 +1353,14 @@ class EnhancedLangGraphOrchestrator:
             logger.error(f"Error in enhanced routing: {e}")
             return "synthesizer"
     
+    def _pending_specialists(self, state: EnhancedAgentState) -> List[str]:
+        """Required specialist agents that have not responded yet, in order"""
+        pending = []
+        for agent in state["required_agents"]:
+            if agent in self.specialist_nodes and agent not in state["completed_agents"] and agent not in pending:
+                pending.append(agent)
+        return pending
+    
     def _calculate_importance_score(self, state: EnhancedAgentState) -> float:
         """Calculate importance score for memory storage"""
         try:
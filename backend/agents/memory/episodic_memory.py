@@ -68,36 +68,55 @@ class EpisodicMemory:
             logger.error(f"Error storing episode: {e}")
             return None
     
+    async def load_episodes(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Load all of a user's episodes in two round trips (LRANGE + MGET),
+        newest first; expired episode keys are skipped
+        """
+        try:
+            user_episodes_key = f"user_episodes:{user_id}"
+            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
+            
+            if not episode_ids:
+                return []
+            
+            episodes = []
+            for episode_data in await self.redis_service.mget(episode_ids):
+                if episode_data:
+                    episodes.append(json.loads(episode_data))
+            return episodes
+            
+        except Exception as e:
+            logger.error(f"Error loading episodes: {e}")
+            return []
+    
     async def get_relevant_episodes(
         self,
         user_id: str,
         query: str,
         max_episodes: int = 5,
-        episode_types: List[str] = None
+        episode_types: List[str] = None,
+        episodes: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
-        """Get episodes relevant to a query"""
+        """Get episodes relevant to a query (pass `episodes` to reuse a bulk load)"""
         try:
             # Get user's episodes
-            user_episodes_key = f"user_episodes:{user_id}"
-            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
+            if episodes is None:
+                episodes = await self.load_episodes(user_id)
             
-            if not episode_ids:
+            if not episodes:
                 return []
             
-            episodes = []
-            for episode_id in episode_ids:
-                episode_data = await self.redis_service.get(episode_id)
-                if episode_data:
-                    episode = json.loads(episode_data)
-                    
-                    # Filter by episode type if specified
-                    if episode_types and episode.get('episode_type') not in episode_types:
-                        continue
-                    
-                    # Calculate relevance score
-                    relevance_score = self._calculate_relevance_score(episode, query)
-                    episode['relevance_score'] = relevance_score
-                    episodes.append(episode)
+            scored_episodes = []
+            for episode in episodes:
+                # Filter by episode type if specified
+                if episode_types and episode.get('episode_type') not in episode_types:
+                    continue
+                
+                # Calculate relevance score
+                relevance_score = self._calculate_relevance_score(episode, query)
+                scored_episodes.append({**episode, 'relevance_score': relevance_score})
+            episodes = scored_episodes
             
             # Sort by relevance and importance
             episodes.sort(
@@ -115,23 +134,20 @@ class EpisodicMemory:
         self,
         user_id: str,
         topic: str = None,
-        max_moments: int = 10
+        max_moments: int = 10,
+        episodes: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """Get significant learning moments for a user"""
         try:
-            user_episodes_key = f"user_episodes:{user_id}"
-            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
+            if episodes is None:
+                episodes = await self.load_episodes(user_id)
             
             learning_moments = []
-            for episode_id in episode_ids:
-                episode_data = await self.redis_service.get(episode_id)
-                if episode_data:
-                    episode = json.loads(episode_data)
-                    
-                    # Filter for learning moments
-                    if episode.get('episode_type') in ['breakthrough', 'aha_moment', 'correction', 'success']:
-                        if not topic or topic.lower() in episode.get('content', '').lower():
-                            learning_moments.append(episode)
+            for episode in episodes:
+                # Filter for learning moments
+                if episode.get('episode_type') in ['breakthrough', 'aha_moment', 'correction', 'success']:
+                    if not topic or topic.lower() in episode.get('content', '').lower():
+                        learning_moments.append(episode)
             
             # Sort by importance and recency
             learning_moments.sort(
@@ -148,13 +164,14 @@ class EpisodicMemory:
     async def get_emotional_context(
         self,
         user_id: str,
-        timeframe_days: int = 7
+        timeframe_days: int = 7,
+        episodes: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """Get user's emotional context over time"""
         try:
             since = datetime.now() - timedelta(days=timeframe_days)
-            user_episodes_key = f"user_episodes:{user_id}"
-            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
+            if episodes is None:
+                episodes = await self.load_episodes(user_id)
             
             emotional_data = {
                 "positive": 0,
@@ -166,16 +183,13 @@ class EpisodicMemory:
                 "confident": 0
             }
             
-            for episode_id in episode_ids:
-                episode_data = await self.redis_service.get(episode_id)
-                if episode_data:
-                    episode = json.loads(episode_data)
-                    episode_time = datetime.fromisoformat(episode.get('timestamp', ''))
-                    
-                    if episode_time >= since:
-                        emotional_context = episode.get('emotional_context', 'neutral')
-                        if emotional_context in emotional_data:
-                            emotional_data[emotional_context] += 1
+            for episode in episodes:
+                episode_time = datetime.fromisoformat(episode.get('timestamp', ''))
+                
+                if episode_time >= since:
+                    emotional_context = episode.get('emotional_context', 'neutral')
+                    if emotional_context in emotional_data:
+                        emotional_data[emotional_context] += 1
             
             # Calculate emotional state
             total_episodes = sum(emotional_data.values())
@@ -198,19 +212,14 @@ class EpisodicMemory:
     ) -> List[Dict[str, Any]]:
         """Get learning progression for a specific topic"""
         try:
-            user_episodes_key = f"user_episodes:{user_id}"
-            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
+            episodes = await self.load_episodes(user_id)
             
             topic_episodes = []
-            for episode_id in episode_ids:
-                episode_data = await self.redis_service.get(episode_id)
-                if episode_data:
-                    episode = json.loads(episode_data)
-                    
-                    # Check if episode is related to topic
-                    if (topic.lower() in episode.get('content', '').lower() or
-                        topic.lower() in episode.get('metadata', {}).get('topics', [])):
-                        topic_episodes.append(episode)
+            for episode in episodes:
+                # Check if episode is related to topic
+                if (topic.lower() in episode.get('content', '').lower() or
+                    topic.lower() in episode.get('metadata', {}).get('topics', [])):
+                    topic_episodes.append(episode)
             
             # Sort by timestamp
             topic_episodes.sort(key=lambda x: x.get('timestamp', ''))
@@ -305,19 +314,17 @@ class EpisodicMemory:
         try:
             cutoff_date = datetime.now() - timedelta(days=days_old)
             user_episodes_key = f"user_episodes:{user_id}"
-            episode_ids = await self.redis_service.lrange(user_episodes_key, 0, -1)
             
-            cleaned_count = 0
-            for episode_id in episode_ids:
-                episode_data = await self.redis_service.get(episode_id)
-                if episode_data:
-                    episode = json.loads(episode_data)
-                    episode_time = datetime.fromisoformat(episode.get('timestamp', ''))
-                    
-                    if episode_time < cutoff_date:
-                        await self.redis_service.delete(episode_id)
-                        await self.redis_service.lrem(user_episodes_key, 1, episode_id)
-                        cleaned_count += 1
+            old_episode_ids = [
+                episode['episode_id']
+                for episode in await self.load_episodes(user_id)
+                if datetime.fromisoformat(episode.get('timestamp', '')) < cutoff_date
+            ]
+            
+            # One DEL and one pipelined batch of LREMs for the whole set
+            await self.redis_service.delete_many(old_episode_ids)
+            await self.redis_service.lrem_many(user_episodes_key, old_episode_ids)
+            cleaned_count = len(old_episode_ids)
             
             logger.info(f"Cleaned up {cleaned_count} old episodes for user {user_id}")
             return cleaned_count
@@ -154,12 +154,15 @@ class MemoryManager:
             learning_progress = await self.long_term.get_learning_progress(user_id)
             profile.update(learning_progress)
             
+            # Load episodes once for both episodic views
+            episodes = await self.episodic.load_episodes(user_id)
+            
             # Get emotional context
-            emotional_context = await self.episodic.get_emotional_context(user_id)
+            emotional_context = await self.episodic.get_emotional_context(user_id, episodes=episodes)
             profile["emotional_context"] = emotional_context
             
             # Get learning moments
-            learning_moments = await self.episodic.get_learning_moments(user_id)
+            learning_moments = await self.episodic.get_learning_moments(user_id, episodes=episodes)
             profile["learning_moments"] = learning_moments
             
             # Get memory stats
@@ -53,28 +53,14 @@ class RAGPipeline:
         """
         try:
             # Generate embeddings for the content
-            text = f"{content.get('title', '')} {content.get('content', '')}"
+            text = self._content_text(content)
             embedding = await self.embeddings_service.generate_embeddings(text)
             
             if not embedding:
                 return False
             
             # Create document for vector store
-            document = {
-                "id": content.get("id", self._generate_id(text)),
-                "title": content.get("title", ""),
-                "content": content.get("content", ""),
-                "category": content.get("category", "general"),
-                "difficulty_level": content.get("difficulty_level", 1),
-                "tags": content.get("tags", []),
-                "embedding": embedding,
-                "metadata": {
-                    "created_at": datetime.now().isoformat(),
-                    "source": content.get("source", "manual"),
-                    "author": content.get("author", "DeCrypt"),
-                    "version": content.get("version", "1.0")
-                }
-            }
+            document = self._build_document(content, text, embedding)
             
             # Store in vector database
             await self.vector_store.add_documents([document])
@@ -89,6 +75,53 @@ class RAGPipeline:
             logger.error(f"Error adding educational content: {e}")
             return False
     
+    async def add_educational_contents(self, contents: List[Dict[str, Any]]) -> int:
+        """
+        Add many content items with one batched embedding call (used for re-indexing)
+        
+        Returns:
+            Number of items stored
+        """
+        try:
+            texts = [self._content_text(content) for content in contents]
+            embeddings = await self.embeddings_service.generate_embeddings_batch(texts)
+            
+            documents = [
+                self._build_document(content, text, embedding)
+                for content, text, embedding in zip(contents, texts, embeddings)
+                if embedding
+            ]
+            if not documents:
+                return 0
+            
+            stored_ids = await self.vector_store.add_documents(documents)
+            return len(stored_ids)
+            
+        except Exception as e:
+            logger.error(f"Error adding educational contents: {e}")
+            return 0
+    
+    def _content_text(self, content: Dict[str, Any]) -> str:
+        return f"{content.get('title', '')} {content.get('content', '')}"
+    
+    def _build_document(self, content: Dict[str, Any], text: str, embedding: List[float]) -> Dict[str, Any]:
+        """Vector store document for a content item"""
+        return {
+            "id": content.get("id", self._generate_id(text)),
+            "title": content.get("title", ""),
+            "content": content.get("content", ""),
+            "category": content.get("category", "general"),
+            "difficulty_level": content.get("difficulty_level", 1),
+            "tags": content.get("tags", []),
+            "embedding": embedding,
+            "metadata": {
+                "created_at": datetime.now().isoformat(),
+                "source": content.get("source", "manual"),
+                "author": content.get("author", "DeCrypt"),
+                "version": content.get("version", "1.0")
+            }
+        }
+    
     async def retrieve_relevant_content(
         self,
         query: str,
@@ -46,6 +46,10 @@ def register_social_sentiment_tools(tool_registry: ToolRegistry, sentiment_servi
                             "type": "integer",
                             "description": "Hours to look back (default: 24)",
                             "default": 24
+                        },
+                        "token_address": {
+                            "type": "string",
+                            "description": "Token contract address, if known (reuses cached sentiment)"
                         }
                     },
                     "required": ["token_symbol"]
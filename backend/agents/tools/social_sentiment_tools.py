@@ -24,7 +24,8 @@ class SocialSentimentTools:
         self, 
         token_symbol: str, 
         subreddit: str = "CryptoCurrency", 
-        hours: int = 24
+        hours: int = 24,
+        token_address: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Fetch Reddit sentiment for a token from specific subreddit
@@ -33,6 +34,8 @@ class SocialSentimentTools:
             token_symbol: Token symbol to search for
             subreddit: Reddit subreddit to search (default: CryptoCurrency)
             hours: Hours to look back (default: 24)
+            token_address: Token contract address; when known, the Reddit
+                figures come from the shared multi-platform sentiment cache
             
         Returns:
             Dict containing Reddit sentiment data
@@ -40,8 +43,20 @@ class SocialSentimentTools:
         try:
             logger.info(f"Fetching Reddit sentiment for {token_symbol} in r/{subreddit}")
             
-            # Use the enhanced Reddit sentiment method
-            reddit_data = await self.sentiment_service._get_reddit_sentiment_enhanced(token_symbol)
+            if token_address:
+                sentiment_data = await self.sentiment_service.get_multi_platform_sentiment(token_address, token_symbol)
+                reddit = sentiment_data.get("platform_breakdown", {}).get("reddit", {})
+                reddit_data = {
+                    "reddit_sentiment": reddit.get("sentiment", 0),
+                    "reddit_posts": reddit.get("posts", 0),
+                    "reddit_engagement": reddit.get("engagement", 0),
+                    "posts": reddit.get("top_posts", [])
+                } if reddit.get("available") else {}
+                last_updated = sentiment_data.get("last_updated")
+            else:
+                # Symbol only: no cache key, but the Reddit searches themselves are cached
+                reddit_data = await self.sentiment_service._get_reddit_sentiment_enhanced(token_symbol)
+                last_updated = None
             
             if not reddit_data:
                 return {
@@ -58,7 +73,7 @@ class SocialSentimentTools:
                 "engagement": reddit_data.get("reddit_engagement", 0),
                 "posts": reddit_data.get("posts", [])[:3],  # Top 3 posts
                 "hours_analyzed": hours,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": last_updated or datetime.now().isoformat()
             }
             
         except Exception as e:
@@ -85,7 +100,8 @@ class SocialSentimentTools:
         try:
             logger.info(f"Fetching Farcaster sentiment for {token_symbol} in {channel}")
             
-            # Use the Farcaster sentiment method
+            # Farcaster is not part of the (cached) multi-platform analysis, which
+            # leaves it out while Neynar is a paid API, so query it directly
             farcaster_data = await self.sentiment_service._get_farcaster_sentiment(token_symbol)
             
             if not farcaster_data:
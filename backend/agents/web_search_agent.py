@@ -113,7 +113,7 @@ Remember: You are a research analyst, not a financial advisor. Focus on synthesi
                 return "I'm having trouble searching the web right now. Please try again!"
             
             # Perform web search using Tavily
-            search_results = await self.tavily_service.search(message)
+            search_results = await self.tavily_service.search_with_metadata(message)
             
             if not search_results or not search_results.get('results'):
                 return "I couldn't find any relevant information about that topic. Could you try rephrasing your question?"
@@ -183,6 +183,8 @@ Remember: You are a research analyst, not a financial advisor. Focus on synthesi
             search_context = f"\n\nSearch Results Available: {len(search_results.get('results', []))} results found"
             if search_results.get('results'):
                 search_context += f"\n\nTop Sources: {', '.join([result.get('title', 'Unknown') for result in search_results['results'][:3]])}"
+            if search_results.get('cached'):
+                search_context += f"\n\nThese results were fetched {int(search_results.get('cache_age_seconds') or 0) // 60} minutes ago"
         
         return base_prompt + level_context + context_info + search_context
     
@@ -9,7 +9,7 @@ from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime
 import httpx
-from web3 import Web3
+from .rpc_executor import ThreadedWeb3
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,7 @@ class BaseClient:
     
     def __init__(self):
         self.web3 = None
+        self.rpc = None  # ThreadedWeb3 facade - all RPC round trips go through it
         self.base_rpc_url = None
         self.bitquery_api_key = None
         
@@ -44,11 +45,12 @@ class BaseClient:
             else:
                 self.base_rpc_url = os.getenv("BASE_RPC_URL", "https://sepolia.base.org")
             
-            # Initialize Web3 connection
-            self.web3 = Web3(Web3.HTTPProvider(self.base_rpc_url))
+            # Initialize Web3 connection (blocking calls run on a bounded thread pool)
+            self.rpc = ThreadedWeb3(self.base_rpc_url)
+            self.web3 = self.rpc.w3
             
             # Test connection
-            if self.web3.is_connected():
+            if await self.rpc.is_connected(force=True):
                 logger.info("Base client initialized successfully")
             else:
                 logger.error("Failed to connect to Base RPC")
@@ -61,8 +63,8 @@ class BaseClient:
     async def check_connection(self) -> bool:
         """Check if Base RPC connection is working"""
         try:
-            if self.web3:
-                return self.web3.is_connected()
+            if self.rpc:
+                return await self.rpc.is_connected()
             return False
         except Exception as e:
             logger.error(f"Base connection check failed: {e}")
@@ -76,7 +78,7 @@ class BaseClient:
             if not self.web3:
                 return None
             
-            latest_block = self.web3.eth.get_block('latest')
+            latest_block = await self.rpc.call(self.web3.eth.get_block, 'latest')
             
             return {
                 "block_number": latest_block.number,
@@ -102,7 +104,7 @@ class BaseClient:
             
             # For ETH balance
             if token_address.lower() == "0x0000000000000000000000000000000000000000":
-                balance_wei = self.web3.eth.get_balance(wallet_address)
+                balance_wei = await self.rpc.call(self.web3.eth.get_balance, wallet_address)
                 balance_eth = self.web3.from_wei(balance_wei, 'ether')
                 return float(balance_eth)
             
@@ -139,7 +141,7 @@ class BaseClient:
             if not self.web3:
                 return None
             
-            gas_price = self.web3.eth.gas_price
+            gas_price = await self.rpc.call(lambda: self.web3.eth.gas_price)
             gas_price_gwei = self.web3.from_wei(gas_price, 'gwei')
             
             return {
@@ -161,8 +163,10 @@ class BaseClient:
             if not self.web3:
                 return {}
             
-            latest_block = await self.get_latest_block()
-            gas_price = await self.get_gas_price()
+            latest_block, gas_price = await asyncio.gather(
+                self.get_latest_block(),
+                self.get_gas_price()
+            )
             
             return {
                 "chain_id": self.base_chain_id,
@@ -171,7 +175,7 @@ class BaseClient:
                 "latest_block": latest_block,
                 "gas_price": gas_price,
                 "rpc_url": self.base_rpc_url,
-                "is_connected": self.web3.is_connected()
+                "is_connected": await self.rpc.is_connected()
             }
             
         except Exception as e:
@@ -237,13 +241,15 @@ class BaseClient:
             if not self.web3:
                 return {}
             
-            latest_block = await self.get_latest_block()
-            gas_price = await self.get_gas_price()
+            latest_block, gas_price = await asyncio.gather(
+                self.get_latest_block(),
+                self.get_gas_price()
+            )
             
             return {
                 "latest_block_number": latest_block.get("block_number", 0) if latest_block else 0,
                 "gas_price_gwei": gas_price.get("gas_price_gwei", 0) if gas_price else 0,
-                "is_connected": self.web3.is_connected(),
+                "is_connected": await self.rpc.is_connected(),
                 "chain_id": self.base_chain_id,
                 "chain_name": self.base_chain_name,
                 "timestamp": datetime.now().isoformat()
@@ -252,3 +258,8 @@ class BaseClient:
         except Exception as e:
             logger.error(f"Error getting Base stats: {e}")
             return {}
+    
+    async def close(self):
+        """Release the RPC thread pool"""
+        if self.rpc:
+            self.rpc.close()
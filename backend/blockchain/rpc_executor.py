@@ -0,0 +1,94 @@
+"""
+RPC Executor - Runs blocking web3 calls off the event loop
+Part of the DeCrypt backend services
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedWeb3:
+    """
+    Bounded thread-pool facade over a synchronous Web3 HTTP client
+
+    web3's HTTPProvider blocks on every JSON-RPC round trip; calling it from an
+    `async def` stalls the whole event loop (and every WebSocket stream with it).
+    All calls go through `call()`, which runs them on a small dedicated pool that
+    shares one keep-alive requests.Session. Connectivity is checked at most once
+    per `connection_check_ttl` seconds.
+    """
+
+    def __init__(self, rpc_url: str, max_workers: int = None, request_timeout: float = None,
+                 connection_check_ttl: float = None):
+        self.rpc_url = rpc_url
+        self.max_workers = max_workers or int(os.getenv("WEB3_RPC_MAX_WORKERS", "4"))
+        self.request_timeout = request_timeout or float(os.getenv("WEB3_RPC_TIMEOUT", "10"))
+        self.connection_check_ttl = connection_check_ttl or float(os.getenv("WEB3_CONNECTION_CHECK_TTL", "30"))
+
+        # One pooled session sized to the worker count so calls reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.w3 = Web3(Web3.HTTPProvider(
+            rpc_url,
+            request_kwargs={"timeout": self.request_timeout},
+            session=self.session
+        ))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="web3-rpc")
+
+        self._connected = False
+        self._checked_at = 0.0
+        self.stats = {"calls": 0, "errors": 0, "in_flight": 0, "connection_checks": 0}
+
+    async def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking web3 callable on the RPC pool"""
+        loop = asyncio.get_running_loop()
+        self.stats["calls"] += 1
+        self.stats["in_flight"] += 1
+        try:
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def is_connected(self, force: bool = False) -> bool:
+        """Cached connectivity check (one RPC round trip per TTL at most)"""
+        now = time.monotonic()
+        if not force and self._checked_at and (now - self._checked_at) < self.connection_check_ttl:
+            return self._connected
+
+        try:
+            self.stats["connection_checks"] += 1
+            self._connected = bool(await self.call(self.w3.is_connected))
+        except Exception as e:
+            logger.warning(f"Web3 connectivity check failed for {self.rpc_url}: {e}")
+            self._connected = False
+        self._checked_at = time.monotonic()
+        return self._connected
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_workers": self.max_workers,
+            "connected": self._connected,
+            "rpc_url": self.rpc_url
+        }
+
+    def close(self):
+        """Release the thread pool and pooled connections"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
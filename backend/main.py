@@ -9,7 +9,8 @@ from fastapi.staticfiles import StaticFiles
 import asyncio
 import json
 import os
-from typing import Dict, List
+import uuid
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
@@ -34,9 +35,16 @@ from services.tavily_service import TavilyService
 from services.educational_content_service import EducationalContentService
 from services.progress_tracking_service import ProgressTrackingService
 from services.websocket_service import WebSocketService
+from services.websocket_backplane import RedisBackplane
+from services.chat_generation_manager import ChatGenerationManager
+from services.stream_coalescer import stream_coalescer
 from services.wallet_auth_service import WalletAuthService
 from services.analytics_service import AnalyticsService
+from services.analytics_events import analytics_events
 from services.miniapp_service import MiniAppService
+from services.http_client import http_client_pool
+from services.rate_limiter import rate_limiter
+from services.single_flight import single_flight
 from blockchain.base_client import BaseClient
 from database.connection import check_database_connection
 from models.schemas import ChatMessage, TokenData, PortfolioState
@@ -87,6 +95,10 @@ analytics_service = AnalyticsService()
 miniapp_service = MiniAppService()
 base_client = BaseClient()
 
+# Batched Uniswap V3 price quotes on Base
+from services.dex_price_service import DexPriceService
+dex_price_service = DexPriceService()
+
 # Initialize session service (will be initialized in startup)
 from services.session_service import SessionService
 session_service = None
@@ -95,10 +107,18 @@ session_service = None
 from services.coingecko_service import CoinGeckoService
 coingecko_service = CoinGeckoService()
 
+# Keeps token categories warm and pushes fresh lists to /ws/tokens
+from services.token_refresh_service import TokenRefreshService
+token_refresh_service = TokenRefreshService(coingecko_service, websocket_service)
+
 # Initialize sentiment service
 from services.sentiment_service import SentimentService
 sentiment_service = SentimentService(coingecko_service, tavily_service)
 
+# Records sentiment snapshots for tokens whose timeline is being viewed
+from services.sentiment_timeseries import SentimentSnapshotCollector
+sentiment_snapshot_collector = SentimentSnapshotCollector(sentiment_service)
+
 # Initialize feedback service
 from services.feedback_service import FeedbackService
 feedback_service = FeedbackService()
@@ -114,7 +134,9 @@ web_search_agent = None
 # Initialize Enhanced LangGraph orchestrator
 enhanced_langgraph_orchestrator = None
 
-# Initialize RAG pipeline
+# Initialize RAG pipeline with the local memory-mapped vector store
+from services.vector_store import LocalVectorStore
+vector_store = LocalVectorStore()
 rag_pipeline = RAGPipeline()
 
 # WebSocket connection manager removed - using websocket_service instead
@@ -126,6 +148,9 @@ async def startup_event():
     logger.info("EAILI5 is waking up...")
     
     try:
+        # Initialize shared HTTP connection pool for upstream data services
+        await http_client_pool.initialize()
+        
         # Initialize OpenAI
         await openai_service.initialize(os.getenv("OPENAI_API_KEY"))
         
@@ -138,9 +163,21 @@ async def startup_event():
         # Initialize Base client
         await base_client.initialize(os.getenv("BASE_RPC_URL", "https://mainnet.base.org"))
         
+        # Initialize DEX price service (Multicall3-batched quotes)
+        await dex_price_service.initialize(os.getenv("BASE_RPC_URL", "https://mainnet.base.org"))
+        
         # Initialize Redis
         await redis_service.initialize(os.getenv("REDIS_URL", "redis://redis:6379"))
         
+        # Share upstream rate-limit budgets across workers through Redis
+        await rate_limiter.initialize(redis_service.redis_client)
+        await single_flight.initialize(redis_service.redis_client)
+        await tavily_service.initialize_cache(redis_service)
+        
+        # Fan WebSocket messages out through Redis so every replica reaches its own clients
+        if os.getenv("WS_BACKPLANE", "redis").lower() == "redis":
+            await websocket_service.initialize(RedisBackplane(redis_service.redis_client))
+        
         # Initialize Session Service with Redis
         global session_service
         try:
@@ -150,22 +187,33 @@ async def startup_event():
             logger.error(f"Failed to initialize session service: {e}")
             session_service = None
         
-        # CoinGecko service doesn't need initialization (no API key required for free tier)
-        logger.info("CoinGecko service ready (free tier, no API key required)")
+        # CoinGecko needs no API key on the free tier; Redis shares its Base token index
+        await coingecko_service.initialize(redis_service.redis_client)
         
         # Initialize Token Service with dependencies
-        await token_service.initialize(redis_service, etherscan_service, base_client, coingecko_service)
+        await token_service.initialize(redis_service, etherscan_service, base_client, coingecko_service, dex_price_service)
+        
+        # Start background refresh of token categories (stale-while-revalidate)
+        await token_refresh_service.initialize(redis_service.redis_client)
+        
+        # Sentiment: shared result cache, snapshot history, baselines and the background collector
+        await sentiment_service.initialize_cache(redis_service.redis_client)
+        await sentiment_service.timeseries.initialize(redis_service.redis_client)
+        await sentiment_service.anomaly_detector.initialize(redis_service.redis_client)
+        await sentiment_snapshot_collector.initialize()
         
         # Initialize educational content service
         await educational_content_service.initialize()
         
         # Initialize progress tracking service
         await progress_tracking_service.initialize(redis_service.redis_client)
+        await progress_tracking_service.backfill_leaderboard()
         
         # Initialize wallet authentication service
         await wallet_auth_service.initialize(redis_service.redis_client)
         
-        # Initialize analytics service
+        # Initialize analytics service (aggregates are maintained by analytics_events)
+        await analytics_events.initialize(redis_service.redis_client)
         await analytics_service.initialize(redis_service.redis_client)
         
         # Initialize Mini App service
@@ -237,7 +285,8 @@ async def startup_event():
             "base_client": base_client,
             "educational": educational_content_service,
             "progress": progress_tracking_service,
-            "sentiment": sentiment_service
+            "sentiment": sentiment_service,
+            "openai": openai_service
         }
         logger.info(f"Initializing enhanced orchestrator with agents: {list(agents.keys())}")
         
@@ -270,9 +319,9 @@ async def startup_event():
             logger.warning("Enhanced orchestrator disabled - database connection failed")
         
         # Initialize RAG pipeline
-        # Note: This would need a vector store implementation
-        # For now, we'll initialize without dependencies
-        await rag_pipeline.initialize(None, openai_service, None)
+        await vector_store.initialize()
+        await openai_service.initialize_embedding_cache(redis_service.redis_client)
+        await rag_pipeline.initialize(vector_store, openai_service, redis_service)
         
         # Test session service
         try:
@@ -293,6 +342,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup resources on shutdown"""
+    await token_refresh_service.stop()
+    await sentiment_snapshot_collector.stop()
+    await websocket_service.close()
+    await base_client.close()
+    await dex_price_service.close()
+    vector_store.close()
+    openai_service.embedding_cache.close()
+    if sentiment_service.reddit:
+        sentiment_service.reddit.close()
+    
+    await http_client_pool.close()
+    logger.info("HTTP client pool closed")
+    
     from database.connection import close_database_connections
     await close_database_connections()
     logger.info("Database connections closed")
@@ -481,11 +543,11 @@ async def get_social_sentiment_analysis(token_address: str, hours: int = 24):
         return {"error": "Failed to fetch social sentiment analysis", "status": "error"}
 
 @app.get("/api/tokens/{token_address}/sentiment-timeline")
-async def get_sentiment_timeline(token_address: str, hours: int = 24):
+async def get_sentiment_timeline(token_address: str, hours: int = 24, resolution: Optional[str] = None):
     """Get sentiment timeline data for charting"""
     try:
-        # Get sentiment time series data
-        timeline_data = await sentiment_service.get_sentiment_time_series(token_address, hours)
+        # Served from the sentiment snapshot store (raw, 5m, 1h or 1d points)
+        timeline_data = await sentiment_service.get_sentiment_time_series(token_address, hours, resolution)
         
         return {
             "timeline": timeline_data,
@@ -643,6 +705,16 @@ async def get_leaderboard(period: str = "all_time", limit: int = 10):
         logger.error(f"Error fetching leaderboard: {e}")
         return {"error": "Failed to fetch leaderboard", "status": "error"}
 
+@app.get("/api/progress/{user_id}/rank")
+async def get_user_rank(user_id: str, period: str = "all_time"):
+    """Get a user's leaderboard rank for specified period"""
+    try:
+        rank = await progress_tracking_service.get_user_rank(user_id, period)
+        return {"rank": rank, "status": "success"}
+    except Exception as e:
+        logger.error(f"Error fetching user rank: {e}")
+        return {"error": "Failed to fetch user rank", "status": "error"}
+
 @app.post("/api/progress/{user_id}/complete-lesson")
 async def complete_lesson(user_id: str, lesson_data: dict):
     """Mark a lesson as completed"""
@@ -836,6 +908,84 @@ async def end_session(request: dict):
         logger.error(f"Error ending session: {e}")
         raise HTTPException(status_code=500, detail="Failed to end session")
 
+async def _generate_chat_response(send, message_data: Dict[str, Any], user_id: str, session_token: str, message_id: str, streaming_mode: bool):
+    """Run one chat generation for the secure WebSocket (as its own task, so it can be cancelled)"""
+    user_message = message_data["message"]
+    try:
+        if streaming_mode:
+            # STREAMING MODE - Chunks with status updates
+            logger.info("Using streaming mode...")
+            
+            stream = enhanced_langgraph_orchestrator.process_message_stream(
+                message=user_message,
+                user_id=user_id,
+                session_id=session_token,
+                learning_level=message_data.get("learning_level", 0),
+                context=message_data.get("context", {}),
+                message_id=message_id
+            )
+            
+            # Merge per-token chunks into one frame per window (client may pass coalesce_ms, 0 = off)
+            window_ms = stream_coalescer.negotiate(message_data.get("coalesce_ms"))
+            async for stream_data in stream_coalescer.coalesce(stream, window_ms):
+                # Add messageId to each stream chunk
+                stream_data["messageId"] = message_id
+                
+                await send(stream_data)
+            
+            logger.info("Streaming complete")
+        
+        else:
+            # NON-STREAMING MODE
+            logger.info("Using non-streaming mode...")
+            response = await enhanced_langgraph_orchestrator.process_message(
+                message=user_message,
+                user_id=user_id,
+                session_id=session_token,
+                learning_level=message_data.get("learning_level", 0),
+                context=message_data.get("context", {}),
+                message_id=message_id
+            )
+            
+            logger.info(f"LangGraph response received: {response}")
+            
+            # Validate response has message
+            if not response.get("message"):
+                logger.error(f"Empty message in response: {response}")
+                raise ValueError("LangGraph returned empty message")
+            
+            # Prepare response for frontend
+            response_data = {
+                "type": "ai_response",
+                "message": response["message"],
+                "suggestions": response.get("suggestions", []),
+                "learning_level": response.get("learning_level", 0),
+                "messageId": message_id
+            }
+            
+            # Send response back to client
+            await send(response_data)
+            logger.info("Response sent successfully to frontend")
+            
+    except WebSocketDisconnect:
+        logger.info(f"Client disconnected during generation {message_id}")
+    except Exception as e:
+        logger.error(f"LangGraph orchestrator error: {e}")
+        logger.error(f"Error type: {type(e)}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        
+        # Send error response
+        try:
+            await send({
+                "type": "error",
+                "message": "I'm having trouble processing that. Could you try again?",
+                "suggestions": ["What is a blockchain?", "How do I buy my first crypto?", "What's the difference between Bitcoin and Ethereum?"],
+                "messageId": message_id
+            })
+        except Exception:
+            pass
+
 @app.websocket("/ws/chat/secure")
 async def websocket_chat_secure(websocket: WebSocket):
     """Secure WebSocket endpoint for AI chat with session validation"""
@@ -847,6 +997,14 @@ async def websocket_chat_secure(websocket: WebSocket):
     sys.stdout.write("=== SECURE WEBSOCKET CONNECTED ===\n")
     sys.stdout.flush()
     
+    # Generations run as tasks so this loop keeps reading heartbeats, new questions and cancels
+    generations = ChatGenerationManager()
+    send_lock = asyncio.Lock()
+    
+    async def send(payload: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_json(payload)
+    
     try:
         while True:
             # Receive message from client
@@ -864,7 +1022,7 @@ async def websocket_chat_secure(websocket: WebSocket):
             
             if message_type == "chat":
                 user_message = message_data["message"]
-                message_id = message_data.get("messageId")
+                message_id = message_data.get("messageId") or f"msg-{uuid.uuid4().hex[:12]}"
                 session_token = message_data.get("session_id")  # Session token for validation
                 streaming_mode = message_data.get("streaming", True)  # Default to streaming
                 logger.info(f"Processing secure chat message: '{user_message}' (ID: {message_id}, Streaming: {streaming_mode})")
@@ -872,7 +1030,7 @@ async def websocket_chat_secure(websocket: WebSocket):
                 # SECURITY: Validate session token
                 session_data = await session_service.validate_session(session_token)
                 if not session_data:
-                    await websocket.send_json({
+                    await send({
                         "type": "error",
                         "message": "Invalid or expired session. Please refresh.",
                         "messageId": message_id
@@ -888,7 +1046,7 @@ async def websocket_chat_secure(websocket: WebSocket):
                 
                 # Check if orchestrator is available
                 if not enhanced_langgraph_orchestrator:
-                    await websocket.send_json({
+                    await send({
                         "type": "error",
                         "message": "AI service is not available. Please try again later.",
                         "suggestions": ["Try refreshing the page", "Check your internet connection"],
@@ -896,73 +1054,23 @@ async def websocket_chat_secure(websocket: WebSocket):
                     })
                     continue
                 
-                try:
-                    if streaming_mode:
-                        # STREAMING MODE - Character by character with status updates
-                        logger.info("Using streaming mode...")
-                        
-                        async for stream_data in enhanced_langgraph_orchestrator.process_message_stream(
-                            message=user_message,
-                            user_id=validated_user_id,
-                            session_id=session_token,
-                            learning_level=message_data.get("learning_level", 0),
-                            context=message_data.get("context", {}),
-                            message_id=message_id
-                        ):
-                            # Add messageId to each stream chunk
-                            stream_data["messageId"] = message_id
-                            
-                            # Send each chunk immediately
-                            await websocket.send_json(stream_data)
-                        
-                        logger.info("Streaming complete")
-                    
-                    else:
-                        # NON-STREAMING MODE
-                        logger.info("Using non-streaming mode...")
-                        response = await enhanced_langgraph_orchestrator.process_message(
-                            message=user_message,
-                            user_id=validated_user_id,
-                            session_id=session_token,
-                            learning_level=message_data.get("learning_level", 0),
-                            context=message_data.get("context", {}),
-                            message_id=message_id
-                        )
-                        
-                        logger.info(f"LangGraph response received: {response}")
-                        
-                        # Validate response has message
-                        if not response.get("message"):
-                            logger.error(f"Empty message in response: {response}")
-                            raise ValueError("LangGraph returned empty message")
-                        
-                        # Prepare response for frontend
-                        response_data = {
-                            "type": "ai_response",
-                            "message": response["message"],
-                            "suggestions": response.get("suggestions", []),
-                            "learning_level": response.get("learning_level", 0),
-                            "messageId": message_id
-                        }
-                        
-                        # Send response back to client
-                        await websocket.send_json(response_data)
-                        logger.info("Response sent successfully to frontend")
-                        
-                except Exception as e:
-                    logger.error(f"LangGraph orchestrator error: {e}")
-                    logger.error(f"Error type: {type(e)}")
-                    import traceback
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    
-                    # Send error response
-                    await websocket.send_json({
+                started = generations.start(message_id, _generate_chat_response(
+                    send, message_data, validated_user_id, session_token, message_id, streaming_mode
+                ))
+                if not started:
+                    await send({
                         "type": "error",
-                        "message": "I'm having trouble processing that. Could you try again?",
-                        "suggestions": ["What is a blockchain?", "How do I buy my first crypto?", "What's the difference between Bitcoin and Ethereum?"],
+                        "message": "I'm still working on your other questions. Give me a moment!",
                         "messageId": message_id
                     })
                 
+            elif message_type == "cancel":
+                # Stop an in-flight generation (and its upstream LLM stream)
+                message_id = message_data.get("messageId")
+                logger.info(f"Cancelling generation: {message_id}")
+                # Acknowledged once the generation has unwound; the receive loop moves on at once
+                generations.cancel(message_id, lambda message_id=message_id: send({"type": "cancelled", "messageId": message_id}))
+                
             elif message_type == "subscribe":
                 # Subscribe to topic
                 topic = message_data.get("topic", "chat")
@@ -992,6 +1100,9 @@ async def websocket_chat_secure(websocket: WebSocket):
             "type": "error",
             "message": "Eaili5 hit a snag. Let me try again..."
         })
+    finally:
+        # Nobody is left to read these answers
+        await generations.cancel_all()
 
 @app.websocket("/ws/tokens")
 async def websocket_tokens(websocket: WebSocket):
@@ -1375,6 +1486,33 @@ async def log_appreciation_transaction(request: dict):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get internal performance metrics for monitoring"""
+    try:
+        return {
+            "http_pool": http_client_pool.get_pool_stats(),
+            "rate_limits": rate_limiter.get_stats(),
+            "single_flight": single_flight.get_stats(),
+            "token_refresh": token_refresh_service.get_stats(),
+            "web3_rpc": base_client.rpc.get_stats() if base_client.rpc else None,
+            "vector_store": vector_store.get_stats(),
+            "embeddings": openai_service.get_embedding_stats(),
+            "web_search_cache": tavily_service.get_cache_stats(),
+            "answer_cache": enhanced_langgraph_orchestrator.answer_cache.get_stats() if enhanced_langgraph_orchestrator else None,
+            "websocket_send": websocket_service.get_send_stats(),
+            "stream_coalescer": stream_coalescer.get_stats(),
+            "reddit": sentiment_service.reddit.get_stats() if sentiment_service.reddit else None,
+            "sentiment_timeseries": sentiment_snapshot_collector.get_stats(),
+            "sentiment_anomalies": sentiment_service.anomaly_detector.get_stats(),
+            "sentiment_cache": sentiment_service.get_cache_stats(),
+            "status": "success",
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching metrics: {e}")
+        return {"error": "Failed to fetch metrics", "status": "error"}
+
 @app.get("/health")
 async def health_check_simple():
     """Simple health check for Docker"""
@@ -0,0 +1,127 @@
+"""
+Analytics Events - Event-driven counters behind the platform analytics
+Part of the EAILI5 backend services
+"""
+
+import os
+from typing import List, Optional
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Keep the learning-level sum consistent with the per-user level set: the
+# delta is taken against the stored level, not the caller's view of it
+SET_LEVEL_SCRIPT = """
+local old = tonumber(redis.call('ZSCORE', KEYS[1], ARGV[1]) or '0')
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+return redis.call('INCRBYFLOAT', KEYS[2], tonumber(ARGV[2]) - old)
+"""
+
+
+class AnalyticsEventRecorder:
+    """
+    Maintains analytics aggregates as state changes, so reads never scan the
+    keyspace. Services call the event methods when they mutate user state;
+    AnalyticsService reads the aggregates with O(1) commands.
+
+    Redis layout (all under `analytics:`):
+        counters               hash of platform-wide totals
+        learning_levels        zset user -> learning level (ZCARD = users)
+        learning_level_sum     float, sum of learning_levels scores
+        categories             zset category -> lessons completed
+        category_users:<cat>   HyperLogLog of users per category
+        tokens_traded          zset token -> simulated trades
+        active:<YYYY-MM-DD>    HyperLogLog of active users per day
+    """
+
+    COUNTERS_KEY = "analytics:counters"
+    LEVELS_KEY = "analytics:learning_levels"
+    LEVEL_SUM_KEY = "analytics:learning_level_sum"
+    CATEGORIES_KEY = "analytics:categories"
+    TOKENS_KEY = "analytics:tokens_traded"
+
+    def __init__(self):
+        self.redis_client = None
+        self.enabled = os.getenv("ANALYTICS_EVENTS_ENABLED", "true").lower() == "true"
+        # Daily activity sketches are kept long enough to answer MAU
+        self.active_ttl = int(os.getenv("ANALYTICS_ACTIVE_TTL_DAYS", "35")) * 86400
+
+    async def initialize(self, redis_client=None):
+        """Attach the Redis client the aggregates live in"""
+        try:
+            self.redis_client = redis_client
+            logger.info(f"Analytics event recorder initialized ({'enabled' if self.enabled else 'disabled'})")
+        except Exception as e:
+            logger.error(f"Error initializing analytics event recorder: {e}")
+            raise
+
+    @staticmethod
+    def active_key(day: datetime) -> str:
+        return f"analytics:active:{day.strftime('%Y-%m-%d')}"
+
+    @staticmethod
+    def category_users_key(category: str) -> str:
+        return f"analytics:category_users:{category}"
+
+    def active_keys(self, days: int, now: Optional[datetime] = None) -> List[str]:
+        """Daily activity keys covering the last `days` days, newest first"""
+        now = now or datetime.now()
+        return [self.active_key(now - timedelta(days=offset)) for offset in range(days)]
+
+    def _track_active(self, pipe, user_id: str):
+        key = self.active_key(datetime.now())
+        pipe.pfadd(key, user_id)
+        pipe.expire(key, self.active_ttl)
+
+    async def _execute(self, pipe, event: str):
+        try:
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record analytics event {event}: {e}")
+
+    async def user_active(self, user_id: str):
+        """Count a user toward today's active users"""
+        if not self.enabled or not self.redis_client or not user_id:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._track_active(pipe, user_id)
+        await self._execute(pipe, "user_active")
+
+    async def lesson_completed(
+        self,
+        user_id: str,
+        category: str,
+        learning_level: int,
+        achievements_earned: int = 0
+    ):
+        """Record a newly completed lesson (call once per lesson, not on repeats)"""
+        if not self.enabled or not self.redis_client or not user_id:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hincrby(self.COUNTERS_KEY, "lessons_completed", 1)
+        if achievements_earned:
+            pipe.hincrby(self.COUNTERS_KEY, "achievements_earned", achievements_earned)
+        if category:
+            pipe.zincrby(self.CATEGORIES_KEY, 1, category)
+            pipe.pfadd(self.category_users_key(category), user_id)
+        pipe.eval(SET_LEVEL_SCRIPT, 2, self.LEVELS_KEY, self.LEVEL_SUM_KEY, user_id, learning_level)
+        self._track_active(pipe, user_id)
+        await self._execute(pipe, "lesson_completed")
+
+    async def trade_simulated(self, user_id: str, token_address: str, trade_type: str):
+        """Record a successful simulated trade"""
+        if not self.enabled or not self.redis_client or not user_id:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hincrby(self.COUNTERS_KEY, "trades_simulated", 1)
+        if trade_type in ("buy", "sell"):
+            pipe.hincrby(self.COUNTERS_KEY, f"trades_{trade_type}", 1)
+        if token_address:
+            pipe.zincrby(self.TOKENS_KEY, 1, token_address.lower())
+        self._track_active(pipe, user_id)
+        await self._execute(pipe, "trade_simulated")
+
+
+# Process-wide recorder shared by the services that mutate user state
+analytics_events = AnalyticsEventRecorder()
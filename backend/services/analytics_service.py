@@ -8,6 +8,7 @@ from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime, timedelta
 import json
+from services.analytics_events import AnalyticsEventRecorder, analytics_events
 
 logger = logging.getLogger(__name__)
 
@@ -135,97 +136,73 @@ class AnalyticsService:
             return {}
     
     # Helper methods for metrics calculation
-    async def _get_total_users(self) -> int:
-        """Get total number of users"""
+    # All reads hit aggregates maintained by analytics_events (no keyspace scans)
+    async def _get_counter(self, field: str) -> int:
+        """Read a platform-wide counter"""
         try:
             if self.redis_client:
-                # Count unique user keys
-                keys = await self.redis_client.keys("progress:*")
-                return len(keys)
+                value = await self.redis_client.hget(AnalyticsEventRecorder.COUNTERS_KEY, field)
+                return int(value or 0)
             return 0
         except Exception as e:
-            logger.error(f"Error getting total users: {e}")
+            logger.error(f"Error getting analytics counter {field}: {e}")
             return 0
     
-    async def _get_active_users_24h(self) -> int:
-        """Get users active in last 24 hours"""
+    async def _count_active(self, days: int) -> int:
+        """Distinct active users over the last `days` days (merged HyperLogLogs)"""
         try:
             if self.redis_client:
-                # This would need more sophisticated tracking
-                # For now, return a placeholder
-                return 0
+                return await self.redis_client.pfcount(*analytics_events.active_keys(days))
             return 0
         except Exception as e:
-            logger.error(f"Error getting active users: {e}")
+            logger.error(f"Error counting active users: {e}")
             return 0
     
-    async def _get_total_lessons_completed(self) -> int:
-        """Get total lessons completed"""
+    async def _get_top_members(self, key: str, limit: int) -> List[tuple]:
         try:
             if self.redis_client:
-                # Sum up completed lessons from all users
-                total = 0
-                keys = await self.redis_client.keys("progress:*")
-                for key in keys:
-                    progress_data = await self.redis_client.get(key)
-                    if progress_data:
-                        progress = json.loads(progress_data)
-                        total += len(progress.get("completed_lessons", []))
-                return total
-            return 0
+                return await self.redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+            return []
         except Exception as e:
-            logger.error(f"Error getting total lessons: {e}")
-            return 0
+            logger.error(f"Error reading top members of {key}: {e}")
+            return []
     
-    async def _get_total_achievements_earned(self) -> int:
-        """Get total achievements earned"""
+    async def _get_total_users(self) -> int:
+        """Get total number of users"""
         try:
             if self.redis_client:
-                total = 0
-                keys = await self.redis_client.keys("progress:*")
-                for key in keys:
-                    progress_data = await self.redis_client.get(key)
-                    if progress_data:
-                        progress = json.loads(progress_data)
-                        total += len(progress.get("achievements", []))
-                return total
+                return await self.redis_client.zcard(AnalyticsEventRecorder.LEVELS_KEY)
             return 0
         except Exception as e:
-            logger.error(f"Error getting total achievements: {e}")
+            logger.error(f"Error getting total users: {e}")
             return 0
     
+    async def _get_active_users_24h(self) -> int:
+        """Get users active in last 24 hours"""
+        return await self._count_active(1)
+    
+    async def _get_total_lessons_completed(self) -> int:
+        """Get total lessons completed"""
+        return await self._get_counter("lessons_completed")
+    
+    async def _get_total_achievements_earned(self) -> int:
+        """Get total achievements earned"""
+        return await self._get_counter("achievements_earned")
+    
     async def _get_total_trades_simulated(self) -> int:
         """Get total trades simulated"""
-        try:
-            if self.redis_client:
-                # Count portfolio trades
-                keys = await self.redis_client.keys("portfolio:*")
-                total = 0
-                for key in keys:
-                    portfolio_data = await self.redis_client.get(key)
-                    if portfolio_data:
-                        portfolio = json.loads(portfolio_data)
-                        total += len(portfolio.get("trades", []))
-                return total
-            return 0
-        except Exception as e:
-            logger.error(f"Error getting total trades: {e}")
-            return 0
+        return await self._get_counter("trades_simulated")
     
     async def _get_average_learning_level(self) -> float:
         """Get average learning level across all users"""
         try:
             if self.redis_client:
-                levels = []
-                keys = await self.redis_client.keys("progress:*")
-                for key in keys:
-                    progress_data = await self.redis_client.get(key)
-                    if progress_data:
-                        progress = json.loads(progress_data)
-                        levels.append(progress.get("learning_level", 0))
-                
-                if levels:
-                    return sum(levels) / len(levels)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(AnalyticsEventRecorder.LEVEL_SUM_KEY)
+                pipe.zcard(AnalyticsEventRecorder.LEVELS_KEY)
+                level_sum, users = await pipe.execute()
+                if users:
+                    return round(float(level_sum or 0) / users, 2)
             return 0.0
         except Exception as e:
             logger.error(f"Error getting average learning level: {e}")
@@ -234,11 +211,18 @@ class AnalyticsService:
     async def _get_top_categories(self) -> List[Dict[str, Any]]:
         """Get top learning categories"""
         try:
-            # This would need more sophisticated tracking
+            top = await self._get_top_members(AnalyticsEventRecorder.CATEGORIES_KEY, 3)
+            if not top:
+                return []
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for category, _ in top:
+                pipe.pfcount(analytics_events.category_users_key(category))
+            users = await pipe.execute()
+            
             return [
-                {"category": "basics", "users": 0, "completion_rate": 0.0},
-                {"category": "trading", "users": 0, "completion_rate": 0.0},
-                {"category": "defi", "users": 0, "completion_rate": 0.0}
+                {"category": category, "users": user_count, "lessons_completed": int(lessons)}
+                for (category, lessons), user_count in zip(top, users)
             ]
         except Exception as e:
             logger.error(f"Error getting top categories: {e}")
@@ -255,13 +239,13 @@ class AnalyticsService:
     
     # Placeholder methods for other metrics
     async def _get_daily_active_users(self) -> int:
-        return 0
+        return await self._count_active(1)
     
     async def _get_weekly_active_users(self) -> int:
-        return 0
+        return await self._count_active(7)
     
     async def _get_monthly_active_users(self) -> int:
-        return 0
+        return await self._count_active(30)
     
     async def _get_user_retention_7d(self) -> float:
         return 0.0
@@ -273,16 +257,19 @@ class AnalyticsService:
         return 0
     
     async def _get_lessons_per_user(self) -> float:
-        return 0.0
+        users = await self._get_total_users()
+        return round(await self._get_total_lessons_completed() / users, 2) if users else 0.0
     
     async def _get_achievements_per_user(self) -> float:
-        return 0.0
+        users = await self._get_total_users()
+        return round(await self._get_total_achievements_earned() / users, 2) if users else 0.0
     
     async def _get_total_content_items(self) -> int:
         return 0
     
     async def _get_most_popular_categories(self) -> List[Dict[str, Any]]:
-        return []
+        top = await self._get_top_members(AnalyticsEventRecorder.CATEGORIES_KEY, 10)
+        return [{"category": category, "lessons_completed": int(lessons)} for category, lessons in top]
     
     async def _get_completion_rates_by_category(self) -> Dict[str, float]:
         return {}
@@ -297,10 +284,17 @@ class AnalyticsService:
         return {}
     
     async def _get_total_tokens_explored(self) -> int:
-        return 0
+        try:
+            if self.redis_client:
+                return await self.redis_client.zcard(AnalyticsEventRecorder.TOKENS_KEY)
+            return 0
+        except Exception as e:
+            logger.error(f"Error getting total tokens explored: {e}")
+            return 0
     
     async def _get_most_popular_tokens(self) -> List[Dict[str, Any]]:
-        return []
+        top = await self._get_top_members(AnalyticsEventRecorder.TOKENS_KEY, 10)
+        return [{"token_address": token, "trades": int(trades)} for token, trades in top]
     
     async def _get_tokens_by_category(self) -> Dict[str, int]:
         return {}
@@ -0,0 +1,180 @@
+"""
+Answer Cache - Reuses chat answers for repeated (or paraphrased) questions
+Part of the EAILI5 backend services
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Caches final specialist answers keyed on (intent, learning-level bucket,
+    normalized query) using RedisService.cache_ai_response. With semantic
+    matching enabled, a per-process embedding index per (intent, bucket)
+    also matches paraphrases above a cosine-similarity threshold.
+
+    Time-sensitive and user-specific intents are never cached.
+    """
+
+    def __init__(self, redis_service, embeddings_service=None):
+        self.redis_service = redis_service
+        self.embeddings_service = embeddings_service
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.excluded_intents = set(
+            os.getenv("LLM_CACHE_EXCLUDED_INTENTS", "web_search,social_sentiment,token_analysis,research,portfolio").split(",")
+        )
+
+        # Paraphrase matching costs one (cached) embedding call per question
+        self.semantic_enabled = os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+        self.similarity_threshold = float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.92"))
+        self.embedding_model = os.getenv("LLM_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+        self.max_index_entries = int(os.getenv("LLM_CACHE_MAX_INDEX_ENTRIES", "2000"))
+
+        # (intent, bucket) -> (unit-norm embedding matrix, query hashes)
+        self._index: Dict[Tuple[str, int], Tuple[np.ndarray, List[str]]] = {}
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "skipped": 0, "stores": 0}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase, strip punctuation and collapse whitespace"""
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+    @staticmethod
+    def level_bucket(learning_level: int) -> int:
+        """Beginner / intermediate / advanced, matching the RAG difficulty levels"""
+        if learning_level < 20:
+            return 1
+        elif learning_level < 50:
+            return 2
+        return 3
+
+    def is_cacheable(self, intent: str) -> bool:
+        return self.enabled and intent not in self.excluded_intents
+
+    def _query_hash(self, intent: str, bucket: int, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+        return f"{intent}:{bucket}:{digest}"
+
+    async def lookup(self, query: str, intent: str, learning_level: int) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question
+
+        Returns:
+            Cached entry with "content" and "match" ("exact" or "semantic"), or None
+        """
+        if not self.is_cacheable(intent):
+            self.stats["skipped"] += 1
+            return None
+
+        try:
+            bucket = self.level_bucket(learning_level)
+            normalized = self.normalize_query(query)
+            if not normalized:
+                self.stats["skipped"] += 1
+                return None
+
+            cached = await self.redis_service.get_cached_ai_response(self._query_hash(intent, bucket, normalized))
+            if cached and cached.get("content"):
+                self.stats["exact_hits"] += 1
+                return {**cached, "match": "exact"}
+
+            if self.semantic_enabled and self.embeddings_service:
+                query_hash = await self._nearest(intent, bucket, normalized)
+                if query_hash:
+                    cached = await self.redis_service.get_cached_ai_response(query_hash)
+                    if cached and cached.get("content"):
+                        self.stats["semantic_hits"] += 1
+                        return {**cached, "match": "semantic"}
+                    self._drop(intent, bucket, query_hash)
+
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def store(self, query: str, intent: str, learning_level: int, content: str) -> bool:
+        """Cache the final answer for a question"""
+        if not self.is_cacheable(intent) or not content:
+            return False
+
+        try:
+            bucket = self.level_bucket(learning_level)
+            normalized = self.normalize_query(query)
+            if not normalized:
+                return False
+
+            query_hash = self._query_hash(intent, bucket, normalized)
+            stored = await self.redis_service.cache_ai_response(query_hash, {
+                "content": content,
+                "query": normalized,
+                "intent": intent,
+                "created_at": datetime.now().isoformat()
+            })
+            if stored:
+                self.stats["stores"] += 1
+                if self.semantic_enabled and self.embeddings_service:
+                    await self._add_to_index(intent, bucket, normalized, query_hash)
+            return stored
+
+        except Exception as e:
+            logger.warning(f"Answer cache store failed: {e}")
+            return False
+
+    async def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        embedding = await self.embeddings_service.generate_embeddings(normalized, model=self.embedding_model)
+        if not embedding:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def _nearest(self, intent: str, bucket: int, normalized: str) -> Optional[str]:
+        entry = self._index.get((intent, bucket))
+        if not entry:
+            return None
+
+        vector = await self._embed(normalized)
+        if vector is None:
+            return None
+
+        matrix, hashes = entry
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return hashes[best] if scores[best] >= self.similarity_threshold else None
+
+    async def _add_to_index(self, intent: str, bucket: int, normalized: str, query_hash: str):
+        vector = await self._embed(normalized)
+        if vector is None:
+            return
+
+        matrix, hashes = self._index.get((intent, bucket), (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+        if query_hash in hashes:
+            return
+        matrix = np.vstack([matrix, vector])[-self.max_index_entries:]
+        hashes = (hashes + [query_hash])[-self.max_index_entries:]
+        self._index[(intent, bucket)] = (matrix, hashes)
+
+    def _drop(self, intent: str, bucket: int, query_hash: str):
+        """Forget an index entry whose cached answer has expired"""
+        matrix, hashes = self._index[(intent, bucket)]
+        keep = [i for i, h in enumerate(hashes) if h != query_hash]
+        self._index[(intent, bucket)] = (matrix[keep], [hashes[i] for i in keep])
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "semantic_enabled": self.semantic_enabled,
+            "indexed_queries": sum(len(hashes) for _, hashes in self._index.values())
+        }
@@ -5,11 +5,11 @@ Uses Etherscan V2 API which supports 50+ chains including Base (chain ID 8453)
 Reference: https://docs.etherscan.io/
 """
 
-import asyncio
 from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime
-import httpx
+from services.http_client import http_client_pool
+from services.rate_limiter import rate_limiter
 import json
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,7 @@ class EtherscanV2Service:
         self.api_key = None
         self.base_url = "https://api.etherscan.io/v2/api"
         self.base_chain_id = 8453  # Base mainnet chain ID
-        self.rate_limit_delay = 0.2  # 5 requests per second max
+        self.rate_limit_name = "etherscan"  # 5 requests per second max via shared limiter
         
     async def initialize(self, api_key: str):
         """Initialize the Etherscan V2 service with API key"""
@@ -56,7 +56,7 @@ class EtherscanV2Service:
             
             discovered_tokens = {}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("etherscan") as client:
                 for address in discovery_addresses:
                     params = {
                         'chainid': self.base_chain_id,
@@ -71,7 +71,8 @@ class EtherscanV2Service:
                     
                     logger.info(f"Fetching token transactions from {address} for token discovery")
                     
-                    response = await client.get(self.base_url, params=params, timeout=30.0)
+                    await rate_limiter.acquire(self.rate_limit_name)
+                    response = await client.get(self.base_url, params=params)
                     data = response.json()
                     
                     if data.get('status') == '1':
@@ -90,9 +91,6 @@ class EtherscanV2Service:
                     else:
                         logger.warning(f"No token transactions found for {address}: {data.get('message', 'Unknown error')}")
                     
-                    # Rate limiting: 5 calls per second max
-                    await asyncio.sleep(self.rate_limit_delay)
-                    
                     if len(discovered_tokens) >= limit:
                         break
             
@@ -172,13 +170,13 @@ class EtherscanV2Service:
                 'apikey': self.api_key
             }
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("etherscan") as client:
                 logger.info(f"Fetching token supply for {token_address}")
                 
+                await rate_limiter.acquire(self.rate_limit_name)
                 response = await client.get(
                     self.base_url,
-                    params=params,
-                    timeout=30.0
+                    params=params
                 )
                 
                 if response.status_code == 200:
@@ -7,7 +7,8 @@ import asyncio
 from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime, timedelta
-import httpx
+from services.http_client import http_client_pool
+from services.rate_limiter import rate_limiter
 import json
 
 logger = logging.getLogger(__name__)
@@ -65,7 +66,7 @@ class BitqueryService:
             
             variables = {"limit": limit}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 # Use Authorization Bearer as per Bitquery docs
                 headers = {
                     "Content-Type": "application/json",
@@ -79,11 +80,12 @@ class BitqueryService:
                 logger.debug(f"Query: {query[:200]}...")
                 logger.debug(f"Headers: {headers}")
                 
+                await rate_limiter.acquire("bitquery")
+                
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 logger.info(f"Bitquery response status: {response.status_code}")
@@ -148,16 +150,16 @@ class BitqueryService:
             
             variables = {"tokenAddress": token_address}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 headers = {
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 }
+                await rate_limiter.acquire("bitquery")
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 if response.status_code == 200:
@@ -196,16 +198,16 @@ class BitqueryService:
             
             variables = {"tokenAddress": token_address}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 headers = {
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 }
+                await rate_limiter.acquire("bitquery")
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 if response.status_code == 200:
@@ -256,16 +258,16 @@ class BitqueryService:
                 "since": since.isoformat()
             }
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 headers = {
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 }
+                await rate_limiter.acquire("bitquery")
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 if response.status_code == 200:
@@ -302,16 +304,16 @@ class BitqueryService:
             
             variables = {"tokenAddress": token_address}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 headers = {
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 }
+                await rate_limiter.acquire("bitquery")
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 if response.status_code == 200:
@@ -350,16 +352,16 @@ class BitqueryService:
             
             variables = {"tokenAddress": token_address}
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("bitquery") as client:
                 headers = {
                     "Content-Type": "application/json",
                     "Authorization": f"Bearer {self.api_key}"
                 }
+                await rate_limiter.acquire("bitquery")
                 response = await client.post(
                     self.base_url,
                     headers=headers,
-                    json={"query": query, "variables": variables},
-                    timeout=60.0  # Increased timeout for complex queries
+                    json={"query": query, "variables": variables}
                 )
                 
                 if response.status_code == 200:
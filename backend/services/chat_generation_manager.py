@@ -0,0 +1,96 @@
+"""
+Chat Generation Manager - In-flight chat generations for one WebSocket connection
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+from typing import Dict, Any, Awaitable, Callable, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChatGenerationManager:
+    """
+    Runs each chat generation as its own task, keyed by the client's
+    messageId, so the connection's receive loop stays free for heartbeats,
+    new questions and cancellations.
+
+    Cancelling a task raises CancelledError at whatever it is awaiting;
+    the OpenAI streaming helpers close their HTTP responses on the way out,
+    which ends the upstream generation.
+    """
+
+    def __init__(self, max_in_flight: int = None):
+        self.max_in_flight = max_in_flight or int(os.getenv("CHAT_MAX_IN_FLIGHT", "2"))
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._notifications: Set[asyncio.Task] = set()  # pending on_cancelled callbacks
+        self.stats = {"started": 0, "completed": 0, "cancelled": 0, "rejected": 0}
+
+    def start(self, message_id: str, generation: Awaitable[Any]) -> bool:
+        """
+        Start a generation unless the connection is at its in-flight limit
+        or `message_id` is already running
+
+        Returns:
+            False if rejected (the coroutine is closed without running)
+        """
+        if len(self.tasks) >= self.max_in_flight or message_id in self.tasks:
+            self.stats["rejected"] += 1
+            generation.close()
+            return False
+
+        task = asyncio.create_task(generation)
+        self.tasks[message_id] = task
+        self.stats["started"] += 1
+        task.add_done_callback(lambda done: self._finished(message_id, done))
+        return True
+
+    def _finished(self, message_id: str, task: asyncio.Task):
+        if self.tasks.get(message_id) is task:
+            del self.tasks[message_id]
+        if task.cancelled():
+            self.stats["cancelled"] += 1
+            return
+        self.stats["completed"] += 1
+        if task.exception():
+            logger.error(f"Chat generation {message_id} failed: {task.exception()}")
+
+    def cancel(self, message_id: str, on_cancelled: Optional[Callable[[], Awaitable[Any]]] = None) -> bool:
+        """
+        Cancel a running generation without waiting for it to unwind, so the
+        receive loop is not held up; `on_cancelled` runs once it has
+
+        Returns:
+            False if no generation with `message_id` is running
+        """
+        task = self.tasks.get(message_id)
+        if not task:
+            return False
+        task.cancel()
+        if on_cancelled:
+            task.add_done_callback(lambda done: self._notify(message_id, on_cancelled))
+        logger.info(f"Cancelling chat generation {message_id}")
+        return True
+
+    def _notify(self, message_id: str, on_cancelled: Callable[[], Awaitable[Any]]):
+        notification = asyncio.ensure_future(on_cancelled())
+        self._notifications.add(notification)
+        notification.add_done_callback(self._notified)
+
+    def _notified(self, notification: asyncio.Task):
+        self._notifications.discard(notification)
+        if not notification.cancelled() and notification.exception():
+            logger.warning(f"Error sending chat cancellation notice: {notification.exception()}")
+
+    async def cancel_all(self, timeout: float = 5.0):
+        """Cancel everything still running (on disconnect)"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def in_flight(self) -> int:
+        return len(self.tasks)
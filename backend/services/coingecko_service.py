@@ -5,10 +5,15 @@ Reference: https://docs.coingecko.com/
 """
 
 import asyncio
+import os
 from typing import Dict, List, Optional, Any
 import logging
 import httpx
 from datetime import datetime
+from services.http_client import http_client_pool
+from services.rate_limiter import rate_limiter, parse_retry_after
+from services.single_flight import single_flight
+from services.token_index import BaseTokenIndex
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +26,13 @@ class CoinGeckoService:
         self.base_token_cache = None
         self.base_token_cache_timestamp = 0
         self.category_cache = {}
+        self.redis_client = None
         
-        # Rate limiting: 4s between calls = 15 calls/min (conservative for free tier)
-        self.rate_limit_delay = 4.0
+        # Address/symbol/name indexes over the Base token list, shared via Redis
+        self.token_index = BaseTokenIndex()
+        
+        # Rate limiting is handled by the shared token-bucket limiter ("coingecko" budget)
+        self.rate_limit_name = "coingecko"
         
         # Cache TTLs
         self.base_token_list_ttl = 86400  # 24 hours for coin list
@@ -31,7 +40,65 @@ class CoinGeckoService:
         self.trending_ttl = 300  # 5 minutes for trending
         self.new_listings_ttl = 600  # 10 minutes for new listings
         
+        # Token categories: cache key, fetch method and TTL (override with TOKEN_CATEGORY_TTL_<NAME>)
+        self.categories = {
+            "top15": {"cache_key": "top_15_market_cap", "fetch": "_fetch_top_15_by_market_cap", "ttl": self.market_data_ttl},
+            "trending": {"cache_key": "trending_tokens", "fetch": "_fetch_trending_tokens", "ttl": self.trending_ttl},
+            "volume": {"cache_key": "high_volume_tokens", "fetch": "_fetch_high_volume_tokens", "ttl": self.market_data_ttl},
+            "new": {"cache_key": "new_listings", "fetch": "_fetch_new_listings", "ttl": self.new_listings_ttl},
+        }
+        for name, category in self.categories.items():
+            category["ttl"] = int(os.getenv(f"TOKEN_CATEGORY_TTL_{name.upper()}", category["ttl"]))
+        
+        # Stale category data is served while a refresh runs, up to this age
+        self.max_stale_seconds = int(os.getenv("TOKEN_CATEGORY_MAX_STALE_SECONDS", "3600"))
+        self.background_refreshes: Dict[str, asyncio.Task] = {}
+    
+    async def initialize(self, redis_client=None):
+        """Attach Redis and warm the Base token index from it if another worker built it"""
+        try:
+            self.redis_client = redis_client
+            await self._load_token_index()
+            logger.info("CoinGecko service ready (free tier, no API key required)")
+        except Exception as e:
+            logger.error(f"Error initializing CoinGecko service: {e}")
+    
+    async def _load_token_index(self) -> bool:
+        """Adopt the persisted token index if it is still within the coin list TTL"""
+        stored_at = await self.token_index.get_stored_timestamp(self.redis_client)
+        if not stored_at or (datetime.now().timestamp() - stored_at) >= self.base_token_list_ttl:
+            return False
+        if stored_at <= self.base_token_cache_timestamp:
+            return False
+        
+        if not await self.token_index.load(self.redis_client):
+            return False
+        self.base_token_cache = self.token_index.tokens()
+        self.base_token_cache_timestamp = stored_at
+        return True
+    
+    async def get_coingecko_id_for_address(self, token_address: str) -> Optional[str]:
+        """O(1) lookup of the CoinGecko ID for a Base contract address"""
+        if not len(self.token_index):
+            await self.get_base_token_list()
+        return self.token_index.get_id_for_address(token_address)
+    
     async def get_base_token_list(self) -> List[Dict[str, Any]]:
+        """
+        Cached Base token list; concurrent refreshes share one in-process fetch
+        (the full coin list is too large to pass between workers via Redis)
+        """
+        current_time = datetime.now().timestamp()
+        if self.base_token_cache and (current_time - self.base_token_cache_timestamp) < self.base_token_list_ttl:
+            return self.base_token_cache
+        
+        try:
+            return await single_flight.do("coingecko:base_token_list", self._fetch_base_token_list, shared=False)
+        except Exception as e:
+            logger.error(f"Error fetching Base token list: {e}")
+            return []
+    
+    async def _fetch_base_token_list(self) -> List[Dict[str, Any]]:
         """
         Fetch all tokens with Base network addresses from CoinGecko
         Cache for 24 hours since coin list doesn't change frequently
@@ -46,10 +113,15 @@ class CoinGeckoService:
                 logger.info(f"Using cached Base token list ({len(self.base_token_cache)} tokens)")
                 return self.base_token_cache
             
+            # Another worker may already have refreshed the list into Redis
+            if await self._load_token_index():
+                logger.info(f"Using Base token list from Redis ({len(self.base_token_cache)} tokens)")
+                return self.base_token_cache
+            
             logger.info("Fetching complete coin list with platform addresses from CoinGecko...")
             
             # Call /coins/list?include_platform=true
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/coins/list"
                 params = {"include_platform": "true"}
                 
@@ -79,9 +151,11 @@ class CoinGeckoService:
                 
                 logger.info(f"Found {len(base_tokens)} tokens on Base network")
                 
-                # Cache the results
+                # Cache the results and update the lookup indexes incrementally
                 self.base_token_cache = base_tokens
                 self.base_token_cache_timestamp = current_time
+                changes = self.token_index.update(base_tokens, current_time)
+                await self.token_index.persist(self.redis_client, changes)
                 
                 return base_tokens
                 
@@ -92,17 +166,18 @@ class CoinGeckoService:
             return []
     
     async def get_top_15_by_market_cap(self) -> List[Dict[str, Any]]:
+        """Cached top 15 market cap; concurrent cache misses share one upstream fetch"""
+        return await self.get_category_tokens("top15")
+    
+    async def _fetch_top_15_by_market_cap(self) -> List[Dict[str, Any]]:
         """
         Get top 15 Base tokens by market cap
         Uses /coins/markets with Base token IDs, order=market_cap_desc
         Cache for 5 minutes
         """
         try:
-            # Check cache
+            # Cache lookups and stale-while-revalidate are handled by get_category_tokens
             cache_key = "top_15_market_cap"
-            cached_data = self._get_from_cache(cache_key, self.market_data_ttl)
-            if cached_data:
-                return cached_data
             
             # Get Base token list
             base_tokens = await self.get_base_token_list()
@@ -114,9 +189,7 @@ class CoinGeckoService:
             logger.info("Fetching top 15 Base tokens by market cap...")
             token_ids = [token["id"] for token in base_tokens[:100]]  # Limit to first 100 Base tokens
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/coins/markets"
                 params = {
                     "vs_currency": "usd",
@@ -148,17 +221,18 @@ class CoinGeckoService:
             return []
     
     async def get_trending_tokens(self) -> List[Dict[str, Any]]:
+        """Cached trending tokens; concurrent cache misses share one upstream fetch"""
+        return await self.get_category_tokens("trending")
+    
+    async def _fetch_trending_tokens(self) -> List[Dict[str, Any]]:
         """
         Get trending Base tokens
         Uses /search/trending, then filters for Base network tokens
         Cache for 5 minutes
         """
         try:
-            # Check cache
+            # Cache lookups and stale-while-revalidate are handled by get_category_tokens
             cache_key = "trending_tokens"
-            cached_data = self._get_from_cache(cache_key, self.trending_ttl)
-            if cached_data:
-                return cached_data
             
             # Get Base token list for filtering
             base_tokens = await self.get_base_token_list()
@@ -170,9 +244,7 @@ class CoinGeckoService:
             
             logger.info("Fetching trending tokens from CoinGecko...")
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/search/trending"
                 
                 response = await self._make_request_with_retry(client, url, {})
@@ -197,8 +269,6 @@ class CoinGeckoService:
                     return await self.get_top_15_by_market_cap()
                 
                 # Fetch market data for trending Base tokens
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
                 market_url = f"{self.base_url}/coins/markets"
                 market_params = {
                     "vs_currency": "usd",
@@ -230,17 +300,18 @@ class CoinGeckoService:
             return []
     
     async def get_high_volume_tokens(self) -> List[Dict[str, Any]]:
+        """Cached high volume tokens; concurrent cache misses share one upstream fetch"""
+        return await self.get_category_tokens("volume")
+    
+    async def _fetch_high_volume_tokens(self) -> List[Dict[str, Any]]:
         """
         Get high volume Base tokens
         Uses /coins/markets with Base token IDs, order=volume_desc
         Cache for 5 minutes
         """
         try:
-            # Check cache
+            # Cache lookups and stale-while-revalidate are handled by get_category_tokens
             cache_key = "high_volume_tokens"
-            cached_data = self._get_from_cache(cache_key, self.market_data_ttl)
-            if cached_data:
-                return cached_data
             
             # Get Base token list
             base_tokens = await self.get_base_token_list()
@@ -251,9 +322,7 @@ class CoinGeckoService:
             logger.info("Fetching high volume Base tokens...")
             token_ids = [token["id"] for token in base_tokens[:100]]
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/coins/markets"
                 params = {
                     "vs_currency": "usd",
@@ -285,6 +354,10 @@ class CoinGeckoService:
             return []
     
     async def get_new_listings(self) -> List[Dict[str, Any]]:
+        """Cached new listings; concurrent cache misses share one upstream fetch"""
+        return await self.get_category_tokens("new")
+    
+    async def _fetch_new_listings(self) -> List[Dict[str, Any]]:
         """
         Get new Base token listings
         Uses /coins/markets with Base token IDs, order=market_cap_desc
@@ -292,11 +365,8 @@ class CoinGeckoService:
         Cache for 10 minutes
         """
         try:
-            # Check cache
+            # Cache lookups and stale-while-revalidate are handled by get_category_tokens
             cache_key = "new_listings"
-            cached_data = self._get_from_cache(cache_key, self.new_listings_ttl)
-            if cached_data:
-                return cached_data
             
             # Get Base token list
             base_tokens = await self.get_base_token_list()
@@ -307,9 +377,7 @@ class CoinGeckoService:
             logger.info("Fetching new Base token listings...")
             token_ids = [token["id"] for token in base_tokens[:100]]
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/coins/markets"
                 params = {
                     "vs_currency": "usd",
@@ -449,20 +517,26 @@ class CoinGeckoService:
     async def _make_request_with_retry(self, client: httpx.AsyncClient, url: str, params: Dict) -> Optional[httpx.Response]:
         """
         Make HTTP request with exponential backoff retry logic
+        Waits on the shared token bucket before each attempt and honours Retry-After on 429
         """
         max_retries = 3
         retry_delay = 60  # Start with 60 seconds
         
         for attempt in range(max_retries):
             try:
-                response = await client.get(url, params=params, timeout=30.0)
+                # Only waits when the CoinGecko budget is actually exhausted
+                await rate_limiter.acquire(self.rate_limit_name)
+                
+                response = await client.get(url, params=params)
                 
                 if response.status_code == 200:
                     return response
                 elif response.status_code == 429:
                     if attempt < max_retries - 1:
-                        logger.warning(f"Rate limited (429), waiting {retry_delay}s before retry {attempt + 1}/{max_retries}")
-                        await asyncio.sleep(retry_delay)
+                        retry_after = parse_retry_after(response.headers.get("Retry-After")) or retry_delay
+                        logger.warning(f"Rate limited (429), waiting {retry_after}s before retry {attempt + 1}/{max_retries}")
+                        # Block the shared bucket so other requests/workers back off too
+                        await rate_limiter.penalize(self.rate_limit_name, retry_after)
                         retry_delay *= 2  # Exponential backoff
                     else:
                         logger.error("Rate limited after all retries")
@@ -481,6 +555,73 @@ class CoinGeckoService:
         
         return None
     
+    async def get_category_tokens(self, category: str) -> List[Dict[str, Any]]:
+        """
+        Serve a token category with stale-while-revalidate
+        
+        Fresh data is returned from cache. Expired data (up to max_stale_seconds
+        old) is returned immediately while a background refresh runs. Only a
+        cold cache makes the caller wait, and concurrent cold misses (in this
+        worker or, via Redis, in another) share one upstream fetch.
+        
+        Raises:
+            ValueError: If `category` is not one of `self.categories`
+        """
+        config = self._category_config(category)
+        entry = self.category_cache.get(config["cache_key"])
+        if entry:
+            cached_data, timestamp = entry
+            age = datetime.now().timestamp() - timestamp
+            if age < config["ttl"]:
+                return cached_data
+            if cached_data and age < self.max_stale_seconds:
+                self._schedule_refresh(category)
+                return cached_data
+        
+        try:
+            return await self.refresh_category(category)
+        except Exception as e:
+            logger.error(f"Error fetching {category} tokens: {e}")
+            return []
+    
+    async def refresh_category(self, category: str) -> List[Dict[str, Any]]:
+        """Fetch a category from upstream (coalesced) and store it in the cache"""
+        config = self._category_config(category)
+        cache_key = config["cache_key"]
+        tokens = await single_flight.do(f"coingecko:{cache_key}", getattr(self, config["fetch"]))
+        
+        # Results coalesced from another worker still need to land in our local cache
+        if tokens:
+            self._set_cache(cache_key, tokens)
+        return tokens or []
+    
+    def get_category_age(self, category: str) -> Optional[float]:
+        """Seconds since a category was last cached, or None if never cached"""
+        entry = self.category_cache.get(self._category_config(category)["cache_key"])
+        if not entry:
+            return None
+        return datetime.now().timestamp() - entry[1]
+    
+    def _category_config(self, category: str) -> Dict[str, Any]:
+        config = self.categories.get(category)
+        if config is None:
+            raise ValueError(f"Unknown token category {category!r}, expected one of: {', '.join(self.categories)}")
+        return config
+    
+    def _schedule_refresh(self, category: str):
+        """Start a background refresh for a category unless one is already running"""
+        task = self.background_refreshes.get(category)
+        if task and not task.done():
+            return
+        logger.info(f"Serving stale {category} tokens while refreshing in background")
+        self.background_refreshes[category] = asyncio.create_task(self._background_refresh(category))
+    
+    async def _background_refresh(self, category: str):
+        try:
+            await self.refresh_category(category)
+        except Exception as e:
+            logger.error(f"Background refresh of {category} tokens failed: {e}")
+    
     def _get_from_cache(self, key: str, ttl: int) -> Optional[List[Dict[str, Any]]]:
         """Get data from cache if not expired"""
         if key in self.category_cache:
@@ -514,9 +655,7 @@ class CoinGeckoService:
             
             logger.info(f"Fetching OHLC data for {token_id} ({days} days)")
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 url = f"{self.base_url}/coins/{token_id}/ohlc"
                 params = {
                     "vs_currency": "usd",
@@ -571,9 +710,7 @@ class CoinGeckoService:
             
             logger.info(f"Fetching enhanced details for {token_id}")
             
-            async with httpx.AsyncClient() as client:
-                await asyncio.sleep(self.rate_limit_delay)  # Rate limiting
-                
+            async with http_client_pool.client("coingecko") as client:
                 # Get basic coin data
                 url = f"{self.base_url}/coins/{token_id}"
                 params = {
@@ -4,10 +4,11 @@ Uses Uniswap V3 and other DEXs on Base mainnet to get real-time token prices
 """
 
 import asyncio
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 from web3 import Web3
 import httpx
+from blockchain.rpc_executor import ThreadedWeb3
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,9 @@ UNISWAP_V3_FACTORY = "0x33128a8fC17869897dcE68Ed026d694621f6FDfD"
 # Uniswap V3 Quoter V2 on Base
 UNISWAP_V3_QUOTER = "0x3d4e44Eb1374240CE5F1B871ab261CD16335B76a"
 
+# Multicall3 (same address on every chain)
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
 # Common quote tokens on Base
 WETH_BASE = "0x4200000000000000000000000000000000000006"
 USDC_BASE = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
@@ -40,6 +44,37 @@ QUOTER_ABI = [
     }
 ]
 
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
 ERC20_ABI = [
     {
         "constant": True,
@@ -56,23 +91,37 @@ class DexPriceService:
     
     def __init__(self):
         self.w3 = None
+        self.rpc = None  # ThreadedWeb3 facade - keeps RPC round trips off the event loop
         self.quoter_contract = None
+        self.multicall_contract = None
+        self.erc20_contract = None
         self.rpc_url = None
         
+        # Token decimals never change - cache them for the life of the process
+        self.decimals_cache: Dict[str, int] = {WETH_BASE.lower(): 18, USDC_BASE.lower(): 6}
+        self.multicall_chunk_size = 100  # quoter calls are gas-heavy; keep batches bounded
+        
     async def initialize(self, rpc_url: str):
         """Initialize the DEX price service with Web3"""
         try:
             self.rpc_url = rpc_url or "https://mainnet.base.org"
-            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            self.rpc = ThreadedWeb3(self.rpc_url)
+            self.w3 = self.rpc.w3
             
             # Initialize quoter contract
             self.quoter_contract = self.w3.eth.contract(
                 address=Web3.to_checksum_address(UNISWAP_V3_QUOTER),
                 abi=QUOTER_ABI
             )
+            self.multicall_contract = self.w3.eth.contract(
+                address=Web3.to_checksum_address(MULTICALL3),
+                abi=MULTICALL3_ABI
+            )
+            # Used only to encode decimals() calls for any token
+            self.erc20_contract = self.w3.eth.contract(abi=ERC20_ABI)
             
             logger.info(f"DEX price service initialized with RPC: {self.rpc_url}")
-            logger.info(f"Connected to Base: {self.w3.is_connected()}")
+            logger.info(f"Connected to Base: {await self.rpc.is_connected(force=True)}")
             
         except Exception as e:
             logger.error(f"Error initializing DEX price service: {e}")
@@ -88,116 +137,120 @@ class DexPriceService:
         Returns:
             Price in USD or None if not available
         """
-        try:
-            if not self.w3 or not self.w3.is_connected():
-                logger.warning("Web3 not connected")
-                return None
-            
-            token_address = Web3.to_checksum_address(token_address.lower())
-            
-            # Try to get price via WETH first, then USDC
-            price = await self._get_price_via_quote_token(token_address, WETH_BASE, "WETH")
-            
-            if price is None:
-                price = await self._get_price_via_quote_token(token_address, USDC_BASE, "USDC")
-            
-            return price
-            
-        except Exception as e:
-            logger.error(f"Error getting price for {token_address}: {e}")
-            return None
+        prices = await self.get_token_prices_usd([token_address])
+        return prices.get(token_address.lower())
     
-    async def _get_price_via_quote_token(
-        self, 
-        token_address: str, 
-        quote_token_address: str,
-        quote_token_name: str
-    ) -> Optional[float]:
+    async def get_token_prices_usd(self, token_addresses: List[str]) -> Dict[str, Optional[float]]:
         """
-        Get token price via a quote token (WETH or USDC)
+        Get USD prices for many tokens in a couple of RPC round trips
+        
+        Unknown decimals are fetched in one Multicall3 batch (and cached for
+        good), then every WETH and USDC quoter path plus the WETH/USDC reference
+        quote go out in a second batch. A token is priced via WETH when that
+        pool has liquidity, otherwise via USDC.
         
         Args:
-            token_address: Token to price
-            quote_token_address: Quote token (WETH or USDC)
-            quote_token_name: Name for logging
+            token_addresses: Token contract addresses
             
         Returns:
-            Price in USD or None
+            Dict of lowercase address -> price in USD (None if not available)
         """
+        prices: Dict[str, Optional[float]] = {address.lower(): None for address in token_addresses if address}
         try:
-            # Get token decimals
-            token_contract = self.w3.eth.contract(
-                address=token_address,
-                abi=ERC20_ABI
-            )
-            token_decimals = token_contract.functions.decimals().call()
-            
-            # Amount to quote (1 token)
-            amount_in = 10 ** token_decimals
+            if not prices:
+                return prices
+            if not self.rpc or not await self.rpc.is_connected():
+                logger.warning("Web3 not connected")
+                return prices
             
-            # Encode path for Uniswap V3 (token -> quote token, fee tier 3000 = 0.3%)
-            fee_tier = 3000
-            path = self._encode_path([token_address, quote_token_address], [fee_tier])
+            tokens = []
+            for address in prices:
+                try:
+                    tokens.append(Web3.to_checksum_address(address))
+                except ValueError:
+                    # One malformed address must not cost the rest of the batch its prices
+                    logger.warning(f"Skipping invalid token address {address}")
+            if not tokens:
+                return prices
+            await self._load_decimals(tokens)
+            priceable = [token for token in tokens if token.lower() in self.decimals_cache]
             
-            # Get quote from Uniswap V3
-            result = self.quoter_contract.functions.quoteExactInput(
-                path,
-                amount_in
-            ).call()
+            # Reference quote (1 WETH -> USDC) followed by two quotes per token
+            calls = [self._quote_call([WETH_BASE, USDC_BASE], 500, 10 ** 18)]
+            for token in priceable:
+                amount_in = 10 ** self.decimals_cache[token.lower()]
+                calls.append(self._quote_call([token, WETH_BASE], 3000, amount_in))
+                calls.append(self._quote_call([token, USDC_BASE], 3000, amount_in))
             
-            amount_out = result[0]
+            results = await self._multicall(calls)
             
-            if amount_out == 0:
-                logger.debug(f"No liquidity for {token_address} via {quote_token_name}")
-                return None
+            weth_amount = self._decode_quote(results[0])
+            weth_price = weth_amount / (10 ** 6) if weth_amount else None
             
-            # Convert to price in USD
-            if quote_token_name == "USDC":
-                # USDC has 6 decimals
-                price_usd = amount_out / (10 ** 6)
-            else:  # WETH
-                # WETH has 18 decimals, need to get WETH price in USD
-                weth_price = await self._get_weth_price_usd()
-                if weth_price is None:
-                    return None
-                price_in_weth = amount_out / (10 ** 18)
-                price_usd = price_in_weth * weth_price
+            for index, token in enumerate(priceable):
+                via_weth = self._decode_quote(results[1 + index * 2])
+                via_usdc = self._decode_quote(results[2 + index * 2])
+                
+                if via_weth and weth_price:
+                    # WETH has 18 decimals
+                    prices[token.lower()] = (via_weth / (10 ** 18)) * weth_price
+                elif via_usdc:
+                    # USDC has 6 decimals
+                    prices[token.lower()] = via_usdc / (10 ** 6)
+                else:
+                    logger.debug(f"No liquidity for {token} via WETH or USDC")
             
-            logger.info(f"Got price for {token_address} via {quote_token_name}: ${price_usd:.8f}")
-            return price_usd
+            priced = sum(1 for price in prices.values() if price is not None)
+            logger.info(f"Priced {priced}/{len(prices)} tokens via {len(calls)} batched quotes")
+            return prices
             
         except Exception as e:
-            logger.debug(f"Could not get price via {quote_token_name}: {e}")
-            return None
+            logger.error(f"Error getting batch prices: {e}")
+            return prices
+    
+    async def _load_decimals(self, tokens: List[str]):
+        """Fetch decimals for tokens not yet in the permanent cache (one batch)"""
+        missing = [token for token in tokens if token.lower() not in self.decimals_cache]
+        if not missing:
+            return
+        
+        decimals_call = self.erc20_contract.encodeABI(fn_name="decimals")
+        results = await self._multicall([(token, decimals_call) for token in missing])
+        for token, (success, data) in zip(missing, results):
+            if success and data:
+                try:
+                    self.decimals_cache[token.lower()] = self.w3.codec.decode(["uint8"], data)[0]
+                except Exception:
+                    logger.debug(f"Could not decode decimals for {token}")
+    
+    def _quote_call(self, tokens: List[str], fee_tier: int, amount_in: int) -> Tuple[str, bytes]:
+        """Multicall entry for a single-hop Uniswap V3 quote"""
+        path = self._encode_path(tokens, [fee_tier])
+        return (UNISWAP_V3_QUOTER, self.quoter_contract.encodeABI(fn_name="quoteExactInput", args=[path, amount_in]))
     
-    async def _get_weth_price_usd(self) -> Optional[float]:
-        """Get WETH price in USD using WETH/USDC pool"""
+    def _decode_quote(self, result: Tuple[bool, bytes]) -> int:
+        """amountOut from a quoteExactInput result (0 if the call failed)"""
+        success, data = result
+        if not success or not data:
+            return 0
         try:
-            # WETH/USDC pool - quote 1 WETH in USDC
-            amount_in = 10 ** 18  # 1 WETH
-            
-            fee_tier = 500  # 0.05% fee tier for WETH/USDC
-            path = self._encode_path([WETH_BASE, USDC_BASE], [fee_tier])
-            
-            result = self.quoter_contract.functions.quoteExactInput(
-                path,
-                amount_in
-            ).call()
-            
-            amount_out = result[0]
-            
-            if amount_out == 0:
-                return None
-            
-            # USDC has 6 decimals
-            weth_price = amount_out / (10 ** 6)
-            
-            logger.debug(f"WETH price: ${weth_price:.2f}")
-            return weth_price
-            
-        except Exception as e:
-            logger.error(f"Error getting WETH price: {e}")
-            return None
+            return self.w3.codec.decode(["uint256", "uint160[]", "uint32[]", "uint256"], data)[0]
+        except Exception:
+            return 0
+    
+    async def _multicall(self, calls: List[Tuple[str, Any]]) -> List[Tuple[bool, bytes]]:
+        """
+        Execute calls through Multicall3.aggregate3, chunked to stay under the
+        eth_call gas cap; chunks are sent concurrently
+        """
+        chunks = [calls[i:i + self.multicall_chunk_size] for i in range(0, len(calls), self.multicall_chunk_size)]
+        
+        async def run_chunk(chunk):
+            payload = [(Web3.to_checksum_address(target), True, data) for target, data in chunk]
+            return await self.rpc.call(self.multicall_contract.functions.aggregate3(payload).call)
+        
+        chunk_results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return [tuple(result) for results in chunk_results for result in results]
     
     def _encode_path(self, tokens: list, fees: list) -> bytes:
         """
@@ -219,3 +272,7 @@ class DexPriceService:
         
         return encoded
 
+    async def close(self):
+        """Release the RPC thread pool"""
+        if self.rpc:
+            self.rpc.close()
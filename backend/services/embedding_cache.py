@@ -0,0 +1,152 @@
+"""
+Embedding Cache - Two-tier (Redis + on-disk SQLite) cache for text embeddings
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(text: str) -> str:
+    """Content hash used to dedupe and cache embeddings"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Caches embeddings by (model, sha256(text)). Vectors are stored as raw
+    float32 bytes: base64-encoded in Redis (hot, with TTL) and as BLOBs in a
+    local SQLite file (persistent across restarts). Disk hits are written back
+    to Redis.
+    """
+
+    def __init__(self, db_path: str = None, redis_client=None):
+        self.db_path = db_path or os.getenv(
+            "EMBEDDING_CACHE_PATH", os.path.join(os.path.dirname(__file__), '..', 'data', 'embedding_cache.sqlite3')
+        )
+        self.redis_client = redis_client
+        self.redis_ttl = int(os.getenv("EMBEDDING_CACHE_TTL", str(86400 * 30)))
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {"redis_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0}
+
+    async def initialize(self, redis_client=None):
+        """Open the on-disk store and attach Redis"""
+        try:
+            if redis_client is not None:
+                self.redis_client = redis_client
+            await asyncio.to_thread(self._open_db)
+            logger.info(f"Embedding cache initialized at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Error initializing embedding cache: {e}")
+            self._db = None
+
+    def _open_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+        db.commit()
+        self._db = db
+
+    def _redis_key(self, model: str, key: str) -> str:
+        return f"embedding:{model}:{key}"
+
+    async def get_many(self, model: str, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up many content hashes; returns only the hits"""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        if self.redis_client:
+            try:
+                values = await self.redis_client.mget([self._redis_key(model, key) for key in keys])
+                for key, value in zip(keys, values):
+                    if value:
+                        found[key] = np.frombuffer(base64.b64decode(value), dtype=np.float32).tolist()
+                self.stats["redis_hits"] += len(found)
+            except Exception as e:
+                logger.warning(f"Embedding cache Redis lookup failed: {e}")
+
+        remaining = [key for key in keys if key not in found]
+        if remaining and self._db is not None:
+            try:
+                disk_hits = await asyncio.to_thread(self._db_get_many, model, remaining)
+                self.stats["disk_hits"] += len(disk_hits)
+                found.update(disk_hits)
+                if disk_hits:
+                    await self._redis_set_many(model, disk_hits)
+            except Exception as e:
+                logger.warning(f"Embedding cache disk lookup failed: {e}")
+
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def _db_get_many(self, model: str, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._db_lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    async def set_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Store embeddings in both tiers"""
+        if not embeddings:
+            return
+        self.stats["stored"] += len(embeddings)
+        await self._redis_set_many(model, embeddings)
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_set_many, model, embeddings)
+            except Exception as e:
+                logger.warning(f"Embedding cache disk write failed: {e}")
+
+    def _db_set_many(self, model: str, embeddings: Dict[str, List[float]]):
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(model, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in embeddings.items()]
+            )
+            self._db.commit()
+
+    async def _redis_set_many(self, model: str, embeddings: Dict[str, List[float]]):
+        if not self.redis_client:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, vector in embeddings.items():
+                encoded = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+                pipe.setex(self._redis_key(model, key), self.redis_ttl, encoded)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embedding cache Redis write failed: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
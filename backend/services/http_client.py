@@ -0,0 +1,154 @@
+"""
+HTTP Client Pool - Shared pooled httpx clients for upstream data services
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+import logging
+from datetime import datetime
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (installed via httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HTTPClientPool:
+    """
+    Process-wide pool of long-lived httpx.AsyncClient instances, one per upstream
+    service, so requests reuse keep-alive connections instead of paying a new
+    TCP+TLS handshake per call
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = asyncio.Lock()
+
+        # Per-service connection and timeout settings
+        self.service_config = {
+            "coingecko": {"timeout": 30.0, "max_connections": 10, "max_keepalive": 5},
+            "etherscan": {"timeout": 30.0, "max_connections": 10, "max_keepalive": 5},
+            "bitquery": {"timeout": 60.0, "max_connections": 5, "max_keepalive": 2},
+            "tavily": {"timeout": 30.0, "max_connections": 20, "max_keepalive": 10},
+            "neynar": {"timeout": 15.0, "max_connections": 5, "max_keepalive": 2},
+        }
+        self.default_config = {"timeout": 30.0, "max_connections": 10, "max_keepalive": 5}
+        self.keepalive_expiry = 30.0  # seconds an idle connection is kept open
+
+        # Monitoring counters
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def initialize(self):
+        """Create clients for all configured services up front"""
+        try:
+            for service_name in self.service_config:
+                await self.get_client(service_name)
+            logger.info(
+                f"HTTP client pool initialized ({len(self.clients)} services, "
+                f"http2={'enabled' if HTTP2_AVAILABLE else 'unavailable'})"
+            )
+        except Exception as e:
+            logger.error(f"Error initializing HTTP client pool: {e}")
+            raise
+
+    async def get_client(self, service_name: str) -> httpx.AsyncClient:
+        """Get the shared client for a service, creating it on first use"""
+        stats = self._get_stats(service_name)
+        client = self.clients.get(service_name)
+        if client is not None and not client.is_closed:
+            stats["hits"] += 1
+            return client
+
+        async with self._lock:
+            client = self.clients.get(service_name)
+            if client is None or client.is_closed:
+                client = self._create_client(service_name)
+                self.clients[service_name] = client
+                stats["misses"] += 1
+            else:
+                stats["hits"] += 1
+            return client
+
+    @asynccontextmanager
+    async def client(self, service_name: str):
+        """
+        Borrow the shared client for a service
+
+        Drop-in replacement for `async with httpx.AsyncClient() as client:` that
+        does not close the underlying connection pool on exit
+        """
+        client = await self.get_client(service_name)
+        stats = self._get_stats(service_name)
+        stats["in_flight"] += 1
+        stats["requests"] += 1
+        try:
+            yield client
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+
+    def _create_client(self, service_name: str) -> httpx.AsyncClient:
+        """Build a new pooled client for a service"""
+        config = self.service_config.get(service_name, self.default_config)
+        limits = httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive"],
+            keepalive_expiry=self.keepalive_expiry
+        )
+        logger.info(f"Creating pooled HTTP client for {service_name}")
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=limits,
+            timeout=httpx.Timeout(config["timeout"], connect=10.0)
+        )
+
+    def _get_stats(self, service_name: str) -> Dict[str, int]:
+        """Get (or create) the counters for a service"""
+        if service_name not in self.stats:
+            self.stats[service_name] = {
+                "hits": 0,
+                "misses": 0,
+                "in_flight": 0,
+                "requests": 0,
+                "errors": 0
+            }
+        return self.stats[service_name]
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get pool hit/miss and in-flight counts for monitoring"""
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "services": {
+                name: {
+                    **counters,
+                    "open": name in self.clients and not self.clients[name].is_closed
+                }
+                for name, counters in self.stats.items()
+            },
+            "total_in_flight": sum(s["in_flight"] for s in self.stats.values()),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def close(self):
+        """Close all pooled clients"""
+        try:
+            async with self._lock:
+                for service_name, client in self.clients.items():
+                    try:
+                        await client.aclose()
+                    except Exception as e:
+                        logger.warning(f"Error closing HTTP client for {service_name}: {e}")
+                self.clients.clear()
+            logger.info("HTTP client pool closed")
+        except Exception as e:
+            logger.error(f"Error closing HTTP client pool: {e}")
+
+
+# Process-wide pool shared by all services
+http_client_pool = HTTPClientPool()
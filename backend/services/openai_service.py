@@ -4,11 +4,13 @@ Part of the DeCrypt backend services
 """
 
 import asyncio
+import os
 from typing import Dict, List, Any, Optional, Callable
 import logging
 from datetime import datetime
 import openai
 from openai import AsyncOpenAI
+from services.embedding_cache import EmbeddingCache, embedding_key
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,12 @@ class OpenAIService:
         self.client = None
         self.api_key = None
         
+        # Embedding batching (OpenAI accepts up to 2048 inputs per request)
+        self.embedding_cache = EmbeddingCache()
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "2048"))
+        self.embedding_batch_max_tokens = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "300000"))
+        self.embedding_stats = {"requests": 0, "api_calls": 0, "texts_embedded": 0, "deduplicated": 0}
+        
         # Function definitions for AI agents
         self.functions = {
             "get_token_data": {
@@ -177,6 +185,7 @@ class OpenAIService:
             - {'type': 'done', 'content': ''} - Stream complete
             - {'type': 'error', 'content': 'error message'} - Error occurred
         """
+        stream = None
         try:
             logger.info(f"OpenAI service starting streaming response with {len(messages)} messages")
             
@@ -221,25 +230,92 @@ class OpenAIService:
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             yield {"type": "error", "content": str(e)}
+        
+        finally:
+            # Closing the response drops the connection, so a cancelled or
+            # abandoned consumer stops the upstream generation too
+            if stream is not None:
+                await stream.response.aclose()
+    
+    async def initialize_embedding_cache(self, redis_client=None):
+        """Attach Redis and open the on-disk embedding cache"""
+        await self.embedding_cache.initialize(redis_client)
     
     async def generate_embeddings(self, text: str, model: str = "text-embedding-3-large") -> List[float]:
         """
         Generate embeddings for text
         """
+        embeddings = await self.generate_embeddings_batch([text], model)
+        return embeddings[0] if embeddings else []
+    
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        model: str = "text-embedding-3-large"
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts
+        
+        Texts are deduplicated by content hash, served from the embedding cache
+        where possible, and only misses are sent to the API in batches as large
+        as the request limits allow.
+        
+        Returns:
+            One embedding per input text, in order ([] for empty texts or failures)
+        """
         try:
-            if not self.client:
-                raise Exception("OpenAI client not initialized")
+            self.embedding_stats["requests"] += 1
+            keys = [embedding_key(text) if text else None for text in texts]
+            unique = {key: text for key, text in zip(keys, texts) if key}
+            self.embedding_stats["deduplicated"] += sum(1 for key in keys if key) - len(unique)
             
-            response = await self.client.embeddings.create(
-                model=model,
-                input=text
-            )
+            embeddings = await self.embedding_cache.get_many(model, list(unique))
+            misses = [key for key in unique if key not in embeddings]
             
-            return response.data[0].embedding
+            if misses:
+                if not self.client:
+                    raise Exception("OpenAI client not initialized")
+                
+                for batch in self._embedding_batches(misses, unique):
+                    try:
+                        response = await self.client.embeddings.create(
+                            model=model,
+                            input=[unique[key] for key in batch]
+                        )
+                    except Exception as e:
+                        # Batches already embedded are cached; a retry only pays for the rest
+                        logger.error(f"Error generating embeddings batch of {len(batch)}: {e}")
+                        break
+                    self.embedding_stats["api_calls"] += 1
+                    fresh = {batch[item.index]: item.embedding for item in response.data}
+                    
+                    self.embedding_stats["texts_embedded"] += len(fresh)
+                    await self.embedding_cache.set_many(model, fresh)
+                    embeddings.update(fresh)
+            
+            return [embeddings.get(key, []) if key else [] for key in keys]
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            return []
+            return [[] for _ in texts]
+    
+    def _embedding_batches(self, keys: List[str], texts: Dict[str, str]) -> List[List[str]]:
+        """Split keys into batches under the per-request input and token limits"""
+        batches, batch, batch_tokens = [], [], 0
+        for key in keys:
+            tokens = len(texts[key]) // 4 + 1  # rough estimate, ~4 chars per token
+            if batch and (len(batch) >= self.embedding_batch_size or
+                          batch_tokens + tokens > self.embedding_batch_max_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(key)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def get_embedding_stats(self) -> Dict[str, Any]:
+        return {**self.embedding_stats, "cache": self.embedding_cache.get_stats()}
     
     async def generate_educational_response(
         self,
@@ -9,6 +9,7 @@ import logging
 from datetime import datetime, timedelta
 import json
 from decimal import Decimal, ROUND_DOWN
+from services.analytics_events import analytics_events
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,8 @@ class PortfolioSimulator:
             cache_key = f"portfolio:{user_id}"
             await self._set_cache(cache_key, updated_portfolio, self.portfolio_cache_ttl)
             
+            await analytics_events.trade_simulated(user_id, token_address, trade_type)
+            
             return {
                 "trade_result": trade_result,
                 "updated_portfolio": updated_portfolio,
@@ -130,11 +133,13 @@ class PortfolioSimulator:
             total_return = total_value - initial_balance
             return_percentage = (total_return / initial_balance) * 100 if initial_balance > 0 else 0
             
-            # Calculate individual token performance
+            # Calculate individual token performance (all holdings priced in one batch)
+            holdings = portfolio.get("holdings", [])
+            prices = await self.token_service.get_token_prices([h.get("token_address", "") for h in holdings])
             token_performance = []
-            for holding in portfolio.get("holdings", []):
+            for holding in holdings:
                 token_address = holding.get("token_address")
-                current_price = await self.token_service.get_token_price(token_address)
+                current_price = prices.get((token_address or "").lower())
                 
                 if current_price:
                     current_value = holding.get("amount", 0) * current_price
@@ -323,11 +328,12 @@ class PortfolioSimulator:
             portfolio["total_trades"] += 1
             portfolio["last_updated"] = datetime.now().isoformat()
             
-            # Calculate total value
+            # Calculate total value (all holdings priced in one batch)
             total_value = portfolio["cash_balance"]
+            prices = await self.token_service.get_token_prices([h.get("token_address", "") for h in portfolio["holdings"]])
             for holding in portfolio["holdings"]:
                 token_address = holding.get("token_address")
-                current_price = await self.token_service.get_token_price(token_address)
+                current_price = prices.get((token_address or "").lower())
                 if current_price:
                     total_value += holding.get("amount", 0) * current_price
             
@@ -4,10 +4,12 @@ Part of the DeCrypt backend services
 """
 
 import asyncio
+import os
 from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime, timedelta
 import json
+from services.analytics_events import analytics_events
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,15 @@ class ProgressTrackingService:
         self.leaderboards = {}
         self.redis_client = None
         
+        # Redis sorted-set leaderboards: all_time, plus hourly buckets that the
+        # rolling daily/weekly boards (last 24 hours / 7 days) are unions of
+        self.leaderboard_prefix = "leaderboard"
+        self.leaderboard_users_key = f"{self.leaderboard_prefix}:users"  # hash: user -> row stats
+        self.leaderboard_periods = {"all_time": None, "weekly": 86400 * 7, "daily": 86400}  # window seconds
+        self.leaderboard_bucket_seconds = 3600
+        # How long a rolling board's union is reused before it is rebuilt
+        self.leaderboard_window_cache_ttl = int(os.getenv("LEADERBOARD_WINDOW_CACHE_TTL", "60"))
+        
         # Initialize achievement definitions
         self.achievement_definitions = {
             "first_lesson": {
@@ -181,7 +192,17 @@ class ProgressTrackingService:
                 progress["last_updated"] = datetime.now().isoformat()
                 
                 # Check for achievements
+                achievements_before = len(progress["achievements"])
+                points_before = progress["total_points"]
                 await self._check_achievements(user_id, progress)
+                await self._update_leaderboards(user_id, progress, progress["total_points"] - points_before)
+                
+                await analytics_events.lesson_completed(
+                    user_id,
+                    category,
+                    progress["learning_level"],
+                    achievements_earned=len(progress["achievements"]) - achievements_before
+                )
                 
                 # Save to Redis if available
                 if self.redis_client:
@@ -280,9 +301,147 @@ class ProgressTrackingService:
             logger.error(f"Error getting available achievements: {e}")
             return []
     
+    def _leaderboard_key(self, period: str) -> str:
+        """Sorted set a period's board is read from (a cached union for rolling periods)"""
+        if period == "all_time":
+            return f"{self.leaderboard_prefix}:all_time"
+        return f"{self.leaderboard_prefix}:{period}"
+    
+    def _bucket_key(self, now: Optional[datetime] = None) -> str:
+        now = now or datetime.now()
+        return f"{self.leaderboard_prefix}:hourly:{now.strftime('%Y-%m-%dT%H')}"
+    
+    def _window_keys(self, period: str, now: Optional[datetime] = None) -> List[str]:
+        """Hourly buckets covering a rolling period, newest first"""
+        now = now or datetime.now()
+        buckets = self.leaderboard_periods[period] // self.leaderboard_bucket_seconds
+        return [self._bucket_key(now - timedelta(seconds=self.leaderboard_bucket_seconds * i)) for i in range(buckets)]
+    
+    async def _ensure_window(self, period: str) -> str:
+        """
+        Key of a period's board, rebuilding a rolling board from its hourly
+        buckets (ZUNIONSTORE) when its cached union has expired
+        """
+        key = self._leaderboard_key(period)
+        if self.leaderboard_periods[period] and not await self.redis_client.exists(key):
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zunionstore(key, self._window_keys(period))
+            pipe.expire(key, self.leaderboard_window_cache_ttl)
+            await pipe.execute()
+        return key
+    
+    async def _update_leaderboards(self, user_id: str, progress: Dict[str, Any], points_earned: int):
+        """
+        Add newly earned points to the all_time set and the current hourly
+        bucket (O(log N) each). Rolling boards pick them up when their cached
+        union is next rebuilt
+        """
+        try:
+            if not self.redis_client:
+                return
+            
+            bucket = self._bucket_key()
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zincrby(self._leaderboard_key("all_time"), points_earned, user_id)
+            pipe.zincrby(bucket, points_earned, user_id)
+            pipe.expire(bucket, self.leaderboard_periods["weekly"] + self.leaderboard_bucket_seconds)
+            pipe.hset(self.leaderboard_users_key, user_id, json.dumps({
+                "level": progress["learning_level"],
+                "achievements": len(progress["achievements"]),
+                "lessons_completed": len(progress["completed_lessons"])
+            }))
+            await pipe.execute()
+            
+        except Exception as e:
+            logger.warning(f"Leaderboard update failed: {e}")
+    
+    async def backfill_leaderboard(self, batch_size: int = 500) -> int:
+        """
+        Seed the all_time board from stored progress, for users whose points
+        predate the sorted sets. Runs once per Redis (guarded by a marker key);
+        ZADD GT never lowers a score that is already there
+
+        Returns:
+            Number of users backfilled
+        """
+        try:
+            if not self.redis_client:
+                return 0
+            if not await self.redis_client.set(f"{self.leaderboard_prefix}:backfilled", datetime.now().isoformat(), nx=True):
+                return 0
+            
+            backfilled = 0
+            keys = []
+            async for key in self.redis_client.scan_iter(match="progress:*", count=batch_size):
+                keys.append(key)
+                if len(keys) >= batch_size:
+                    backfilled += await self._backfill_batch(keys)
+                    keys = []
+            if keys:
+                backfilled += await self._backfill_batch(keys)
+            
+            logger.info(f"Backfilled {backfilled} users into the all_time leaderboard")
+            return backfilled
+            
+        except Exception as e:
+            logger.error(f"Error backfilling leaderboard: {e}")
+            try:
+                await self.redis_client.delete(f"{self.leaderboard_prefix}:backfilled")  # retry on next start
+            except Exception:
+                pass
+            return 0
+    
+    async def _backfill_batch(self, keys: List[str]) -> int:
+        scores = {}
+        rows = {}
+        for raw in await self.redis_client.mget(keys):
+            if not raw:
+                continue
+            progress = json.loads(raw)
+            if not progress.get("user_id") or not progress.get("total_points"):
+                continue
+            scores[progress["user_id"]] = progress["total_points"]
+            rows[progress["user_id"]] = json.dumps({
+                "level": progress.get("learning_level", 0),
+                "achievements": len(progress.get("achievements", [])),
+                "lessons_completed": len(progress.get("completed_lessons", []))
+            })
+        if scores:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(self._leaderboard_key("all_time"), scores, gt=True)
+            pipe.hset(self.leaderboard_users_key, mapping=rows)
+            await pipe.execute()
+        return len(scores)
+    
     async def get_leaderboard(self, period: str = "all_time", limit: int = 10) -> List[Dict[str, Any]]:
         """Get leaderboard for specified period"""
         try:
+            if period not in self.leaderboard_periods:
+                logger.warning(f"Unknown leaderboard period: {period}")
+                return []
+            
+            if self.redis_client:
+                # Top-N is O(log N + limit) on the sorted set, plus one HMGET for row stats
+                key = await self._ensure_window(period)
+                top = await self.redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+                if not top:
+                    return []
+                
+                user_ids = [user_id for user_id, _ in top]
+                rows = await self.redis_client.hmget(self.leaderboard_users_key, user_ids)
+                leaderboard = []
+                for rank, ((user_id, points), row) in enumerate(zip(top, rows), 1):
+                    stats = json.loads(row) if row else {}
+                    leaderboard.append({
+                        "rank": rank,
+                        "user_id": user_id,
+                        "points": int(points),
+                        "level": stats.get("level", 0),
+                        "achievements": stats.get("achievements", 0),
+                        "lessons_completed": stats.get("lessons_completed", 0)
+                    })
+                return leaderboard
+            
             leaderboard = []
             
             for user_id, progress in self.user_progress.items():
@@ -304,6 +463,31 @@ class ProgressTrackingService:
             logger.error(f"Error getting leaderboard: {e}")
             return []
     
+    async def get_user_rank(self, user_id: str, period: str = "all_time") -> Dict[str, Any]:
+        """Get a user's leaderboard position for a period (O(log N))"""
+        try:
+            if not self.redis_client or period not in self.leaderboard_periods:
+                return {}
+            
+            key = await self._ensure_window(period)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zrevrank(key, user_id)
+            pipe.zscore(key, user_id)
+            pipe.zcard(key)
+            rank, points, total = await pipe.execute()
+            
+            return {
+                "user_id": user_id,
+                "period": period,
+                "rank": rank + 1 if rank is not None else None,
+                "points": int(points or 0),
+                "total_users": total
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting user rank: {e}")
+            return {}
+    
     async def get_user_stats(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive user statistics"""
         try:
@@ -354,6 +538,8 @@ class ProgressTrackingService:
             progress["last_activity"] = datetime.now().isoformat()
             progress["last_updated"] = datetime.now().isoformat()
             
+            await analytics_events.user_active(user_id)
+            
             return True
             
         except Exception as e:
@@ -0,0 +1,240 @@
+"""
+Rate Limiter - Shared async token-bucket limiter for upstream APIs
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Any, Optional
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Atomic token-bucket step shared by every worker. Returns the number of
+# milliseconds the caller must wait (0 = token granted).
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local rate_per_ms = tonumber(ARGV[2])
+local ttl_ms = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', key, 'tokens', 'ts', 'blocked_until')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+local blocked_until = tonumber(data[3]) or 0
+if blocked_until > now then
+    return blocked_until - now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate_per_ms)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate_per_ms)
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, ttl_ms)
+return wait
+"""
+
+# Block the bucket for every worker until now + ARGV[1] milliseconds
+BLOCK_SCRIPT = """
+local key = KEYS[1]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', key, 'blocked_until')) or 0
+if until_ms > current then
+    redis.call('HSET', key, 'blocked_until', tostring(until_ms), 'tokens', '0', 'ts', tostring(until_ms))
+end
+redis.call('PEXPIRE', key, tonumber(ARGV[2]))
+return until_ms
+"""
+
+
+class TokenBucket:
+    """In-process token bucket for a single upstream"""
+
+    def __init__(self, calls_per_minute: float, burst: int):
+        self.capacity = float(max(burst, 1))
+        self.rate = calls_per_minute / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.last_refill = now
+
+    def try_acquire(self) -> float:
+        """Take a token if available, otherwise return seconds until one is"""
+        now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, seconds: float):
+        """Empty the bucket and refuse tokens for the given number of seconds"""
+        until = time.monotonic() + seconds
+        if until > self.blocked_until:
+            self.blocked_until = until
+            self.tokens = 0.0
+            self.last_refill = until
+
+
+class RateLimiter:
+    """
+    Async token-bucket rate limiter keyed per upstream API
+
+    Callers only wait when the bucket is actually empty. When a Redis client is
+    attached the bucket state lives in Redis so all uvicorn workers share one
+    budget; on any Redis error the limiter falls back to the local bucket.
+    """
+
+    def __init__(self):
+        self.redis_client = None
+        self.key_prefix = "rate_limit"
+        self.use_redis = os.getenv("RATE_LIMIT_USE_REDIS", "true").lower() == "true"
+
+        # Default budgets (calls/minute, burst size); override with
+        # RATE_LIMIT_<UPSTREAM>_PER_MINUTE / RATE_LIMIT_<UPSTREAM>_BURST
+        self.default_limits = {
+            "coingecko": {"calls_per_minute": 30, "burst": 5},   # free tier is ~30-50/min
+            "etherscan": {"calls_per_minute": 300, "burst": 5},  # 5 requests/second
+            "tavily": {"calls_per_minute": 60, "burst": 10},
+            "bitquery": {"calls_per_minute": 10, "burst": 3},
+        }
+        self.limits: Dict[str, Dict[str, float]] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+        for upstream, limit in self.default_limits.items():
+            self.configure(
+                upstream,
+                float(os.getenv(f"RATE_LIMIT_{upstream.upper()}_PER_MINUTE", limit["calls_per_minute"])),
+                int(os.getenv(f"RATE_LIMIT_{upstream.upper()}_BURST", limit["burst"]))
+            )
+
+    async def initialize(self, redis_client=None):
+        """Attach an optional Redis client to share budgets across workers"""
+        try:
+            self.redis_client = redis_client if self.use_redis else None
+            mode = "redis" if self.redis_client else "local"
+            logger.info(f"Rate limiter initialized ({mode} mode) for {list(self.limits.keys())}")
+        except Exception as e:
+            logger.error(f"Error initializing rate limiter: {e}")
+            raise
+
+    def configure(self, upstream: str, calls_per_minute: float, burst: int = 1):
+        """Set the budget for an upstream"""
+        self.limits[upstream] = {"calls_per_minute": calls_per_minute, "burst": burst}
+        self.buckets[upstream] = TokenBucket(calls_per_minute, burst)
+
+    async def acquire(self, upstream: str):
+        """Wait until a call to the upstream is allowed by its budget"""
+        if upstream not in self.buckets:
+            return
+
+        stats = self._get_stats(upstream)
+        waited = 0.0
+        while True:
+            wait = await self._try_acquire(upstream)
+            if wait <= 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+
+        stats["acquired"] += 1
+        if waited > 0:
+            stats["waits"] += 1
+            stats["wait_seconds"] += waited
+            logger.debug(f"Rate limiter delayed {upstream} call by {waited:.2f}s")
+
+    async def penalize(self, upstream: str, retry_after: Optional[float] = None):
+        """
+        Honour a 429/Retry-After from an upstream by blocking its bucket
+
+        Args:
+            upstream: Upstream name
+            retry_after: Seconds to block; defaults to one refill interval
+        """
+        if upstream not in self.buckets:
+            return
+
+        limit = self.limits[upstream]
+        seconds = retry_after if retry_after and retry_after > 0 else 60.0 / limit["calls_per_minute"]
+        self._get_stats(upstream)["throttled"] += 1
+        logger.warning(f"{upstream} rate limited upstream, pausing calls for {seconds:.1f}s")
+
+        if self.redis_client:
+            try:
+                await self.redis_client.eval(
+                    BLOCK_SCRIPT, 1, self._redis_key(upstream),
+                    int(seconds * 1000), max(self._ttl_ms(upstream), int(seconds * 1000) + 1000)
+                )
+            except Exception as e:
+                logger.warning(f"Redis rate limit block failed for {upstream}, using local bucket: {e}")
+
+        self.buckets[upstream].block(seconds)
+
+    async def _try_acquire(self, upstream: str) -> float:
+        """Try to take a token; returns seconds to wait (0 = granted)"""
+        if self.redis_client:
+            try:
+                limit = self.limits[upstream]
+                wait_ms = await self.redis_client.eval(
+                    TOKEN_BUCKET_SCRIPT, 1, self._redis_key(upstream),
+                    limit["burst"], limit["calls_per_minute"] / 60000.0, self._ttl_ms(upstream)
+                )
+                return int(wait_ms) / 1000.0
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable for {upstream}, using local bucket: {e}")
+
+        return self.buckets[upstream].try_acquire()
+
+    def _redis_key(self, upstream: str) -> str:
+        return f"{self.key_prefix}:{upstream}"
+
+    def _ttl_ms(self, upstream: str) -> int:
+        """Keep idle bucket keys just long enough to fully refill"""
+        limit = self.limits[upstream]
+        refill_seconds = limit["burst"] * 60.0 / limit["calls_per_minute"]
+        return int(max(refill_seconds, 60.0) * 1000)
+
+    def _get_stats(self, upstream: str) -> Dict[str, float]:
+        if upstream not in self.stats:
+            self.stats[upstream] = {"acquired": 0, "waits": 0, "wait_seconds": 0.0, "throttled": 0}
+        return self.stats[upstream]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter configuration and wait counters for monitoring"""
+        return {
+            "mode": "redis" if self.redis_client else "local",
+            "limits": self.limits,
+            "upstreams": self.stats,
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Process-wide limiter shared by all services
+rate_limiter = RateLimiter()
@@ -0,0 +1,131 @@
+"""
+Reddit Client - Runs blocking PRAW searches off the event loop
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+import praw
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedRedditClient:
+    """
+    Bounded thread-pool facade over PRAW
+
+    PRAW performs a blocking HTTP round trip while a listing is iterated, so
+    searches run (and are fully materialized) on a small dedicated pool. PRAW
+    is not thread-safe, so each worker thread builds its own `praw.Reddit`.
+    Results are cached per (subreddit, query, time_filter, limit) for
+    `cache_ttl` seconds, and concurrent identical searches share one call.
+    """
+
+    def __init__(self, client_id: str = None, client_secret: str = None, user_agent: str = None,
+                 max_workers: int = None, timeout: float = None, cache_ttl: float = None,
+                 reddit_factory: Callable[[], Any] = None):
+        self.max_workers = max_workers or int(os.getenv("REDDIT_MAX_WORKERS", "5"))
+        self.timeout = timeout or float(os.getenv("REDDIT_SEARCH_TIMEOUT", "8"))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("REDDIT_CACHE_TTL", "300"))
+        self.max_cache_entries = int(os.getenv("REDDIT_CACHE_MAX_ENTRIES", "1024"))
+
+        if reddit_factory is None:
+            def reddit_factory():
+                return praw.Reddit(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    user_agent=user_agent,
+                    timeout=int(self.timeout)
+                )
+        self.reddit_factory = reddit_factory
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reddit")
+        self._local = threading.local()
+        self._cache: Dict[Tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.stats = {"searches": 0, "cache_hits": 0, "coalesced": 0, "errors": 0, "timeouts": 0}
+
+    def _reddit(self):
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None:
+            reddit = self._local.reddit = self.reddit_factory()
+        return reddit
+
+    def _search_blocking(self, subreddit_name: str, query: str, time_filter: str, limit: int) -> List[Dict[str, Any]]:
+        subreddit = self._reddit().subreddit(subreddit_name)
+        return [
+            {
+                "title": post.title,
+                "selftext": post.selftext,
+                "score": post.score,
+                "num_comments": post.num_comments,
+                "created_utc": post.created_utc,
+                "subreddit": subreddit_name,
+                "url": post.url
+            }
+            for post in subreddit.search(query, time_filter=time_filter, limit=limit)
+        ]
+
+    async def search(self, subreddit_name: str, query: str, time_filter: str = "day", limit: int = 10) -> List[Dict[str, Any]]:
+        """Search one subreddit; raises on failure or timeout"""
+        key = (subreddit_name.lower(), " ".join(query.lower().split()), time_filter, limit)
+
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.stats["cache_hits"] += 1
+            return cached[1]
+
+        if key in self._in_flight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._search_blocking, subreddit_name, query, time_filter, limit)
+        # Retrieve the outcome even if every caller timed out, so it isn't logged as unhandled
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = future
+        self.stats["searches"] += 1
+        try:
+            # The worker thread can't be interrupted; PRAW's own request timeout bounds it
+            posts = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        if self.cache_ttl > 0:
+            if len(self._cache) >= self.max_cache_entries:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (time.monotonic() + self.cache_ttl, posts)
+        return posts
+
+    async def search_many(self, subreddits: List[str], query: str, time_filter: str = "day",
+                          limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Search several subreddits concurrently; failed or slow ones come back empty"""
+        results = await asyncio.gather(
+            *(self.search(name, query, time_filter, limit) for name in subreddits),
+            return_exceptions=True
+        )
+        posts_by_subreddit = {}
+        for name, result in zip(subreddits, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Error searching subreddit {name}: {result!r}")
+                result = []
+            posts_by_subreddit[name] = result
+        return posts_by_subreddit
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "max_workers": self.max_workers, "cached_searches": len(self._cache)}
+
+    def close(self):
+        """Release the thread pool"""
+        self._executor.shutdown(wait=False)
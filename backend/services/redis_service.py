@@ -4,7 +4,9 @@ Part of the DeCrypt backend services
 """
 
 import asyncio
+import hashlib
 import json
+import os
 from typing import Dict, List, Any, Optional, Union
 import logging
 from datetime import datetime, timedelta
@@ -33,6 +35,9 @@ class RedisService:
             "ai_response": 1800,    # 30 minutes
             "web_search": 3600     # 1 hour
         }
+        
+        # Keys per MGET command in bulk reads
+        self.mget_chunk_size = int(os.getenv("REDIS_MGET_CHUNK_SIZE", "500"))
     
     async def initialize(self, connection_url: str):
         """Initialize Redis connection with retry logic"""
@@ -268,16 +273,20 @@ class RedisService:
         return await self.get(key)
     
     # Web search caching
-    async def cache_web_search(self, query: str, results: List[Dict[str, Any]]) -> bool:
+    async def cache_web_search(self, query: str, results: Any, ttl: Optional[int] = None) -> bool:
         """Cache web search results"""
-        key = f"web_search:{hash(query)}"
-        return await self.set(key, results, self.cache_ttl["web_search"])
+        key = f"web_search:{self._query_digest(query)}"
+        return await self.set(key, results, ttl or self.cache_ttl["web_search"])
     
-    async def get_cached_web_search(self, query: str) -> Optional[List[Dict[str, Any]]]:
+    async def get_cached_web_search(self, query: str) -> Optional[Any]:
         """Get cached web search results"""
-        key = f"web_search:{hash(query)}"
+        key = f"web_search:{self._query_digest(query)}"
         return await self.get(key)
     
+    def _query_digest(self, query: str) -> str:
+        # Stable across processes, unlike hash() with per-process string hash seeds
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()[:32]
+    
     # Conversation history
     async def cache_conversation(self, user_id: str, conversation: List[Dict[str, Any]]) -> bool:
         """Cache conversation history"""
@@ -377,6 +386,37 @@ class RedisService:
             logger.error(f"Error getting Redis info: {e}")
             return {}
     
+    # Bulk operations (one round trip regardless of key count)
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values in one round trip; missing keys come back as None"""
+        try:
+            if not self.redis_client or not keys:
+                return [None] * len(keys)
+            
+            # Large key sets are split into MGET chunks sent as one pipeline
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i in range(0, len(keys), self.mget_chunk_size):
+                pipe.mget(keys[i:i + self.mget_chunk_size])
+            chunks = await pipe.execute()
+            
+            return [json.loads(v) if v else None for chunk in chunks for v in chunk]
+            
+        except Exception as e:
+            logger.error(f"Error bulk getting from Redis: {e}")
+            return [None] * len(keys)
+    
+    async def delete_many(self, keys: List[str]) -> int:
+        """Delete many keys with a single DEL"""
+        try:
+            if not self.redis_client or not keys:
+                return 0
+            
+            return await self.redis_client.delete(*keys)
+            
+        except Exception as e:
+            logger.error(f"Error bulk deleting from Redis: {e}")
+            return 0
+    
     # List operations for memory systems
     async def lpush(self, key: str, *values: Any) -> int:
         """Push values to the head of a list"""
@@ -405,6 +445,35 @@ class RedisService:
             logger.error(f"Error lrange from Redis: {e}")
             return []
     
+    async def lrem(self, key: str, count: int, value: Any) -> int:
+        """Remove occurrences of a value from a list"""
+        try:
+            if not self.redis_client:
+                return 0
+            
+            result = await self.redis_client.lrem(key, count, json.dumps(value, default=str))
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error lrem from Redis: {e}")
+            return 0
+    
+    async def lrem_many(self, key: str, values: List[Any], count: int = 1) -> int:
+        """Remove several values from a list in one pipelined round trip"""
+        try:
+            if not self.redis_client or not values:
+                return 0
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for value in values:
+                pipe.lrem(key, count, json.dumps(value, default=str))
+            results = await pipe.execute()
+            return sum(results)
+            
+        except Exception as e:
+            logger.error(f"Error bulk lrem from Redis: {e}")
+            return 0
+    
     async def ltrim(self, key: str, start: int, stop: int) -> bool:
         """Trim a list to the specified range"""
         try:
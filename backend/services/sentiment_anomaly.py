@@ -0,0 +1,224 @@
+"""
+Sentiment Anomaly Detector - Streaming z-score baselines per token
+Part of the EAILI5 backend services
+"""
+
+import math
+import os
+from typing import Dict, Any, List
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Fold one snapshot into a token's baselines (KEYS[1]). ARGV: ttl, window
+# count, the windows, then (metric, value) pairs. Fields per metric are
+# `<metric>:n` and `<metric>:<window>:mean|var`; see _update_state.
+UPDATE_SCRIPT = """
+local key = KEYS[1]
+local nwindows = tonumber(ARGV[2])
+local flat = redis.call('HGETALL', key)
+local state = {}
+for i = 1, #flat, 2 do
+    state[flat[i]] = tonumber(flat[i + 1])
+end
+local updates = {}
+for j = 3 + nwindows, #ARGV, 2 do
+    local metric = ARGV[j]
+    local x = tonumber(ARGV[j + 1])
+    local n = state[metric .. ':n'] or 0
+    for i = 1, nwindows do
+        local window = tonumber(ARGV[2 + i])
+        local field = metric .. ':' .. ARGV[2 + i]
+        local mean = state[field .. ':mean'] or 0
+        local var = state[field .. ':var'] or 0
+        local alpha = math.max(2 / (window + 1), 1 / (n + 1))
+        local diff = x - mean
+        local incr = alpha * diff
+        mean = mean + incr
+        var = (1 - alpha) * (var + diff * incr)
+        table.insert(updates, field .. ':mean')
+        table.insert(updates, string.format('%.17g', mean))
+        table.insert(updates, field .. ':var')
+        table.insert(updates, string.format('%.17g', var))
+    end
+    table.insert(updates, metric .. ':n')
+    table.insert(updates, n + 1)
+end
+if #updates > 0 then
+    redis.call('HSET', key, unpack(updates))
+end
+redis.call('EXPIRE', key, tonumber(ARGV[1]))
+return #updates / 2
+"""
+
+
+class SentimentAnomalyDetector:
+    """
+    Incremental mean/variance of sentiment score and social volume, overall
+    and per platform, kept in one small Redis hash per token
+
+    Each snapshot updates an exponentially weighted mean and variance per
+    configured window (in snapshots; alpha = 2 / (window + 1)). While
+    1 / (n + 1) is larger than alpha (the first ~window/2 snapshots) it is
+    used instead, which is Welford's exact running mean/variance, so young
+    baselines aren't dominated by their first sample. Updates are O(1) and
+    atomic.
+
+    Detection reads the hash once and scores the current values against
+    every window: a metric is anomalous when |z| >= `z_threshold` on any
+    window with at least `min_samples` observations behind it.
+    """
+
+    def __init__(self, prefix: str = None):
+        self.redis_client = None
+        self.prefix = prefix or os.getenv("SENTIMENT_ANOMALY_PREFIX", "sentiment_anomaly")
+        # Windows in snapshots: at the default 5 minute cadence, 1 hour and 1 day
+        self.windows = [int(w) for w in os.getenv("SENTIMENT_ANOMALY_WINDOWS", "12,288").split(",") if w.strip()]
+        self.z_threshold = float(os.getenv("SENTIMENT_ANOMALY_Z", "3.0"))
+        self.z_high = float(os.getenv("SENTIMENT_ANOMALY_Z_HIGH", "4.5"))
+        self.min_samples = int(os.getenv("SENTIMENT_ANOMALY_MIN_SAMPLES", "12"))
+        self.ttl = int(float(os.getenv("SENTIMENT_ANOMALY_TTL_DAYS", "7")) * 86400)
+        # Floors on the standard deviation, so flat baselines don't turn noise into huge z-scores
+        self.min_score_std = float(os.getenv("SENTIMENT_ANOMALY_MIN_SCORE_STD", "0.05"))
+        self.min_volume_std_ratio = float(os.getenv("SENTIMENT_ANOMALY_MIN_VOLUME_STD_RATIO", "0.1"))
+
+        self._memory: Dict[str, Dict[str, float]] = {}
+        self.stats = {"updates": 0, "detections": 0, "anomalies": 0, "errors": 0}
+
+    async def initialize(self, redis_client=None):
+        """Attach the Redis client the baselines live in"""
+        try:
+            self.redis_client = redis_client
+            logger.info(f"Sentiment anomaly detector initialized (windows {self.windows}, z >= {self.z_threshold})")
+        except Exception as e:
+            logger.error(f"Error initializing sentiment anomaly detector: {e}")
+            raise
+
+    def _key(self, token_address: str) -> str:
+        return f"{self.prefix}:{token_address.lower()}"
+
+    @staticmethod
+    def observations(snapshot: Dict[str, Any]) -> Dict[str, float]:
+        """Flatten a time-series snapshot into metric -> value"""
+        values = {"score": float(snapshot["score"]), "volume": float(snapshot["volume"])}
+        for name, platform in (snapshot.get("platforms") or {}).items():
+            values[f"{name}.score"] = float(platform["score"])
+            values[f"{name}.volume"] = float(platform["volume"])
+        return values
+
+    def _update_state(self, state: Dict[str, float], values: Dict[str, float]) -> Dict[str, float]:
+        """Python twin of UPDATE_SCRIPT (memory backend); returns the changed fields"""
+        updates = {}
+        for metric, x in values.items():
+            n = state.get(f"{metric}:n", 0)
+            for window in self.windows:
+                field = f"{metric}:{window}"
+                mean = state.get(f"{field}:mean", 0.0)
+                var = state.get(f"{field}:var", 0.0)
+                alpha = max(2 / (window + 1), 1 / (n + 1))
+                diff = x - mean
+                incr = alpha * diff
+                updates[f"{field}:mean"] = mean + incr
+                updates[f"{field}:var"] = (1 - alpha) * (var + diff * incr)
+            updates[f"{metric}:n"] = n + 1
+        return updates
+
+    async def observe(self, token_address: str, snapshot: Dict[str, Any]) -> bool:
+        """Fold a collected snapshot into the token's baselines"""
+        values = self.observations(snapshot)
+        try:
+            if self.redis_client:
+                args = [self.ttl, len(self.windows), *self.windows]
+                for metric, value in values.items():
+                    args += [metric, repr(value)]
+                await self.redis_client.eval(UPDATE_SCRIPT, 1, self._key(token_address), *args)
+            else:
+                state = self._memory.setdefault(token_address.lower(), {})
+                state.update(self._update_state(state, values))
+            self.stats["updates"] += 1
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error updating sentiment baselines for {token_address}: {e}")
+            return False
+
+    async def _load_state(self, token_address: str) -> Dict[str, float]:
+        if not self.redis_client:
+            return self._memory.get(token_address.lower(), {})
+        raw = await self.redis_client.hgetall(self._key(token_address))
+        state = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            state[field] = float(value)
+        return state
+
+    def _floor(self, metric: str, mean: float) -> float:
+        if metric.endswith("score"):
+            return self.min_score_std
+        return max(1.0, self.min_volume_std_ratio * abs(mean))
+
+    async def detect(self, token_address: str, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Anomalies in `snapshot` against the stored baselines (one hash read)"""
+        try:
+            self.stats["detections"] += 1
+            state = await self._load_state(token_address)
+            if not state:
+                return []
+
+            anomalies = []
+            for metric, x in self.observations(snapshot).items():
+                if state.get(f"{metric}:n", 0) < self.min_samples:
+                    continue
+
+                # Score against the window that finds it most unusual
+                best = None
+                for window in self.windows:
+                    field = f"{metric}:{window}"
+                    if f"{field}:mean" not in state:
+                        continue
+                    mean = state[f"{field}:mean"]
+                    std = max(math.sqrt(max(state.get(f"{field}:var", 0.0), 0.0)), self._floor(metric, mean))
+                    z = (x - mean) / std
+                    if best is None or abs(z) > abs(best[0]):
+                        best = (z, window, mean)
+
+                if best and abs(best[0]) >= self.z_threshold:
+                    anomalies.append(self._anomaly(metric, x, *best))
+
+            anomalies.sort(key=lambda anomaly: abs(anomaly["z_score"]), reverse=True)
+            self.stats["anomalies"] += len(anomalies)
+            return anomalies
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error detecting sentiment anomalies for {token_address}: {e}")
+            return []
+
+    def _anomaly(self, metric: str, value: float, z: float, window: int, mean: float) -> Dict[str, Any]:
+        platform, _, kind = metric.rpartition(".")
+        label = f"{platform.capitalize()} sentiment" if kind == "score" else f"{platform.capitalize()} volume"
+        if not platform:
+            label = "Sentiment score" if kind == "score" else "Social volume"
+        kind = "sentiment" if kind == "score" else "volume"
+        return {
+            "type": f"{kind}_{'spike' if z > 0 else 'drop'}",
+            "severity": "high" if abs(z) >= self.z_high else "medium",
+            "platform": platform or "all",
+            "metric": metric,
+            "value": round(value, 4),
+            "baseline_mean": round(mean, 4),
+            "z_score": round(z, 2),
+            "window": window,
+            "description": f"{label} {value:.2f} is {abs(z):.1f} standard deviations "
+                           f"{'above' if z > 0 else 'below'} its recent average ({mean:.2f})",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": "redis" if self.redis_client else "memory",
+            "windows": self.windows,
+            "z_threshold": self.z_threshold
+        }
@@ -0,0 +1,183 @@
+"""
+Sentiment Scorer - Batch VADER + crypto keyword scoring off the event loop
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+import string
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import logging
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Separates texts when a batch is normalized as one string
+_SEPARATOR = "\x00"
+
+# Punctuation (ASCII and common typographic) becomes whitespace, so keywords
+# only match whole words: "ban" no longer matches "bank", "rug" not "drug"
+_PUNCTUATION = string.punctuation + "\u2018\u2019\u201c\u201d\u2026\u2013\u2014"
+_PUNCTUATION_TABLE = str.maketrans(_PUNCTUATION, " " * len(_PUNCTUATION))
+
+
+# Per-process scorer for the optional process pool
+_worker_scorer: Optional["SentimentScorer"] = None
+
+
+def _init_worker(positive_keywords: Sequence[str], negative_keywords: Sequence[str]):
+    global _worker_scorer
+    _worker_scorer = SentimentScorer(positive_keywords, negative_keywords, max_workers=1, processes=0)
+
+
+def _score_in_worker(texts: List[str]) -> Dict[str, np.ndarray]:
+    return _worker_scorer.score_batch_sync(texts)
+
+
+class SentimentScorer:
+    """
+    Scores batches of texts and returns NumPy arrays, so callers aggregate
+    with vector operations instead of per-post Python loops.
+
+    The keyword lists are compiled into word sets (plus a few multi-word
+    phrases). A batch is lowercased and stripped of punctuation in one
+    C-level pass, then each text is matched by set intersection, so keywords
+    only match whole words. A text's keyword score is (positive - negative)
+    / (positive + negative) over the distinct keywords it mentions, 0 when it
+    mentions none.
+
+    Batches larger than `inline_batch_size` are scored on a small dedicated
+    thread pool so VADER's pure-Python scoring never runs on the event loop.
+    With `processes` > 0, batches of at least `process_batch_size` texts are
+    split across a process pool instead, which sidesteps the GIL.
+    """
+
+    def __init__(self, positive_keywords: Sequence[str], negative_keywords: Sequence[str],
+                 vader_analyzer: SentimentIntensityAnalyzer = None, max_workers: int = None,
+                 inline_batch_size: int = None, processes: int = None, process_batch_size: int = None):
+        self.positive_keywords = [keyword.lower() for keyword in positive_keywords]
+        self.negative_keywords = [keyword.lower() for keyword in negative_keywords]
+        self.vader_analyzer = vader_analyzer or SentimentIntensityAnalyzer()
+
+        # Keywords normalize the same way as text ("sell-off" -> "sell off")
+        positive = {" ".join(keyword.translate(_PUNCTUATION_TABLE).split()) for keyword in self.positive_keywords}
+        negative = {" ".join(keyword.translate(_PUNCTUATION_TABLE).split()) for keyword in self.negative_keywords}
+        self.positive_words = frozenset(keyword for keyword in positive if " " not in keyword)
+        self.negative_words = frozenset(keyword for keyword in negative if " " not in keyword)
+        # Multi-word keywords are substring-matched (padded with spaces), only
+        # in texts that contain one of their first words
+        self.phrases = [(f" {keyword} ", keyword in positive) for keyword in sorted(positive | negative) if " " in keyword]
+        self.phrase_starts = frozenset(phrase.split()[0] for phrase, _ in self.phrases)
+
+        self.max_workers = max_workers or int(os.getenv("SENTIMENT_SCORER_WORKERS", "2"))
+        self.inline_batch_size = inline_batch_size if inline_batch_size is not None else int(
+            os.getenv("SENTIMENT_SCORER_INLINE_BATCH", "4")
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sentiment")
+
+        self.processes = processes if processes is not None else int(os.getenv("SENTIMENT_SCORER_PROCESSES", "0"))
+        self.process_batch_size = process_batch_size or int(os.getenv("SENTIMENT_SCORER_PROCESS_BATCH", "2000"))
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"batches": 0, "texts": 0, "offloaded_batches": 0, "process_batches": 0}
+
+    def keyword_counts(self, texts: Sequence[str]) -> np.ndarray:
+        """(n, 2) int array of distinct positive / negative keywords per text"""
+        if not texts:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        joined = _SEPARATOR.join(text.replace(_SEPARATOR, " ") for text in texts)
+        normalized = joined.lower().translate(_PUNCTUATION_TABLE).split(_SEPARATOR)
+
+        positive_words, negative_words = self.positive_words, self.negative_words
+        phrases, phrase_starts = self.phrases, self.phrase_starts
+        counts = []
+        for text in normalized:
+            words = text.split()
+            positive = len(positive_words.intersection(words))
+            negative = len(negative_words.intersection(words))
+            if not phrase_starts.isdisjoint(words):
+                padded = f" {' '.join(words)} "
+                for phrase, is_positive in phrases:
+                    if phrase in padded:
+                        if is_positive:
+                            positive += 1
+                        else:
+                            negative += 1
+            counts.append((positive, negative))
+        return np.array(counts, dtype=np.int64)
+
+    def keyword_scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Crypto keyword sentiment per text, in [-1, 1]"""
+        return self.scores_from_counts(self.keyword_counts(texts))
+
+    @staticmethod
+    def scores_from_counts(counts: np.ndarray) -> np.ndarray:
+        """Keyword scores from `keyword_counts` output"""
+        total = counts.sum(axis=1)
+        return np.divide(counts[:, 0] - counts[:, 1], total, out=np.zeros(len(counts)), where=total > 0)
+
+    def vader_scores(self, texts: Sequence[str]) -> np.ndarray:
+        """VADER compound score per text, in [-1, 1]"""
+        return np.fromiter(
+            (self.vader_analyzer.polarity_scores(text)["compound"] for text in texts),
+            dtype=np.float64, count=len(texts)
+        )
+
+    def score_batch_sync(self, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Score a batch on the calling thread
+
+        Returns:
+            "combined" (mean of VADER and keyword scores), "vader", "keyword"
+            and "keyword_hits" (distinct keywords matched), one entry per text
+        """
+        counts = self.keyword_counts(texts)
+        keyword = self.scores_from_counts(counts)
+        vader = self.vader_scores(texts)
+        return {
+            "combined": (vader + keyword) / 2,
+            "vader": vader,
+            "keyword": keyword,
+            "keyword_hits": counts.sum(axis=1)
+        }
+
+    async def score_batch(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Score a batch, off the event loop unless it is tiny"""
+        self.stats["batches"] += 1
+        self.stats["texts"] += len(texts)
+        if len(texts) <= self.inline_batch_size:
+            return self.score_batch_sync(texts)
+
+        loop = asyncio.get_running_loop()
+        if self.processes > 0 and len(texts) >= self.process_batch_size:
+            self.stats["process_batches"] += 1
+            pool = self._get_process_pool()
+            step = -(-len(texts) // self.processes)
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(pool, _score_in_worker, texts[i:i + step])
+                for i in range(0, len(texts), step)
+            ))
+            return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+        self.stats["offloaded_batches"] += 1
+        return await loop.run_in_executor(self._executor, self.score_batch_sync, texts)
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(self.positive_keywords, self.negative_keywords)
+            )
+        return self._process_pool
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    def close(self):
+        """Release the worker pools"""
+        self._executor.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
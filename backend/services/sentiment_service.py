@@ -11,8 +11,13 @@ from datetime import datetime, timedelta
 import json
 import re
 import os
-import praw
-import httpx
+import numpy as np
+from services.http_client import http_client_pool
+from services.single_flight import single_flight
+from services.reddit_client import ThreadedRedditClient
+from services.sentiment_scorer import SentimentScorer
+from services.sentiment_timeseries import SentimentTimeSeriesStore
+from services.sentiment_anomaly import SentimentAnomalyDetector
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from services.coingecko_service import CoinGeckoService
@@ -29,8 +34,8 @@ class SentimentService:
         self.coingecko_service = coingecko_service
         self.tavily_service = tavily_service
         
-        # Initialize Reddit API (PRAW)
-        self.reddit = None
+        # Initialize Reddit API (PRAW, run on a worker pool)
+        self.reddit: Optional[ThreadedRedditClient] = None
         self._init_reddit()
         
         # Initialize sentiment analyzers
@@ -46,6 +51,29 @@ class SentimentService:
             "regulation", "ban", "decline", "sell-off", "fud", "bear market"
         ]
         
+        # Batch scorer: single-word keywords become word sets matched by set
+        # intersection, multi-word ones ("paper hands") padded phrase matches
+        self.scorer = SentimentScorer(self.crypto_positive_keywords, self.crypto_negative_keywords, self.vader_analyzer)
+        
+        # Snapshot history behind the sentiment timeline (Redis attached at startup)
+        self.timeseries = SentimentTimeSeriesStore()
+        
+        # Streaming per-token baselines, updated from collected snapshots
+        self.anomaly_detector = SentimentAnomalyDetector()
+        
+        # Multi-platform results shared by the API, agents and tools (Redis attached at startup)
+        self.redis_client = None
+        self.cache_ttl = int(os.getenv("SENTIMENT_CACHE_TTL", "120"))
+        # Expired results are served while a refresh runs, up to this age
+        self.cache_max_stale = int(os.getenv("SENTIMENT_CACHE_MAX_STALE_SECONDS", "600"))
+        self.cache_max_entries = int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", "1024"))
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # Last symbol used per address, so symbol-less callers share its entry
+        self._symbols: Dict[str, str] = {}
+        self.symbol_ttl = 7 * 86400
+        self._background_refreshes: Dict[str, asyncio.Task] = {}
+        self.cache_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+        
         # Neynar API configuration (proper Farcaster API)
         self.neynar_base_url = "https://api.neynar.com/v2"
         self.neynar_api_key = os.getenv("NEYNAR_API_KEY")
@@ -168,40 +196,24 @@ class SentimentService:
                 logger.info(f"First news result type: {type(news_results[0])}, content: {str(news_results[0])[:100]}")
             
             # Analyze sentiment of news titles and content using class-level keywords
-            positive_keywords = self.crypto_positive_keywords
-            negative_keywords = self.crypto_negative_keywords
-            
-            sentiment_scores = []
-            total_mentions = 0
-            
+            texts = []
             for article in news_results[:5]:  # Analyze top 5 articles
                 # Handle different response structures from Tavily API
                 if isinstance(article, dict):
-                    title = article.get("title", "").lower()
-                    content = article.get("content", "").lower()
+                    texts.append(f"{article.get('title', '')} {article.get('content', '')}")
                 else:
                     # If article is a string or other type, use it as content
-                    title = ""
-                    content = str(article).lower()
-                
-                text = f"{title} {content}"
-                
-                # Count positive and negative keywords
-                positive_count = sum(1 for keyword in positive_keywords if keyword in text)
-                negative_count = sum(1 for keyword in negative_keywords if keyword in text)
-                
-                # Calculate article sentiment (-1 to 1)
-                if positive_count + negative_count > 0:
-                    article_sentiment = (positive_count - negative_count) / (positive_count + negative_count)
-                    sentiment_scores.append(article_sentiment)
-                    total_mentions += 1
+                    texts.append(f" {article}")
             
-            if sentiment_scores:
-                avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
+            # Only articles that mention a sentiment keyword count (-1 to 1 each)
+            counts = self.scorer.keyword_counts(texts)
+            scores = self.scorer.scores_from_counts(counts)[counts.sum(axis=1) > 0]
+            
+            if scores.size:
                 return {
-                    "news_sentiment": avg_sentiment,
-                    "news_mentions": total_mentions,
-                    "sentiment_scores": sentiment_scores
+                    "news_sentiment": float(scores.mean()),
+                    "news_mentions": int(scores.size),
+                    "sentiment_scores": scores.tolist()
                 }
             
             return {}
@@ -352,14 +364,14 @@ class SentimentService:
         }
     
     def _init_reddit(self):
-        """Initialize Reddit API with PRAW"""
+        """Initialize Reddit API with PRAW (searches run off the event loop)"""
         try:
             reddit_client_id = os.getenv("REDDIT_CLIENT_ID")
             reddit_client_secret = os.getenv("REDDIT_CLIENT_SECRET")
             reddit_user_agent = os.getenv("REDDIT_USER_AGENT", "EAILI5-SentimentBot/1.0")
             
             if reddit_client_id and reddit_client_secret:
-                self.reddit = praw.Reddit(
+                self.reddit = ThreadedRedditClient(
                     client_id=reddit_client_id,
                     client_secret=reddit_client_secret,
                     user_agent=reddit_user_agent
@@ -370,17 +382,139 @@ class SentimentService:
         except Exception as e:
             logger.error(f"Failed to initialize Reddit API: {e}")
     
-    async def get_multi_platform_sentiment(self, token_address: str, token_symbol: str = None) -> Dict[str, Any]:
+    async def initialize_cache(self, redis_client=None):
+        """Attach Redis so the sentiment result cache is shared across workers"""
+        self.redis_client = redis_client
+        logger.info(f"Sentiment result cache enabled (TTL {self.cache_ttl}s, stale up to {self.cache_max_stale}s)")
+    
+    @staticmethod
+    def _cache_key(token_address: str, token_symbol: str = None) -> str:
+        return f"sentiment:multi:{token_address.lower()}:{(token_symbol or '').lower()}"
+    
+    @staticmethod
+    def _symbol_key(token_address: str) -> str:
+        return f"sentiment:symbol:{token_address.lower()}"
+    
+    async def _resolve_symbol(self, token_address: str, token_symbol: str = None) -> Optional[str]:
+        """The caller's symbol, else the last symbol a caller used for this address"""
+        if token_symbol:
+            return token_symbol
+        try:
+            if self.redis_client:
+                symbol = await self.redis_client.get(self._symbol_key(token_address))
+                return symbol.decode() if isinstance(symbol, bytes) else symbol
+            return self._symbols.get(token_address.lower())
+        except Exception as e:
+            logger.warning(f"Error reading sentiment symbol for {token_address}: {e}")
+            return None
+    
+    async def _get_cache_entry(self, token_address: str, token_symbol: str = None) -> Optional[Dict[str, Any]]:
+        """Cached {"data", "symbol", "fetched_at"} entry for a token, or None"""
+        try:
+            if self.redis_client:
+                cached = await self.redis_client.get(self._cache_key(token_address, token_symbol))
+                return json.loads(cached) if cached else None
+            return self._cache.get(self._cache_key(token_address, token_symbol))
+        except Exception as e:
+            logger.warning(f"Error reading sentiment cache for {token_address}: {e}")
+            return None
+    
+    async def _set_cache_entry(self, token_address: str, token_symbol: str, entry: Dict[str, Any]):
+        try:
+            if self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.set(self._cache_key(token_address, token_symbol), json.dumps(entry),
+                         ex=self.cache_ttl + self.cache_max_stale)
+                if token_symbol:
+                    pipe.set(self._symbol_key(token_address), token_symbol, ex=self.symbol_ttl)
+                await pipe.execute()
+            else:
+                if len(self._cache) >= self.cache_max_entries:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[self._cache_key(token_address, token_symbol)] = entry
+                if token_symbol:
+                    self._symbols[token_address.lower()] = token_symbol
+        except Exception as e:
+            logger.warning(f"Error writing sentiment cache for {token_address}: {e}")
+    
+    async def get_cache_age(self, token_address: str, token_symbol: str = None) -> Optional[float]:
+        """Seconds since a token's sentiment was last computed, or None if not cached"""
+        token_symbol = await self._resolve_symbol(token_address, token_symbol)
+        entry = await self._get_cache_entry(token_address, token_symbol)
+        if not entry:
+            return None
+        return datetime.now().timestamp() - entry["fetched_at"]
+    
+    async def get_multi_platform_sentiment(self, token_address: str, token_symbol: str = None,
+                                           force_refresh: bool = False) -> Dict[str, Any]:
         """
         Get comprehensive sentiment analysis from all platforms with enhanced data
         
+        Results are cached per (address, symbol) for `cache_ttl` seconds and
+        shared by every caller (API, agents, tools). Callers that don't know
+        the symbol (tools, the snapshot collector) use the last symbol seen
+        for the address, so they share the entry the API and agents fill.
+        Expired entries are served while a background refresh runs, and
+        concurrent misses (in any worker) share one analysis.
+        
         Args:
             token_address: Token contract address
             token_symbol: Token symbol for better search results
+            force_refresh: Skip the cache and recompute (background refreshes)
             
         Returns:
-            Dict containing detailed sentiment data from all platforms
+            Dict containing detailed sentiment data from all platforms, with
+            "cached" and "cache_age_seconds" describing its freshness
         """
+        token_symbol = await self._resolve_symbol(token_address, token_symbol)
+        if not force_refresh:
+            entry = await self._get_cache_entry(token_address, token_symbol)
+            if entry:
+                age = max(0.0, datetime.now().timestamp() - entry["fetched_at"])
+                if age < self.cache_ttl:
+                    self.cache_stats["hits"] += 1
+                    return {**entry["data"], "cached": True, "cache_age_seconds": round(age, 1)}
+                if age < self.cache_ttl + self.cache_max_stale:
+                    self.cache_stats["stale_hits"] += 1
+                    self._schedule_sentiment_refresh(token_address, token_symbol)
+                    return {**entry["data"], "cached": True, "cache_age_seconds": round(age, 1)}
+            self.cache_stats["misses"] += 1
+        
+        entry = await single_flight.do(
+            self._cache_key(token_address, token_symbol),
+            lambda: self._refresh_multi_platform_sentiment(token_address, token_symbol),
+            group="sentiment"
+        )
+        if not entry:
+            return {"error": "Sentiment analysis failed"}
+        age = max(0.0, datetime.now().timestamp() - entry["fetched_at"])
+        return {**entry["data"], "cached": False, "cache_age_seconds": round(age, 1)}
+    
+    async def _refresh_multi_platform_sentiment(self, token_address: str, token_symbol: str = None) -> Optional[Dict[str, Any]]:
+        """Run the analysis and cache it; errors are not cached"""
+        self.cache_stats["refreshes"] += 1
+        data = await self._analyze_multi_platform_sentiment(token_address, token_symbol)
+        if "error" in data:
+            return None
+        entry = {"data": data, "symbol": token_symbol, "fetched_at": datetime.now().timestamp()}
+        await self._set_cache_entry(token_address, token_symbol, entry)
+        return entry
+    
+    def _schedule_sentiment_refresh(self, token_address: str, token_symbol: str = None):
+        """Refresh a stale entry in the background unless a refresh is already running"""
+        key = self._cache_key(token_address, token_symbol)
+        task = self._background_refreshes.get(key)
+        if task and not task.done():
+            return
+        task = asyncio.create_task(self.get_multi_platform_sentiment(token_address, token_symbol, force_refresh=True))
+        self._background_refreshes[key] = task
+        task.add_done_callback(lambda done: self._background_refreshes.get(key) is done and self._background_refreshes.pop(key))
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {**self.cache_stats, "ttl": self.cache_ttl, "backend": "redis" if self.redis_client else "memory"}
+    
+    async def _analyze_multi_platform_sentiment(self, token_address: str, token_symbol: str = None) -> Dict[str, Any]:
+        """Fan out to every platform and compute the multi-platform analysis"""
         try:
             logger.info(f"Analyzing multi-platform sentiment for token {token_address}")
             
@@ -410,8 +544,8 @@ class SentimentService:
                 coingecko_data, news_data, reddit_data
             )
             
-            # Detect sentiment anomalies
-            anomalies = await self._detect_sentiment_anomalies(token_address, sentiment_metrics)
+            # Detect sentiment anomalies against the token's running baselines
+            anomalies = await self._detect_sentiment_anomalies(token_address, sentiment_metrics, platform_breakdown)
             
             return {
                 "sentiment_metrics": sentiment_metrics,
@@ -432,49 +566,55 @@ class SentimentService:
             logger.error(f"Error in multi-platform sentiment analysis: {e}")
             return {"error": str(e)}
     
-    async def get_sentiment_time_series(self, token_address: str, hours: int = 24) -> Dict[str, Any]:
+    async def record_sentiment_snapshot(self, token_address: str, token_symbol: str = None) -> bool:
+        """
+        Run the multi-platform analysis once and append it to the time series
+        
+        Returns:
+            True if a snapshot was stored
+        """
+        try:
+            sentiment = await self.get_multi_platform_sentiment(token_address, token_symbol, force_refresh=True)
+            if "error" in sentiment:
+                return False
+            snapshot = self.timeseries.build_snapshot(sentiment, int(datetime.now().timestamp()))
+            # Baselines learn only from collected snapshots, at a steady cadence
+            await self.anomaly_detector.observe(token_address, snapshot)
+            return await self.timeseries.append(token_address, snapshot)
+        except Exception as e:
+            logger.error(f"Error recording sentiment snapshot for {token_address}: {e}")
+            return False
+    
+    async def get_sentiment_time_series(self, token_address: str, hours: int = 24, resolution: str = None) -> Dict[str, Any]:
         """
         Get historical sentiment data for time series analysis
         
+        Served from the snapshot store; the background collector keeps
+        requested tokens fresh. Only a token's first request runs the
+        multi-platform analysis inline, to seed its history.
+        
         Args:
             token_address: Token contract address
             hours: Number of hours to look back
+            resolution: "raw", "5m", "1h" or "1d" (chosen from hours if omitted)
             
         Returns:
             Dict containing time series sentiment data
         """
         try:
-            # TODO: Query historical sentiment from database (future enhancement)
-            # For now, return current sentiment snapshot only
-            current_sentiment = await self.get_multi_platform_sentiment(token_address)
-            
-            # Return single data point (current state)
-            time_series = [{
-                "timestamp": datetime.now().isoformat(),
-                "sentiment_score": current_sentiment.get("sentiment_metrics", {}).get("overall_score", 0),
-                "social_volume": current_sentiment.get("sentiment_metrics", {}).get("total_volume", 0),
-                "platforms": {
-                    "reddit": {
-                        "score": current_sentiment.get("platform_breakdown", {}).get("reddit", {}).get("sentiment", 0), 
-                        "volume": current_sentiment.get("platform_breakdown", {}).get("reddit", {}).get("posts", 0)
-                    },
-                    "farcaster": {
-                        "score": current_sentiment.get("platform_breakdown", {}).get("farcaster", {}).get("sentiment", 0), 
-                        "volume": current_sentiment.get("platform_breakdown", {}).get("farcaster", {}).get("casts", 0)
-                    },
-                    "news": {
-                        "score": current_sentiment.get("platform_breakdown", {}).get("news", {}).get("sentiment", 0), 
-                        "volume": current_sentiment.get("platform_breakdown", {}).get("news", {}).get("mentions", 0)
-                    }
-                }
-            }]
+            await self.timeseries.track(token_address)
+            series = await self.timeseries.get_series(token_address, hours, resolution)
+            
+            if not series["points"] and await self.timeseries.claim_collection(token_address, 60):
+                await self.record_sentiment_snapshot(token_address)
+                series = await self.timeseries.get_series(token_address, hours, resolution)
             
             return {
                 "token_address": token_address,
-                "time_series": time_series,
+                "time_series": series["points"],
+                "resolution": series["resolution"],
                 "period_hours": hours,
-                "generated_at": datetime.now().isoformat(),
-                "note": "Historical data not yet available - showing current snapshot"
+                "generated_at": datetime.now().isoformat()
             }
             
         except Exception as e:
@@ -521,65 +661,30 @@ class SentimentService:
                 # Fallback to Tavily if Reddit API not available
                 return await self._get_reddit_sentiment(search_term)
             
-            # Search relevant subreddits
+            # Search relevant subreddits concurrently (each with its own timeout)
             subreddits = ["CryptoCurrency", "ethereum", "bitcoin", "defi", "base"]
-            all_posts = []
-            
-            for subreddit_name in subreddits:
-                try:
-                    subreddit = self.reddit.subreddit(subreddit_name)
-                    # Search for posts containing the search term
-                    posts = subreddit.search(search_term, time_filter="day", limit=10)
-                    
-                    for post in posts:
-                        all_posts.append({
-                            "title": post.title,
-                            "selftext": post.selftext,
-                            "score": post.score,
-                            "num_comments": post.num_comments,
-                            "created_utc": post.created_utc,
-                            "subreddit": subreddit_name,
-                            "url": post.url
-                        })
-                except Exception as e:
-                    logger.warning(f"Error searching subreddit {subreddit_name}: {e}")
-                    continue
+            posts_by_subreddit = await self.reddit.search_many(subreddits, search_term, time_filter="day", limit=10)
+            all_posts = [post for name in subreddits for post in posts_by_subreddit[name]]
             
             if not all_posts:
                 return {}
             
-            # Analyze sentiment of posts
-            sentiment_scores = []
-            total_engagement = 0
+            # Analyze sentiment of posts: VADER and crypto keywords, combined, in one batch
+            scores = await self.scorer.score_batch([f"{post['title']} {post['selftext']}" for post in all_posts])
+            sentiment_scores = scores["combined"]
             
-            for post in all_posts:
-                text = f"{post['title']} {post['selftext']}"
-                
-                # Use VADER sentiment analysis
-                vader_scores = self.vader_analyzer.polarity_scores(text)
-                
-                # Calculate crypto-specific sentiment
-                crypto_sentiment = self._calculate_crypto_sentiment(text)
-                
-                # Combine VADER and crypto-specific sentiment
-                combined_sentiment = (vader_scores['compound'] + crypto_sentiment) / 2
-                sentiment_scores.append(combined_sentiment)
-                
-                # Calculate engagement score
-                engagement = post['score'] + (post['num_comments'] * 2)
-                total_engagement += engagement
-            
-            if sentiment_scores:
-                avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
-                return {
-                    "reddit_sentiment": avg_sentiment,
-                    "reddit_posts": len(all_posts),
-                    "reddit_engagement": total_engagement,
-                    "sentiment_scores": sentiment_scores,
-                    "posts": all_posts[:5]  # Return top 5 posts for context
-                }
+            # Engagement score: upvotes plus weighted comments
+            total_engagement = int(
+                np.fromiter((post['score'] + post['num_comments'] * 2 for post in all_posts), dtype=np.int64).sum()
+            )
             
-            return {}
+            return {
+                "reddit_sentiment": float(sentiment_scores.mean()),
+                "reddit_posts": len(all_posts),
+                "reddit_engagement": total_engagement,
+                "sentiment_scores": sentiment_scores.tolist(),
+                "posts": all_posts[:5]  # Return top 5 posts for context
+            }
             
         except Exception as e:
             logger.warning(f"Enhanced Reddit sentiment analysis failed: {e}")
@@ -593,7 +698,7 @@ class SentimentService:
                 return {}
             
             # Search for casts mentioning the token using Neynar API
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("neynar") as client:
                 headers = {
                     "api_key": self.neynar_api_key,  # Neynar uses api_key in header
                     "Content-Type": "application/json"
@@ -618,53 +723,32 @@ class SentimentService:
                 if not casts:
                     return {}
                 
-                # Analyze sentiment of casts
-                sentiment_scores = []
-                total_engagement = 0
-                
-                for cast in casts:
-                    text = cast.get("text", "")
-                    
-                    # Use VADER sentiment analysis
-                    vader_scores = self.vader_analyzer.polarity_scores(text)
-                    crypto_sentiment = self._calculate_crypto_sentiment(text)
-                    combined_sentiment = (vader_scores['compound'] + crypto_sentiment) / 2
-                    
-                    sentiment_scores.append(combined_sentiment)
-                    
-                    # Calculate engagement
-                    reactions = cast.get("reactions", {})
-                    likes = reactions.get("likes_count", 0)
-                    recasts = reactions.get("recasts_count", 0)
-                    replies = cast.get("replies", {}).get("count", 0)
-                    total_engagement += likes + recasts + replies
+                # Analyze sentiment of casts in one batch
+                scores = await self.scorer.score_batch([cast.get("text", "") for cast in casts])
+                sentiment_scores = scores["combined"]
                 
-                if sentiment_scores:
-                    avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
-                    return {
-                        "farcaster_sentiment": avg_sentiment,
-                        "farcaster_casts": len(casts),
-                        "farcaster_engagement": total_engagement,
-                        "sentiment_scores": sentiment_scores
-                    }
+                # Calculate engagement: likes + recasts + replies
+                total_engagement = sum(
+                    cast.get("reactions", {}).get("likes_count", 0)
+                    + cast.get("reactions", {}).get("recasts_count", 0)
+                    + cast.get("replies", {}).get("count", 0)
+                    for cast in casts
+                )
                 
-                return {}
+                return {
+                    "farcaster_sentiment": float(sentiment_scores.mean()),
+                    "farcaster_casts": len(casts),
+                    "farcaster_engagement": total_engagement,
+                    "sentiment_scores": sentiment_scores.tolist()
+                }
                 
         except Exception as e:
             logger.warning(f"Farcaster sentiment analysis failed: {e}")
             return {}
     
     def _calculate_crypto_sentiment(self, text: str) -> float:
-        """Calculate crypto-specific sentiment score"""
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for keyword in self.crypto_positive_keywords if keyword in text_lower)
-        negative_count = sum(1 for keyword in self.crypto_negative_keywords if keyword in text_lower)
-        
-        if positive_count + negative_count == 0:
-            return 0.0
-        
-        return (positive_count - negative_count) / (positive_count + negative_count)
+        """Calculate crypto-specific sentiment score (see SentimentScorer for batches)"""
+        return float(self.scorer.keyword_scores([text])[0])
     
     def _calculate_enhanced_sentiment(self, coingecko_data: Dict, news_data: Dict, reddit_data: Dict) -> Dict[str, Any]:
         """Calculate enhanced sentiment metrics"""
@@ -742,7 +826,8 @@ class SentimentService:
                 "available": bool(reddit_data),
                 "sentiment": reddit_data.get("reddit_sentiment", 0) if reddit_data else 0,
                 "posts": reddit_data.get("reddit_posts", 0) if reddit_data else 0,
-                "engagement": reddit_data.get("reddit_engagement", 0) if reddit_data else 0
+                "engagement": reddit_data.get("reddit_engagement", 0) if reddit_data else 0,
+                "top_posts": (reddit_data.get("posts") or [])[:3] if reddit_data else []
             },
             # DISABLED: Farcaster requires paid Neynar API
             # "farcaster": {
@@ -753,35 +838,15 @@ class SentimentService:
             # }
         }
     
-    async def _detect_sentiment_anomalies(self, token_address: str, current_metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Detect sentiment anomalies using 3-sigma rule"""
+    async def _detect_sentiment_anomalies(self, token_address: str, current_metrics: Dict[str, Any],
+                                          platform_breakdown: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Detect sentiment anomalies as z-scores against the token's running baselines"""
         try:
-            # This would typically compare against historical baselines
-            # For now, we'll implement basic anomaly detection
-            
-            anomalies = []
-            overall_score = current_metrics.get("overall_score", 0)
-            total_volume = current_metrics.get("total_volume", 0)
-            
-            # Detect sentiment spikes (score > 0.7 or < -0.7)
-            if abs(overall_score) > 0.7:
-                anomalies.append({
-                    "type": "sentiment_spike",
-                    "severity": "high" if abs(overall_score) > 0.8 else "medium",
-                    "description": f"Sentiment score {overall_score:.2f} is {'very positive' if overall_score > 0 else 'very negative'}",
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            # Detect volume spikes (would need historical data for proper 3-sigma)
-            if total_volume > 1000:  # Arbitrary threshold for demo
-                anomalies.append({
-                    "type": "volume_spike",
-                    "severity": "medium",
-                    "description": f"Social volume {total_volume} is significantly higher than normal",
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            return anomalies
+            snapshot = self.timeseries.build_snapshot(
+                {"sentiment_metrics": current_metrics, "platform_breakdown": platform_breakdown or {}},
+                int(datetime.now().timestamp())
+            )
+            return await self.anomaly_detector.detect(token_address, snapshot)
             
         except Exception as e:
             logger.error(f"Error detecting sentiment anomalies: {e}")
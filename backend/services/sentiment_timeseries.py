@@ -0,0 +1,412 @@
+"""
+Sentiment Time Series - Persistent per-token sentiment history with rollups
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Append one snapshot: add it to the raw log (KEYS[1]) and fold it into the
+# bucket it falls in for every rollup resolution (KEYS[2..]), trimming each
+# series to its retention. ARGV: ts, snapshot JSON, raw retention, then one
+# (bucket seconds, retention seconds) pair per rollup key.
+APPEND_SCRIPT = """
+local ts = tonumber(ARGV[1])
+local snapshot = cjson.decode(ARGV[2])
+local raw_retention = tonumber(ARGV[3])
+redis.call('ZADD', KEYS[1], ts, ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. (ts - raw_retention))
+redis.call('EXPIRE', KEYS[1], raw_retention)
+for i = 2, #KEYS do
+    local width = tonumber(ARGV[2 * i])
+    local retention = tonumber(ARGV[2 * i + 1])
+    local bucket = ts - (ts % width)
+    local existing = redis.call('ZRANGEBYSCORE', KEYS[i], bucket, bucket)
+    local agg
+    if #existing > 0 then
+        agg = cjson.decode(existing[1])
+        redis.call('ZREMRANGEBYSCORE', KEYS[i], bucket, bucket)
+        agg.min = math.min(agg.min, snapshot.score)
+        agg.max = math.max(agg.max, snapshot.score)
+    else
+        agg = {t = bucket, n = 0, score = 0, volume = 0, min = snapshot.score, max = snapshot.score, platforms = {}}
+    end
+    agg.n = agg.n + 1
+    agg.score = agg.score + snapshot.score
+    agg.volume = agg.volume + snapshot.volume
+    for name, values in pairs(snapshot.platforms) do
+        local platform = agg.platforms[name] or {n = 0, score = 0, volume = 0}
+        platform.n = (platform.n or 0) + 1
+        platform.score = platform.score + values.score
+        platform.volume = platform.volume + values.volume
+        agg.platforms[name] = platform
+    end
+    redis.call('ZADD', KEYS[i], bucket, cjson.encode(agg))
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', '(' .. (bucket - retention))
+    redis.call('EXPIRE', KEYS[i], retention + width)
+end
+return #KEYS
+"""
+
+
+class SentimentTimeSeriesStore:
+    """
+    Append-only sentiment snapshots per token, downsampled on write
+
+    Every snapshot is kept in a raw log and folded into 5m, 1h and 1d
+    buckets, each with its own retention. A bucket stores running sums
+    (overall score, social volume, and score/volume per platform) plus the
+    sample counts (overall and per platform) and min/max score, so a read is one ZRANGEBYSCORE over the
+    chosen resolution and averages are computed from the sums.
+
+    Redis layout (all under `<prefix>:`):
+        <token>:raw           zset ts -> snapshot JSON
+        <token>:<resolution>  zset bucket start -> aggregate JSON
+        tracked               zset token -> last time its timeline was read
+        <token>:collecting    collection claim, so instances don't double-fetch
+
+    Without Redis the same layout is kept in process memory.
+    """
+
+    def __init__(self, prefix: str = None):
+        self.redis_client = None
+        self.prefix = prefix or os.getenv("SENTIMENT_TS_PREFIX", "sentiment_ts")
+        hour = 3600
+        self.raw_retention = int(float(os.getenv("SENTIMENT_TS_RAW_RETENTION_HOURS", "24")) * hour)
+        self.resolutions = {
+            "5m": {"seconds": 300, "retention": int(float(os.getenv("SENTIMENT_TS_5M_RETENTION_HOURS", "48")) * hour)},
+            "1h": {"seconds": hour, "retention": int(float(os.getenv("SENTIMENT_TS_1H_RETENTION_DAYS", "30")) * 24 * hour)},
+            "1d": {"seconds": 24 * hour, "retention": int(float(os.getenv("SENTIMENT_TS_1D_RETENTION_DAYS", "365")) * 24 * hour)},
+        }
+        self.max_points = int(os.getenv("SENTIMENT_TS_MAX_POINTS", "300"))
+        # Tokens whose timeline nobody has asked for in this long stop being collected
+        self.track_ttl = int(float(os.getenv("SENTIMENT_TS_TRACK_HOURS", "24")) * hour)
+        self.max_tracked = int(os.getenv("SENTIMENT_TS_MAX_TRACKED", "50"))
+
+        self._memory: Dict[str, Dict[str, Dict[int, Dict[str, Any]]]] = {}
+        self._memory_tracked: Dict[str, float] = {}
+        self._memory_claims: Dict[str, float] = {}
+        self.stats = {"appends": 0, "reads": 0, "errors": 0}
+
+    async def initialize(self, redis_client=None):
+        """Attach the Redis client the series live in"""
+        try:
+            self.redis_client = redis_client
+            logger.info(f"Sentiment time series store initialized ({'redis' if redis_client else 'memory'})")
+        except Exception as e:
+            logger.error(f"Error initializing sentiment time series store: {e}")
+            raise
+
+    def _key(self, token_address: str, resolution: str) -> str:
+        return f"{self.prefix}:{token_address.lower()}:{resolution}"
+
+    @staticmethod
+    def build_snapshot(sentiment: Dict[str, Any], ts: int) -> Dict[str, Any]:
+        """Snapshot from a `get_multi_platform_sentiment` result"""
+        metrics = sentiment.get("sentiment_metrics", {})
+        breakdown = sentiment.get("platform_breakdown", {})
+        score = float(metrics.get("overall_score", 0) or 0)
+        platforms = {}
+        for name, volume_field in (("news", "mentions"), ("reddit", "posts"), ("farcaster", "casts")):
+            platform = breakdown.get(name)
+            if platform and platform.get("available", True):
+                platforms[name] = {
+                    "score": float(platform.get("sentiment", 0) or 0),
+                    "volume": float(platform.get(volume_field, 0) or 0)
+                }
+        return {
+            "t": ts, "n": 1, "score": score, "volume": float(metrics.get("total_volume", 0) or 0),
+            "min": score, "max": score, "platforms": platforms
+        }
+
+    @staticmethod
+    def _merge(agg: Optional[Dict[str, Any]], snapshot: Dict[str, Any], bucket: int) -> Dict[str, Any]:
+        """Python twin of the fold in APPEND_SCRIPT (memory backend)"""
+        if agg is None:
+            agg = {"t": bucket, "n": 0, "score": 0.0, "volume": 0.0,
+                   "min": snapshot["score"], "max": snapshot["score"], "platforms": {}}
+        agg["n"] += 1
+        agg["score"] += snapshot["score"]
+        agg["volume"] += snapshot["volume"]
+        agg["min"] = min(agg["min"], snapshot["score"])
+        agg["max"] = max(agg["max"], snapshot["score"])
+        for name, values in snapshot["platforms"].items():
+            platform = agg["platforms"].setdefault(name, {"n": 0, "score": 0.0, "volume": 0.0})
+            platform["n"] = platform.get("n", 0) + 1
+            platform["score"] += values["score"]
+            platform["volume"] += values["volume"]
+        return agg
+
+    async def append(self, token_address: str, snapshot: Dict[str, Any]) -> bool:
+        """Record one snapshot in the raw log and every rollup"""
+        ts = int(snapshot["t"])
+        try:
+            if self.redis_client:
+                keys = [self._key(token_address, "raw")] + [self._key(token_address, name) for name in self.resolutions]
+                args = [ts, json.dumps(snapshot), self.raw_retention]
+                for config in self.resolutions.values():
+                    args += [config["seconds"], config["retention"]]
+                await self.redis_client.eval(APPEND_SCRIPT, len(keys), *keys, *args)
+            else:
+                series = self._memory.setdefault(token_address.lower(), {})
+                raw = series.setdefault("raw", {})
+                raw[ts] = snapshot
+                self._trim(raw, ts - self.raw_retention)
+                for name, config in self.resolutions.items():
+                    buckets = series.setdefault(name, {})
+                    bucket = ts - ts % config["seconds"]
+                    buckets[bucket] = self._merge(buckets.get(bucket), snapshot, bucket)
+                    self._trim(buckets, bucket - config["retention"])
+            self.stats["appends"] += 1
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error appending sentiment snapshot for {token_address}: {e}")
+            return False
+
+    @staticmethod
+    def _trim(series: Dict[int, Any], oldest: int):
+        for ts in [ts for ts in series if ts < oldest]:
+            del series[ts]
+
+    def choose_resolution(self, hours: float) -> str:
+        """Finest rollup that still covers `hours` within `max_points` points"""
+        window = hours * 3600
+        for name, config in self.resolutions.items():
+            if config["retention"] >= window and window / config["seconds"] <= self.max_points:
+                return name
+        return list(self.resolutions)[-1]
+
+    async def get_series(self, token_address: str, hours: float = 24,
+                         resolution: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Points for the last `hours`, oldest first, in one range read
+
+        Args:
+            resolution: "raw", "5m", "1h" or "1d"; picked from `hours` if omitted
+        """
+        if resolution not in self.resolutions and resolution != "raw":
+            resolution = self.choose_resolution(hours)
+        now = time.time() if now is None else now
+        start = now - hours * 3600
+        if resolution != "raw":
+            # Include the bucket the window starts in
+            start -= start % self.resolutions[resolution]["seconds"]
+
+        try:
+            self.stats["reads"] += 1
+            if self.redis_client:
+                members = await self.redis_client.zrangebyscore(self._key(token_address, resolution), int(start), "+inf")
+                rows = [json.loads(member) for member in members]
+            else:
+                series = self._memory.get(token_address.lower(), {}).get(resolution, {})
+                rows = [series[ts] for ts in sorted(series) if ts >= start]
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error reading sentiment series for {token_address}: {e}")
+            rows = []
+
+        return {"resolution": resolution, "points": [self._to_point(row) for row in rows]}
+
+    @staticmethod
+    def _to_point(row: Dict[str, Any]) -> Dict[str, Any]:
+        n = row.get("n", 1) or 1
+        return {
+            "timestamp": datetime.fromtimestamp(row["t"], tz=timezone.utc).isoformat(),
+            "sentiment_score": round(row["score"] / n, 4),
+            "social_volume": round(row["volume"] / n, 2),
+            "min_score": round(row["min"], 4),
+            "max_score": round(row["max"], 4),
+            "samples": n,
+            "platforms": {
+                # Platforms missing from some snapshots average over the ones that had them
+                name: {"score": round(values["score"] / (values.get("n") or n), 4),
+                       "volume": round(values["volume"] / (values.get("n") or n), 2)}
+                for name, values in (row.get("platforms") or {}).items()
+            }
+        }
+
+    async def track(self, token_address: str, now: Optional[float] = None):
+        """Mark a token's timeline as wanted, so the collector keeps it fresh"""
+        now = time.time() if now is None else now
+        token = token_address.lower()
+        try:
+            if self.redis_client:
+                await self.redis_client.zadd(f"{self.prefix}:tracked", {token: now})
+            else:
+                self._memory_tracked[token] = now
+        except Exception as e:
+            logger.warning(f"Error tracking sentiment series for {token_address}: {e}")
+
+    async def tracked_tokens(self, now: Optional[float] = None) -> List[str]:
+        """Most recently requested tokens, after dropping stale ones"""
+        now = time.time() if now is None else now
+        oldest = now - self.track_ttl
+        try:
+            if self.redis_client:
+                key = f"{self.prefix}:tracked"
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.zremrangebyscore(key, "-inf", oldest)
+                pipe.zrevrange(key, 0, self.max_tracked - 1)
+                _, tokens = await pipe.execute()
+                return [token.decode() if isinstance(token, bytes) else token for token in tokens]
+
+            for token in [token for token, seen in self._memory_tracked.items() if seen < oldest]:
+                del self._memory_tracked[token]
+            return sorted(self._memory_tracked, key=self._memory_tracked.get, reverse=True)[:self.max_tracked]
+        except Exception as e:
+            logger.error(f"Error listing tracked sentiment series: {e}")
+            return []
+
+    async def claim_collection(self, token_address: str, seconds: float) -> bool:
+        """True if this caller should fetch the next snapshot for a token"""
+        key = self._key(token_address, "collecting")
+        try:
+            if self.redis_client:
+                return bool(await self.redis_client.set(key, "1", nx=True, ex=max(int(seconds), 1)))
+            now = time.monotonic()
+            if self._memory_claims.get(key, 0) > now:
+                return False
+            self._memory_claims[key] = now + seconds
+            return True
+        except Exception as e:
+            logger.warning(f"Error claiming sentiment collection for {token_address}: {e}")
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": "redis" if self.redis_client else "memory",
+            "resolutions": {name: config["retention"] for name, config in self.resolutions.items()},
+            "raw_retention": self.raw_retention
+        }
+
+
+class SentimentSnapshotCollector:
+    """
+    Background loops that keep sentiment warm:
+
+    - records a snapshot for every tracked token once per interval, so
+      timeline reads never trigger the multi-platform fan-out themselves
+    - refreshes the sentiment result cache for tokens in the hot CoinGecko
+      categories (top15 and trending by default) before it expires
+    """
+
+    def __init__(self, sentiment_service, interval: float = None):
+        self.sentiment_service = sentiment_service
+        self.enabled = os.getenv("SENTIMENT_TS_COLLECTOR_ENABLED", "true").lower() == "true"
+        self.interval = interval or float(os.getenv("SENTIMENT_TS_INTERVAL", "300"))
+        self.hot_categories = [c.strip() for c in os.getenv("SENTIMENT_HOT_CATEGORIES", "top15,trending").split(",") if c.strip()]
+        self.refresh_interval = float(os.getenv("SENTIMENT_CACHE_REFRESH_INTERVAL", "30"))
+        # Refresh once a cached result reaches this fraction of its TTL
+        self.refresh_ahead_ratio = float(os.getenv("SENTIMENT_CACHE_REFRESH_AHEAD_RATIO", "0.8"))
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats = {"runs": 0, "snapshots": 0, "skipped": 0, "errors": 0, "hot_refreshes": 0}
+
+    async def initialize(self):
+        """Start the background collection loop"""
+        try:
+            if not self.enabled:
+                logger.info("Sentiment snapshot collector disabled")
+                return
+
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+            if self.hot_categories and (self._refresh_task is None or self._refresh_task.done()):
+                self._refresh_task = asyncio.create_task(self._run_refresh())
+            logger.info(f"Sentiment snapshot collector started (every {self.interval}s, hot categories {self.hot_categories})")
+        except Exception as e:
+            logger.error(f"Error starting sentiment snapshot collector: {e}")
+            raise
+
+    async def stop(self):
+        """Stop the background collection loops"""
+        for task in (self._task, self._refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._refresh_task = None
+        logger.info("Sentiment snapshot collector stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.collect_tracked()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in sentiment snapshot loop: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _run_refresh(self):
+        while True:
+            try:
+                await self.refresh_hot_tokens()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in sentiment cache refresh loop: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def hot_tokens(self) -> Dict[str, Optional[str]]:
+        """Address -> symbol for tokens in the hot categories (cached lists only, never fetched)"""
+        coingecko_service = self.sentiment_service.coingecko_service
+        tokens = {}
+        for category in self.hot_categories:
+            config = coingecko_service.categories.get(category)
+            entry = coingecko_service.category_cache.get(config["cache_key"]) if config else None
+            for token in (entry[0] if entry else None) or []:
+                if token.get("address"):
+                    tokens.setdefault(token["address"].lower(), token.get("symbol"))
+        return tokens
+
+    async def refresh_hot_tokens(self):
+        """Recompute cached sentiment for hot tokens that are missing or close to expiry"""
+        threshold = self.sentiment_service.cache_ttl * self.refresh_ahead_ratio
+        # Sequential on purpose: each refresh is a Tavily search plus a Reddit crawl
+        for token_address, token_symbol in self.hot_tokens().items():
+            age = await self.sentiment_service.get_cache_age(token_address, token_symbol)
+            if age is None or age >= threshold:
+                await self.sentiment_service.get_multi_platform_sentiment(token_address, token_symbol, force_refresh=True)
+                self.stats["hot_refreshes"] += 1
+
+    async def collect_tracked(self):
+        """Snapshot every tracked token not already collected this interval"""
+        self.stats["runs"] += 1
+        store = self.sentiment_service.timeseries
+        # Sequential on purpose: each snapshot is a Tavily search plus a Reddit crawl
+        for token_address in await store.tracked_tokens():
+            await self.collect(token_address)
+
+    async def collect(self, token_address: str) -> bool:
+        """Record one snapshot unless another instance already has this interval"""
+        store = self.sentiment_service.timeseries
+        # Slightly under the interval, so the next run's claim has expired
+        if not await store.claim_collection(token_address, self.interval * 0.9):
+            self.stats["skipped"] += 1
+            return False
+        if await self.sentiment_service.record_sentiment_snapshot(token_address):
+            self.stats["snapshots"] += 1
+            return True
+        self.stats["errors"] += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "interval": self.interval,
+            "running": bool(self._task and not self._task.done()),
+            "store": self.sentiment_service.timeseries.get_stats()
+        }
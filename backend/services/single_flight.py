@@ -0,0 +1,219 @@
+"""
+Single Flight - Coalesces concurrent cache misses into one upstream fetch
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from typing import Dict, Any, Awaitable, Callable, Optional
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Only release the lock if we still own it (the lease may have expired and
+# been taken by another worker)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Extend the lease while we still own it; returns 0 once it has been lost
+RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Request coalescing keyed by cache key
+
+    Concurrent callers in the same process share one in-flight task. When a
+    Redis client is attached, workers also take a short-lease Redis lock: the
+    lock holder fetches and publishes its result, other workers poll for that
+    result instead of calling the upstream themselves. The holder renews the
+    lease every third of it while its fetch runs, so slow (e.g. rate-limited)
+    fetches keep it; a crashed holder's lease simply expires and a waiting
+    worker takes over. A waiter that has seen no result after
+    `max_wait_seconds` falls back to fetching directly.
+    """
+
+    def __init__(self):
+        self.redis_client = None
+        self.key_prefix = "single_flight"
+        self.lease_seconds = float(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "10"))
+        self.max_wait_seconds = float(os.getenv("SINGLE_FLIGHT_MAX_WAIT_SECONDS", "60"))
+        self.result_ttl_seconds = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "5"))
+        self.poll_interval = 0.05
+
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def initialize(self, redis_client=None):
+        """Attach an optional Redis client to coalesce across workers"""
+        try:
+            self.redis_client = redis_client
+            mode = "redis" if redis_client else "local"
+            logger.info(f"Single-flight coalescing initialized ({mode} mode)")
+        except Exception as e:
+            logger.error(f"Error initializing single-flight coalescing: {e}")
+            raise
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[Any]], shared: bool = True,
+                 group: Optional[str] = None) -> Any:
+        """
+        Run `fetch` once for all concurrent callers of `key`
+
+        Args:
+            key: Cache key being filled
+            fetch: Coroutine function performing the upstream call
+            shared: Also coalesce across workers through Redis (result must be JSON-serializable)
+            group: Name to report counts under (defaults to the key)
+
+        Returns:
+            The fetch result, shared by every coalesced caller
+        """
+        group = group or key
+        stats = self._get_stats(group)
+        task = self.in_flight.get(key)
+        if task is not None:
+            stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        stats["fetches"] += 1
+        if shared and self.redis_client:
+            task = asyncio.ensure_future(self._fetch_distributed(key, fetch, group))
+        else:
+            task = asyncio.ensure_future(fetch())
+        self.in_flight[key] = task
+        task.add_done_callback(lambda t: self._on_done(key, group, t))
+
+        # Shield so a cancelled caller does not abort the fetch other callers wait on
+        return await asyncio.shield(task)
+
+    async def _fetch_distributed(self, key: str, fetch: Callable[[], Awaitable[Any]], group: str) -> Any:
+        """Fetch under a Redis lease, or wait for the worker that holds it"""
+        lock_key = f"{self.key_prefix}:lock:{key}"
+        result_key = f"{self.key_prefix}:result:{key}"
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.max_wait_seconds
+        waited = False
+
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await self.redis_client.set(
+                    lock_key, token, nx=True, px=int(self.lease_seconds * 1000)
+                )
+            except Exception as e:
+                logger.warning(f"Single-flight lock unavailable for {key}, fetching locally: {e}")
+                return await fetch()
+
+            if acquired and waited:
+                # The holder we waited on may have just published and released
+                result = await self._read_result(result_key)
+                if result is not None:
+                    await self._release(lock_key, token)
+                    self._get_stats(group)["coalesced_remote"] += 1
+                    return result
+
+            if acquired:
+                renewal = asyncio.ensure_future(self._renew(lock_key, token))
+                try:
+                    result = await fetch()
+                    if result:
+                        await self._publish(result_key, result)
+                    return result
+                finally:
+                    renewal.cancel()
+                    await self._release(lock_key, token)
+
+            # Another worker is fetching - wait for its published result
+            result = await self._read_result(result_key)
+            if result is not None:
+                self._get_stats(group)["coalesced_remote"] += 1
+                return result
+
+            if loop.time() >= deadline:
+                self._get_stats(group)["lease_timeouts"] += 1
+                logger.warning(f"Single-flight gave up waiting for {key} after {self.max_wait_seconds}s, fetching directly")
+                return await fetch()
+
+            waited = True
+            await asyncio.sleep(self.poll_interval)
+
+    async def _publish(self, result_key: str, result: Any):
+        try:
+            await self.redis_client.set(
+                result_key, json.dumps(result, default=str), px=int(self.result_ttl_seconds * 1000)
+            )
+        except Exception as e:
+            logger.warning(f"Error publishing single-flight result {result_key}: {e}")
+
+    async def _read_result(self, result_key: str) -> Any:
+        try:
+            value = await self.redis_client.get(result_key)
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.warning(f"Error reading single-flight result {result_key}: {e}")
+            return None
+
+    async def _renew(self, lock_key: str, token: str):
+        """Keep extending the lease until cancelled or it is lost"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.redis_client.eval(
+                    RENEW_LOCK_SCRIPT, 1, lock_key, token, int(self.lease_seconds * 1000)
+                )
+            except Exception as e:
+                logger.warning(f"Error renewing single-flight lock {lock_key}: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"Single-flight lock {lock_key} lost before the fetch finished")
+                return
+
+    async def _release(self, lock_key: str, token: str):
+        try:
+            await self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Error releasing single-flight lock {lock_key}: {e}")
+
+    def _on_done(self, key: str, group: str, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._get_stats(group)["errors"] += 1
+
+    def _get_stats(self, group: str) -> Dict[str, int]:
+        if group not in self.stats:
+            self.stats[group] = {
+                "fetches": 0,
+                "coalesced": 0,
+                "coalesced_remote": 0,
+                "lease_timeouts": 0,
+                "errors": 0
+            }
+        return self.stats[group]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fetch vs coalesced counts per key group for monitoring"""
+        return {
+            "mode": "redis" if self.redis_client else "local",
+            "keys": self.stats,
+            "total_fetches": sum(s["fetches"] for s in self.stats.values()),
+            "total_coalesced": sum(s["coalesced"] + s["coalesced_remote"] for s in self.stats.values()),
+            "in_flight": len(self.in_flight),
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+# Process-wide coalescer shared by all services
+single_flight = SingleFlight()
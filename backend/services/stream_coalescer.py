@@ -0,0 +1,135 @@
+"""
+Stream Coalescer - Batches streamed LLM chunks into fewer WebSocket frames
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Dict, Any, AsyncIterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StreamCoalescer:
+    """
+    Sits between the orchestrator's event stream and the socket. Consecutive
+    `chunk` events are merged and flushed when the time window since the
+    first buffered chunk elapses or the buffer reaches `max_bytes`. Any other
+    event (status, complete, error) first flushes the buffer, so event order
+    is preserved. Clients append chunk content, so merged chunks render the
+    same as per-token ones.
+
+    Clients negotiate the window per message with `coalesce_ms` (0 turns it
+    off); requests are clamped to `max_window_ms`.
+    """
+
+    def __init__(self, window_ms: float = None, max_bytes: int = None, max_window_ms: float = None):
+        self.window_ms = window_ms if window_ms is not None else float(os.getenv("CHAT_STREAM_COALESCE_MS", "40"))
+        self.max_bytes = max_bytes or int(os.getenv("CHAT_STREAM_COALESCE_BYTES", "1024"))
+        self.max_window_ms = max_window_ms or float(os.getenv("CHAT_STREAM_COALESCE_MAX_MS", "250"))
+        self.stats = {"streams": 0, "chunks_in": 0, "frames_out": 0}
+
+    def negotiate(self, requested: Any = None) -> float:
+        """Window (ms) for a client request; invalid values get the default"""
+        if requested is None:
+            return self.window_ms
+        try:
+            return min(max(float(requested), 0.0), self.max_window_ms)
+        except (TypeError, ValueError):
+            return self.window_ms
+
+    async def coalesce(
+        self,
+        events: AsyncIterator[Dict[str, Any]],
+        window_ms: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Re-yield `events` with consecutive chunks merged"""
+        window = (self.window_ms if window_ms is None else window_ms) / 1000
+        self.stats["streams"] += 1
+        if window <= 0:
+            async for event in events:
+                yield event
+            return
+
+        # A reader task buffers chunks as they arrive and only wakes the
+        # consumer when a frame is ready or a window opens, so waiting can
+        # time out (to flush) without cancelling the upstream generator
+        loop = asyncio.get_running_loop()
+        ready: deque = deque()
+        wake = asyncio.Event()
+        state = {"first": None, "parts": [], "size": 0, "deadline": 0.0, "done": False, "error": None}
+
+        def flush():
+            ready.append({**state["first"], "content": "".join(state["parts"])})
+            state.update(first=None, parts=[], size=0)
+
+        async def read():
+            try:
+                async for event in events:
+                    if event.get("type") == "chunk":
+                        content = event.get("content") or ""
+                        self.stats["chunks_in"] += 1
+                        if not state["parts"]:
+                            state["first"] = event
+                            state["deadline"] = loop.time() + window
+                            wake.set()
+                        state["parts"].append(content)
+                        state["size"] += len(content.encode("utf-8"))
+                        if state["size"] >= self.max_bytes:
+                            flush()
+                            wake.set()
+                    else:
+                        if state["parts"]:
+                            flush()
+                        ready.append(event)
+                        wake.set()
+            except Exception as e:
+                state["error"] = e
+            finally:
+                state["done"] = True
+                wake.set()
+
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                while ready:
+                    self.stats["frames_out"] += 1
+                    yield ready.popleft()
+
+                if state["done"]:
+                    if state["parts"]:
+                        flush()
+                        continue
+                    if state["error"]:
+                        raise state["error"]
+                    break
+
+                wake.clear()
+                if state["parts"]:
+                    try:
+                        async with asyncio.timeout_at(state["deadline"]):
+                            await wake.wait()
+                    except TimeoutError:
+                        flush()
+                else:
+                    await wake.wait()
+
+        finally:
+            # Cancelling the reader propagates into the source (and its LLM stream)
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        chunks, frames = self.stats["chunks_in"], self.stats["frames_out"]
+        return {
+            **self.stats,
+            "window_ms": self.window_ms,
+            "max_bytes": self.max_bytes,
+            "chunks_per_frame": round(chunks / frames, 2) if frames else 0.0
+        }
+
+
+# Process-wide coalescer for streamed chat responses
+stream_coalescer = StreamCoalescer()
@@ -4,10 +4,14 @@ Part of the DeCrypt backend services
 """
 
 import asyncio
+import os
+import re
 from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime
-import httpx
+from services.http_client import http_client_pool
+from services.rate_limiter import rate_limiter, parse_retry_after
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,20 @@ class TavilyService:
             "include_raw_content": False,
             "max_results": 5
         }
+        
+        # Result cache TTLs per topic (env TAVILY_CACHE_TTL_<TOPIC>): news goes
+        # stale fast, educational material barely changes
+        self.redis_service = None
+        self.cache_ttls = {
+            topic: int(os.getenv(f"TAVILY_CACHE_TTL_{topic.upper()}", str(default)))
+            for topic, default in (("news", 300), ("market", 900), ("general", 3600), ("education", 86400))
+        }
+        self.topic_keywords = {
+            "news": ("news", "latest", "today", "breaking", "sentiment", "price", "discussion"),
+            "market": ("market", "analysis", "trend", "regulation"),
+            "education": ("tutorial", "guide", "guidelines", "education", "explained", "what is", "how to", "how does")
+        }
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
     
     async def initialize(self, api_key: str):
         """Initialize Tavily service"""
@@ -39,16 +57,140 @@ class TavilyService:
             logger.error(f"Error initializing Tavily service: {e}")
             raise
     
+    async def initialize_cache(self, redis_service):
+        """Attach Redis for the search result cache"""
+        self.redis_service = redis_service
+        logger.info(f"Tavily result cache enabled (TTLs: {self.cache_ttls})")
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Canonical form used as the cache key: lowercase, with punctuation
+        (other than operators like site:reddit.com) and repeated whitespace
+        collapsed. Word order and repeats are kept, since they can change
+        what the search returns
+        """
+        words = re.sub(r"[^\w\s:.$-]", " ", query.lower()).split()
+        return " ".join(word.strip(".-") or word for word in words)
+    
+    def classify_topic(self, query: str) -> str:
+        """Pick the cache TTL bucket for a free-text query"""
+        query_lower = query.lower()
+        for topic in ("news", "market", "education"):
+            if any(keyword in query_lower for keyword in self.topic_keywords[topic]):
+                return topic
+        return "general"
+    
     async def search(
         self,
         query: str,
         max_results: int = 5,
         search_depth: str = "basic",
-        include_answer: bool = True
+        include_answer: bool = True,
+        topic: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform web search using Tavily API
         """
+        response = await self.search_with_metadata(query, max_results, search_depth, include_answer, topic)
+        return response["results"]
+    
+    async def search_with_metadata(
+        self,
+        query: str,
+        max_results: int = 5,
+        search_depth: str = "basic",
+        include_answer: bool = True,
+        topic: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Cached web search
+        
+        Returns:
+            Dict with "results", "answer", "topic", "cached" and
+            "cache_age_seconds" (0 for a fresh API response)
+        """
+        topic = topic or self.classify_topic(query)
+        stats = self._get_cache_stats(topic)
+        normalized = self.normalize_query(query)
+        cache_query = f"{search_depth}:{int(include_answer)}:{normalized}"
+        
+        try:
+            entry = await self._get_cached_entry(cache_query, max_results)
+            if entry:
+                stats["hits"] += 1
+            else:
+                stats["misses"] += 1
+                # Identical concurrent searches (in any worker) share one API call
+                entry = await single_flight.do(
+                    f"tavily:{cache_query}:{max_results}",
+                    lambda: self._fetch_and_cache(cache_query, query, max_results, search_depth,
+                                                  include_answer, topic),
+                    group="tavily"
+                )
+            
+            if not entry:
+                return {"results": [], "answer": None, "topic": topic, "cached": False, "cache_age_seconds": None}
+            
+            cached = entry.get("source") == "cache"
+            age = max(0.0, datetime.now().timestamp() - entry["fetched_at"]) if cached else 0.0
+            return {
+                "results": entry["results"][:max_results],
+                "answer": entry.get("answer"),
+                "topic": topic,
+                "cached": cached,
+                "cache_age_seconds": round(age, 1)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error performing cached web search: {e}")
+            return {"results": [], "answer": None, "topic": topic, "cached": False, "cache_age_seconds": None}
+    
+    async def _get_cached_entry(self, cache_query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """Cached entry holding at least `max_results` results (a larger search serves a smaller one)"""
+        if not self.redis_service:
+            return None
+        entry = await self.redis_service.get_cached_web_search(cache_query)
+        if entry and entry.get("max_results", 0) >= max_results:
+            return {**entry, "source": "cache"}
+        return None
+    
+    async def _fetch_and_cache(
+        self,
+        cache_query: str,
+        query: str,
+        max_results: int,
+        search_depth: str,
+        include_answer: bool,
+        topic: str
+    ) -> Optional[Dict[str, Any]]:
+        # Another caller may have filled the cache while we waited for the lock
+        entry = await self._get_cached_entry(cache_query, max_results)
+        if entry:
+            return entry
+        
+        data = await self._search_api(query, max_results, search_depth, include_answer)
+        if not data or not data.get("results"):
+            return None
+        
+        entry = {
+            "results": data["results"],
+            "answer": data.get("answer"),
+            "max_results": max_results,
+            "fetched_at": datetime.now().timestamp()
+        }
+        if self.redis_service:
+            await self.redis_service.cache_web_search(cache_query, entry, ttl=self.cache_ttls[topic])
+        return {**entry, "source": "api"}
+    
+    async def _search_api(
+        self,
+        query: str,
+        max_results: int,
+        search_depth: str,
+        include_answer: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Call the Tavily search endpoint"""
         try:
             if not self.api_key:
                 raise Exception("Tavily API key not configured")
@@ -67,24 +209,42 @@ class TavilyService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient() as client:
+            async with http_client_pool.client("tavily") as client:
+                await rate_limiter.acquire("tavily")
                 response = await client.post(
                     f"{self.base_url}/search",
                     json=payload,
-                    headers=headers,
-                    timeout=30.0
+                    headers=headers
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
-                    return data.get("results", [])
+                    return response.json()
+                elif response.status_code == 429:
+                    logger.warning("Tavily rate limit hit (429)")
+                    await rate_limiter.penalize("tavily", parse_retry_after(response.headers.get("Retry-After")))
+                    return None
                 else:
                     logger.error(f"Tavily API error: {response.status_code}")
-                    return []
+                    return None
                     
         except Exception as e:
             logger.error(f"Error performing web search: {e}")
-            return []
+            return None
+    
+    def _get_cache_stats(self, topic: str) -> Dict[str, int]:
+        if topic not in self.cache_stats:
+            self.cache_stats[topic] = {"hits": 0, "misses": 0}
+        return self.cache_stats[topic]
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counts per topic for monitoring"""
+        hits = sum(s["hits"] for s in self.cache_stats.values())
+        lookups = hits + sum(s["misses"] for s in self.cache_stats.values())
+        return {
+            "topics": self.cache_stats,
+            "ttls": self.cache_ttls,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
     
     async def search_crypto_news(self, query: str = "cryptocurrency news") -> List[Dict[str, Any]]:
         """
@@ -97,7 +257,8 @@ class TavilyService:
             results = await self.search(
                 query=recent_query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -116,7 +277,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -133,7 +295,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="market"
             )
             
             return results
@@ -150,7 +313,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -167,7 +331,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -186,7 +351,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -205,7 +371,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="news"
             )
             
             return results
@@ -224,7 +391,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="education"
             )
             
             return results
@@ -243,7 +411,8 @@ class TavilyService:
             results = await self.search(
                 query=query,
                 max_results=5,
-                search_depth="basic"
+                search_depth="basic",
+                topic="education"
             )
             
             return results
@@ -0,0 +1,187 @@
+"""
+Token Index - O(1) lookups over the CoinGecko Base token list
+Part of the EAILI5 backend services
+"""
+
+import json
+from typing import Dict, List, Any, Optional, Set
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTokenIndex:
+    """
+    In-memory indexes over the Base token list (id, lowercase address,
+    symbol, name), persisted to Redis so new workers can skip the
+    multi-megabyte /coins/list download
+    """
+
+    def __init__(self, key_prefix: str = "coingecko:base_tokens"):
+        self.key_prefix = key_prefix
+        self.tokens_key = f"{key_prefix}:by_id"  # hash: coingecko id -> token JSON
+        self.meta_key = f"{key_prefix}:meta"     # hash: updated_at, count
+        self.order_key = f"{key_prefix}:order"   # JSON list of ids in /coins/list order
+
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_address: Dict[str, str] = {}     # lowercase address -> id
+        self.by_symbol: Dict[str, Set[str]] = {}  # uppercase symbol -> ids
+        self.by_name: Dict[str, Set[str]] = {}    # lowercase name -> ids
+        self.order: List[str] = []                # ids in the order of the last full list
+        self.updated_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def tokens(self) -> List[Dict[str, Any]]:
+        """All indexed tokens, in the order of the list they were last updated from"""
+        return [self.by_id[coin_id] for coin_id in self.order]
+
+    def update(self, tokens: List[Dict[str, Any]], updated_at: Optional[float] = None) -> Dict[str, List[str]]:
+        """
+        Apply a fresh token list, touching only entries that changed
+
+        Returns:
+            Dict with "upserted" and "removed" coingecko ids
+        """
+        incoming = {token["id"]: token for token in tokens if token.get("id")}
+        removed = [coin_id for coin_id in self.by_id if coin_id not in incoming]
+        upserted = [coin_id for coin_id, token in incoming.items() if self.by_id.get(coin_id) != token]
+
+        for coin_id in removed:
+            self._remove(coin_id)
+        for coin_id in upserted:
+            self._add(incoming[coin_id])
+        self.order = list(incoming)
+
+        self.updated_at = updated_at or datetime.now().timestamp()
+        if upserted or removed:
+            logger.info(f"Base token index updated: {len(upserted)} upserted, {len(removed)} removed, {len(self.by_id)} total")
+        return {"upserted": upserted, "removed": removed}
+
+    def _add(self, token: Dict[str, Any]):
+        coin_id = token["id"]
+        if coin_id in self.by_id:
+            self._remove(coin_id)
+
+        self.by_id[coin_id] = token
+        address = (token.get("base_address") or "").lower()
+        if address:
+            self.by_address[address] = coin_id
+        symbol = (token.get("symbol") or "").upper()
+        if symbol:
+            self.by_symbol.setdefault(symbol, set()).add(coin_id)
+        name = (token.get("name") or "").lower()
+        if name:
+            self.by_name.setdefault(name, set()).add(coin_id)
+
+    def _remove(self, coin_id: str):
+        token = self.by_id.pop(coin_id, None)
+        if not token:
+            return
+
+        address = (token.get("base_address") or "").lower()
+        if self.by_address.get(address) == coin_id:
+            del self.by_address[address]
+        for index, key in ((self.by_symbol, (token.get("symbol") or "").upper()),
+                           (self.by_name, (token.get("name") or "").lower())):
+            ids = index.get(key)
+            if ids:
+                ids.discard(coin_id)
+                if not ids:
+                    del index[key]
+
+    def get_id_for_address(self, address: str) -> Optional[str]:
+        """CoinGecko id for a Base contract address"""
+        if not address:
+            return None
+        return self.by_address.get(address.lower())
+
+    def get_by_address(self, address: str) -> Optional[Dict[str, Any]]:
+        coin_id = self.get_id_for_address(address)
+        return self.by_id.get(coin_id) if coin_id else None
+
+    def find_by_symbol(self, symbol: str) -> List[Dict[str, Any]]:
+        return [self.by_id[coin_id] for coin_id in self.by_symbol.get((symbol or "").upper(), ())]
+
+    def find_by_name(self, name: str) -> List[Dict[str, Any]]:
+        return [self.by_id[coin_id] for coin_id in self.by_name.get((name or "").lower(), ())]
+
+    async def persist(self, redis_client, changes: Optional[Dict[str, List[str]]] = None) -> bool:
+        """
+        Write the index to Redis; with `changes`, only the changed entries are written
+        """
+        try:
+            if not redis_client:
+                return False
+
+            upserted = self.by_id.keys() if changes is None else changes["upserted"]
+            removed = [] if changes is None else changes["removed"]
+
+            pipe = redis_client.pipeline(transaction=False)
+            if changes is None:
+                pipe.delete(self.tokens_key)
+            if upserted:
+                pipe.hset(self.tokens_key, mapping={
+                    coin_id: json.dumps(self.by_id[coin_id]) for coin_id in upserted
+                })
+            if removed:
+                pipe.hdel(self.tokens_key, *removed)
+            # Hash fields come back in no fixed order, so the list order is stored separately
+            pipe.set(self.order_key, json.dumps(self.order))
+            pipe.hset(self.meta_key, mapping={"updated_at": self.updated_at, "count": len(self.by_id)})
+            pipe.hlen(self.tokens_key)
+            results = await pipe.execute()
+
+            # The stored hash drifted (e.g. evicted) - incremental writes are not enough
+            if changes is not None and results[-1] != len(self.by_id):
+                logger.warning("Stored Base token index out of sync, rewriting it in full")
+                return await self.persist(redis_client)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error persisting Base token index: {e}")
+            return False
+
+    async def load(self, redis_client) -> bool:
+        """Rebuild the index from Redis; returns False if nothing is stored"""
+        try:
+            if not redis_client:
+                return False
+
+            updated_at = await redis_client.hget(self.meta_key, "updated_at")
+            if not updated_at:
+                return False
+
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.tokens_key)
+            pipe.get(self.order_key)
+            stored, order = await pipe.execute()
+            if not stored:
+                return False
+
+            # Rebuild in the fetching worker's order, so every worker ranks the
+            # same tokens. /coins/list is sorted by id, which is the order used
+            # for any id the stored order lacks (e.g. indexes stored before it)
+            stored = {key.decode() if isinstance(key, bytes) else key: value for key, value in stored.items()}
+            listed = json.loads(order) if order else []
+            order = [coin_id for coin_id in listed if coin_id in stored] + sorted(set(stored) - set(listed))
+            self.update([json.loads(stored[coin_id]) for coin_id in order], float(updated_at))
+            logger.info(f"Loaded Base token index from Redis ({len(self.by_id)} tokens)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading Base token index: {e}")
+            return False
+
+    async def get_stored_timestamp(self, redis_client) -> float:
+        """When the index in Redis was last refreshed (0 if never)"""
+        try:
+            if not redis_client:
+                return 0.0
+            updated_at = await redis_client.hget(self.meta_key, "updated_at")
+            return float(updated_at) if updated_at else 0.0
+        except Exception as e:
+            logger.error(f"Error reading Base token index timestamp: {e}")
+            return 0.0
@@ -0,0 +1,181 @@
+"""
+Token Refresh Service - Keeps CoinGecko token categories warm in the background
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Dict, Any, Optional
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Take or renew the broadcast lease: held if it is ours or was free
+LEADER_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# Only release the lease if we still hold it
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TokenRefreshService:
+    """
+    Background scheduler that refreshes each token category before its TTL
+    expires and pushes the fresh list to /ws/tokens subscribers
+
+    Every instance refreshes its own category cache, but with Redis attached
+    only the holder of a short leader lease broadcasts, so clients behind the
+    WebSocket backplane get one update per refresh instead of one per replica.
+    """
+
+    def __init__(self, coingecko_service, websocket_service=None):
+        self.coingecko_service = coingecko_service
+        self.websocket_service = websocket_service
+        self.enabled = os.getenv("TOKEN_REFRESH_ENABLED", "true").lower() == "true"
+
+        # Refresh once a category reaches this fraction of its TTL
+        self.refresh_ahead_ratio = float(os.getenv("TOKEN_REFRESH_AHEAD_RATIO", "0.8"))
+        self.check_interval = float(os.getenv("TOKEN_REFRESH_CHECK_INTERVAL", "15"))
+
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+        self.redis_client = None
+        self.instance_id = uuid.uuid4().hex
+        self.leader_key = "token_refresh:leader"
+        # Outlives a few check intervals, so a stalled leader is replaced quickly
+        self.leader_lease_seconds = float(os.getenv("TOKEN_REFRESH_LEADER_LEASE", str(max(self.check_interval * 3, 30))))
+        self.is_leader = True
+
+    async def initialize(self, redis_client=None):
+        """Start the background refresh loop"""
+        try:
+            self.redis_client = redis_client
+            if not self.enabled:
+                logger.info("Token refresh scheduler disabled")
+                return
+
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+            ttls = {name: config["ttl"] for name, config in self.coingecko_service.categories.items()}
+            logger.info(f"Token refresh scheduler started (TTLs: {ttls})")
+        except Exception as e:
+            logger.error(f"Error starting token refresh scheduler: {e}")
+            raise
+
+    async def stop(self):
+        """Stop the background refresh loop"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.redis_client and self.is_leader:
+            try:
+                await self.redis_client.eval(RELEASE_LEASE_SCRIPT, 1, self.leader_key, self.instance_id)
+            except Exception as e:
+                logger.warning(f"Error releasing token refresh lease: {e}")
+        logger.info("Token refresh scheduler stopped")
+
+    async def renew_leadership(self) -> bool:
+        """Take or extend the broadcast lease; without Redis every instance broadcasts"""
+        if not self.redis_client:
+            self.is_leader = True
+            return True
+        try:
+            self.is_leader = bool(await self.redis_client.eval(
+                LEADER_LEASE_SCRIPT, 1, self.leader_key, self.instance_id, int(self.leader_lease_seconds * 1000)
+            ))
+        except Exception as e:
+            # The backplane is down too, so each instance must reach its own sockets
+            logger.warning(f"Token refresh lease unavailable, broadcasting locally: {e}")
+            self.is_leader = True
+        return self.is_leader
+
+    async def _run(self):
+        while True:
+            try:
+                await self.renew_leadership()
+                await self.refresh_due_categories()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in token refresh loop: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def refresh_due_categories(self):
+        """Refresh every category that is cold or close to expiry"""
+        # Sequential on purpose: categories share the CoinGecko rate budget
+        for category, config in self.coingecko_service.categories.items():
+            age = self.coingecko_service.get_category_age(category)
+            if age is None or age >= config["ttl"] * self.refresh_ahead_ratio:
+                await self.refresh(category)
+
+    async def refresh(self, category: str) -> bool:
+        """Refresh a single category and broadcast it to token subscribers"""
+        stats = self._get_stats(category)
+        start = asyncio.get_event_loop().time()
+        try:
+            tokens = await self.coingecko_service.refresh_category(category)
+            if not tokens:
+                stats["failures"] += 1
+                return False
+
+            stats["refreshes"] += 1
+            stats["last_refresh"] = datetime.now().isoformat()
+            stats["last_duration_ms"] = round((asyncio.get_event_loop().time() - start) * 1000, 1)
+
+            if self.websocket_service and self.is_leader:
+                await self.websocket_service.send_token_update({
+                    "category": category,
+                    "tokens": tokens
+                })
+            return True
+
+        except Exception as e:
+            stats["failures"] += 1
+            logger.error(f"Error refreshing {category} tokens: {e}")
+            return False
+
+    def _get_stats(self, category: str) -> Dict[str, Any]:
+        if category not in self.stats:
+            self.stats[category] = {
+                "refreshes": 0,
+                "failures": 0,
+                "last_refresh": None,
+                "last_duration_ms": None
+            }
+        return self.stats[category]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-category refresh counters and cache ages for monitoring"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "leader": self.is_leader,
+            "categories": {
+                category: {
+                    **self._get_stats(category),
+                    "ttl": config["ttl"],
+                    "age_seconds": self.coingecko_service.get_category_age(category)
+                }
+                for category, config in self.coingecko_service.categories.items()
+            },
+            "timestamp": datetime.now().isoformat()
+        }
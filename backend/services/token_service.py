@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 import httpx
 import json
 from math import isfinite
+from services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +30,14 @@ class TokenService:
         self.trending_cache_ttl = 600  # 10 minutes
         
     
-    async def initialize(self, redis_service=None, etherscan_service=None, base_client=None, coingecko_service=None):
+    async def initialize(self, redis_service=None, etherscan_service=None, base_client=None, coingecko_service=None, dex_price_service=None):
         """Initialize the token service with dependencies"""
         try:
             self.redis_service = redis_service
             self.etherscan_service = etherscan_service
             self.base_client = base_client
             self.coingecko_service = coingecko_service
+            self.dex_price_service = dex_price_service
             
             # Fix: Assign redis_client attribute for compatibility
             self.redis_client = redis_service
@@ -100,6 +102,25 @@ class TokenService:
             cache_key = f"token_details:{token_address}"
             cached_data = await self._get_from_cache(cache_key)
             
+            if cached_data:
+                return cached_data
+            
+            # Concurrent misses for the same token (in any worker) share one fetch
+            return await single_flight.do(
+                cache_key,
+                lambda: self._fetch_token_details(cache_key, token_address),
+                group="token_details"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting token details: {e}")
+            return {}
+    
+    async def _fetch_token_details(self, cache_key: str, token_address: str) -> Dict[str, Any]:
+        """Aggregate token details from upstream sources and cache them"""
+        try:
+            # Another caller may have filled the cache while we waited for the lock
+            cached_data = await self._get_from_cache(cache_key)
             if cached_data:
                 return cached_data
             
@@ -112,7 +133,7 @@ class TokenService:
             return token_data
             
         except Exception as e:
-            logger.error(f"Error getting token details: {e}")
+            logger.error(f"Error fetching token details for {token_address}: {e}")
             return {}
     
     async def _get_coingecko_id_for_address(self, token_address: str) -> Optional[str]:
@@ -122,11 +143,10 @@ class TokenService:
                 logger.warning("CoinGecko service not available for ID mapping")
                 return None
                 
-            base_tokens = await self.coingecko_service.get_base_token_list()
-            for token in base_tokens:
-                if token.get("base_address", "").lower() == token_address.lower():
-                    logger.info(f"Found CoinGecko ID {token.get('id')} for address {token_address}")
-                    return token.get("id")
+            coingecko_id = await self.coingecko_service.get_coingecko_id_for_address(token_address)
+            if coingecko_id:
+                logger.info(f"Found CoinGecko ID {coingecko_id} for address {token_address}")
+                return coingecko_id
             
             logger.warning(f"No CoinGecko ID found for address {token_address}")
             return None
@@ -163,26 +183,49 @@ class TokenService:
         Get current price for a token
         """
         try:
-            # Check cache first
-            cache_key = f"token_price:{token_address}"
-            cached_price = await self._get_from_cache(cache_key)
+            prices = await self.get_token_prices([token_address])
+            return prices.get(token_address.lower())
             
-            if cached_price:
-                return float(cached_price)
+        except Exception as e:
+            logger.error(f"Error getting token price: {e}")
+            return None
+    
+    async def get_token_prices(self, token_addresses: List[str]) -> Dict[str, float]:
+        """
+        Get current prices for many tokens at once
+        
+        Cached prices are served from Redis; the rest are priced together in
+        one batched DEX quote instead of one RPC round trip per token.
+        
+        Returns:
+            Dict of lowercase address -> price (tokens without a price are omitted)
+        """
+        prices: Dict[str, float] = {}
+        try:
+            addresses = list(dict.fromkeys(address.lower() for address in token_addresses if address))
             
-            # Fetch from multiple sources
-            price = await self._aggregate_token_price(token_address)
+            # Check cache first
+            cached = await asyncio.gather(*(self._get_from_cache(f"token_price:{address}") for address in addresses))
+            missing = []
+            for address, cached_price in zip(addresses, cached):
+                if cached_price:
+                    prices[address] = float(cached_price)
+                else:
+                    missing.append(address)
             
-            if price:
-                # Cache the price
-                await self._set_cache(cache_key, str(price), 60)  # 1 minute cache
-                return price
+            if missing and self.dex_price_service:
+                fetched = await self.dex_price_service.get_token_prices_usd(missing)
+                for address, price in fetched.items():
+                    if price:
+                        prices[address] = price
+                        # Cache the price
+                        await self._set_cache(f"token_price:{address}", str(price), 60)  # 1 minute cache
             
-            return None
+            return prices
             
         except Exception as e:
-            logger.error(f"Error getting token price: {e}")
-            return None
+            logger.error(f"Error getting token prices: {e}")
+            return prices
     
     async def get_token_volume(self, token_address: str, timeframe: str = "24h") -> Optional[float]:
         """
@@ -274,6 +317,9 @@ class TokenService:
         """
         enriched_tokens = []
         
+        # Price the whole list in one batch up front
+        prices = await self.get_token_prices([token.get("address", "") for token in tokens])
+        
         for token in tokens:
             try:
                 address = token.get("address", "")
@@ -295,19 +341,10 @@ class TokenService:
                         token["total_supply"] = supply_data.get("total_supply", 0)
                         token["circulating_supply"] = supply_data.get("circulating_supply", 0)
                 
-                # Get real price from CoinGecko
-                calculated_price = 0
-                if self.coingecko_service:
-                    try:
-                        logger.info(f"Fetching CoinGecko price for {token.get('symbol')} ({address})...")
-                        price = await self.coingecko_service.get_token_price_usd(address)
-                        if price and price > 0:
-                            calculated_price = price
-                            logger.info(f"Got CoinGecko price for {token.get('symbol', address)}: ${calculated_price:.8f}")
-                        else:
-                            logger.warning(f"No CoinGecko price available for {token.get('symbol')} ({address})")
-                    except Exception as e:
-                        logger.warning(f"Could not fetch CoinGecko price for {address}: {e}")
+                # Get real price from the batched DEX quote
+                calculated_price = prices.get(address.lower(), 0)
+                if not calculated_price:
+                    logger.warning(f"No DEX price available for {token.get('symbol')} ({address})")
                 
                 # Calculate safety score based on available data
                 safety_score = await self._calculate_safety_score(token)
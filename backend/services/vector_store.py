@@ -0,0 +1,272 @@
+"""
+Vector Store - Local memory-mapped embedding store for the RAG pipeline
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorStore:
+    """
+    Embeddings live in one contiguous float32 matrix backed by a memory-mapped
+    file, L2-normalised on insert so cosine similarity is a single mat-vec
+    product. Document metadata is kept in memory (and appended to a JSONL
+    file), and each filterable field has precomputed boolean row masks.
+
+    On disk (under `data_dir`):
+        embeddings.f32   raw float32 rows, capacity x dimension
+        documents.jsonl  one {"row", "document"} line per add (last line wins)
+        meta.json        dimension, count, capacity
+
+    Writes are serialised within a process; the files assume a single writer.
+    Searches run without the write lock: a new row is written before `count`
+    is raised to include it, and searches only read rows below `count`.
+    """
+
+    FILTER_FIELDS = ("category", "difficulty_level")
+
+    def __init__(self, data_dir: str = None, dimension: int = None, initial_capacity: int = None):
+        self.data_dir = data_dir or os.getenv(
+            "VECTOR_STORE_DIR", os.path.join(os.path.dirname(__file__), '..', 'data', 'vector_store')
+        )
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity or int(os.getenv("VECTOR_STORE_INITIAL_CAPACITY", "1024"))
+
+        self.embeddings_path = os.path.join(self.data_dir, "embeddings.f32")
+        self.documents_path = os.path.join(self.data_dir, "documents.jsonl")
+        self.meta_path = os.path.join(self.data_dir, "meta.json")
+
+        self._matrix: Optional[np.memmap] = None
+        self.count = 0
+        self.capacity = 0
+        self.documents: List[Optional[Dict[str, Any]]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.masks: Dict[Tuple[str, Any], np.ndarray] = {}  # (field, value) -> bool[capacity]
+
+        self._write_lock = asyncio.Lock()
+        self.stats = {"searches": 0, "documents_added": 0, "last_search_ms": None}
+
+    async def initialize(self):
+        """Open the store, loading any existing data from disk"""
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            if os.path.exists(self.meta_path):
+                await asyncio.to_thread(self._load)
+            logger.info(
+                f"Vector store initialized at {self.data_dir} "
+                f"({self.count} documents, dimension {self.dimension})"
+            )
+        except Exception as e:
+            logger.error(f"Error initializing vector store: {e}")
+            raise
+
+    def _load(self):
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        self.dimension = meta["dimension"]
+        self.count = meta["count"]
+        self.capacity = meta["capacity"]
+        self._matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode="r+",
+                                 shape=(self.capacity, self.dimension))
+
+        self.documents = [None] * self.count
+        if os.path.exists(self.documents_path):
+            with open(self.documents_path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry["row"] < self.count:
+                        self.documents[entry["row"]] = entry["document"]
+
+        self.id_to_row = {}
+        self.masks = {}
+        for row, document in enumerate(self.documents):
+            if document:
+                self.id_to_row[document["id"]] = row
+                self._set_masks(row, document)
+
+    def _ensure_capacity(self, rows_needed: int):
+        """Grow the backing file (doubling) without rewriting existing rows"""
+        if self._matrix is not None and rows_needed <= self.capacity:
+            return
+
+        new_capacity = max(self.initial_capacity, self.capacity)
+        while new_capacity < rows_needed:
+            new_capacity *= 2
+
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self.embeddings_path, "ab") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        self._matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode="r+",
+                                 shape=(new_capacity, self.dimension))
+
+        for key, mask in self.masks.items():
+            grown = np.zeros(new_capacity, dtype=bool)
+            grown[:len(mask)] = mask
+            self.masks[key] = grown
+        self.capacity = new_capacity
+
+    def _set_masks(self, row: int, document: Dict[str, Any]):
+        for field in self.FILTER_FIELDS:
+            # Clear the row from every value of this field (handles re-categorised upserts)
+            for (mask_field, _), mask in self.masks.items():
+                if mask_field == field:
+                    mask[row] = False
+            value = document.get(field)
+            if value is None:
+                continue
+            key = (field, value)
+            if key not in self.masks:
+                self.masks[key] = np.zeros(self.capacity, dtype=bool)
+            self.masks[key][row] = True
+
+    async def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Append (or upsert by id) documents with an `embedding` field
+
+        Returns:
+            IDs of the stored documents
+        """
+        try:
+            documents = [doc for doc in documents if doc.get("embedding")]
+            if not documents:
+                return []
+
+            async with self._write_lock:
+                ids = await asyncio.to_thread(self._add_documents, documents)
+            self.stats["documents_added"] += len(ids)
+            return ids
+
+        except Exception as e:
+            logger.error(f"Error adding documents to vector store: {e}")
+            return []
+
+    def _add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        if self.dimension is None:
+            self.dimension = len(documents[0]["embedding"])
+
+        vectors = np.asarray([doc["embedding"] for doc in documents], dtype=np.float32)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dimension}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        new_ids = {doc["id"] for doc in documents if doc["id"] not in self.id_to_row}
+        self._ensure_capacity(self.count + len(new_ids))
+
+        ids = []
+        with open(self.documents_path, "a") as f:
+            for vector, doc in zip(vectors, documents):
+                stored = {key: value for key, value in doc.items() if key != "embedding"}
+                row = self.id_to_row.get(doc["id"])
+                if row is None:
+                    # Fill the new row before publishing it through `count`, so a
+                    # concurrent search never scores a half-written row
+                    row = self.count
+                    self._matrix[row] = vector
+                    self.documents.append(stored)
+                    self._set_masks(row, stored)
+                    self.id_to_row[doc["id"]] = row
+                    self.count = row + 1
+                else:
+                    self._matrix[row] = vector
+                    self.documents[row] = stored
+                    self._set_masks(row, stored)
+                f.write(json.dumps({"row": row, "document": stored}, default=str) + "\n")
+                ids.append(doc["id"])
+
+        self._matrix.flush()
+        self._write_meta()
+        return ids
+
+    def _write_meta(self):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dimension": self.dimension, "count": self.count, "capacity": self.capacity}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    async def similarity_search(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        similarity_threshold: float = 0.0,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k cosine similarity search, optionally filtered by category/difficulty_level"""
+        try:
+            if not self.count or not query_embedding:
+                return []
+            return await asyncio.to_thread(self.search, query_embedding, limit, similarity_threshold, filter)
+
+        except Exception as e:
+            logger.error(f"Error searching vector store: {e}")
+            return []
+
+    def search(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        similarity_threshold: float = 0.0,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Synchronous search (runs on a worker thread from `similarity_search`)"""
+        start = datetime.now()
+        count, matrix = self.count, self._matrix
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != self.dimension:
+            return []
+        query /= norm
+
+        rows = None
+        if filter:
+            mask = np.ones(count, dtype=bool)
+            for field, value in filter.items():
+                field_mask = self.masks.get((field, value))
+                if field_mask is None:
+                    return []
+                mask &= field_mask[:count]
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return []
+
+        scores = matrix[:count] @ query if rows is None else matrix[rows] @ query
+
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            score = float(scores[i])
+            if score < similarity_threshold:
+                break
+            row = int(i) if rows is None else int(rows[i])
+            results.append({**self.documents[row], "similarity_score": score})
+
+        self.stats["searches"] += 1
+        self.stats["last_search_ms"] = round((datetime.now() - start).total_seconds() * 1000, 2)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "documents": self.count,
+            "capacity": self.capacity,
+            "dimension": self.dimension,
+            "filters": len(self.masks)
+        }
+
+    def close(self):
+        """Flush pending writes to disk"""
+        if self._matrix is not None:
+            self._matrix.flush()
@@ -0,0 +1,98 @@
+"""
+WebSocket Backplane - Cross-instance delivery for WebSocket messages
+Part of the EAILI5 backend services
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, Any, Optional, Callable, Awaitable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBackplane:
+    """
+    Redis pub/sub backplane for WebSocketService. Every instance publishes
+    topic and per-user messages to `<prefix>:<channel>` and pattern-subscribes
+    to `<prefix>:*`, handing each message to the local WebSocketService, which
+    delivers it to the sockets attached to this instance.
+
+    Channels:
+        topic:<topic>   subscribers of a topic
+        all             every connection
+        user:<user_id>  one user's connection, wherever it lives
+
+    Pub/sub is at-most-once: messages published while an instance is
+    reconnecting are not replayed to it.
+    """
+
+    def __init__(self, redis_client, prefix: str = None):
+        self.redis_client = redis_client
+        self.prefix = prefix or os.getenv("WS_BACKPLANE_PREFIX", "ws")
+        self.handler: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.stats = {"published": 0, "publish_errors": 0, "received": 0, "reconnects": 0}
+
+    async def start(self, handler: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+        """Start listening; `handler(channel, envelope)` is called for every message"""
+        self.handler = handler
+        self._task = asyncio.create_task(self._listen())
+        logger.info(f"Redis WebSocket backplane started on {self.prefix}:*")
+
+    async def publish(self, channel: str, envelope: Dict[str, Any]) -> bool:
+        """Publish to all instances (including this one)"""
+        try:
+            await self.redis_client.publish(f"{self.prefix}:{channel}", json.dumps(envelope))
+            self.stats["published"] += 1
+            return True
+        except Exception as e:
+            self.stats["publish_errors"] += 1
+            logger.warning(f"Backplane publish to {channel} failed: {e}")
+            return False
+
+    async def _listen(self):
+        retry_delay = 1
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}:*")
+                self.connected = True
+                retry_delay = 1
+                while True:
+                    # Polling with a timeout keeps the read under the client's socket_timeout
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if not message or message["type"] != "pmessage":
+                        continue
+                    self.stats["received"] += 1
+                    channel = message["channel"][len(self.prefix) + 1:]
+                    try:
+                        await self.handler(channel, json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"Error handling backplane message on {channel}: {e}")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connected = False
+                self.stats["reconnects"] += 1
+                logger.warning(f"Backplane subscription lost, retrying in {retry_delay}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30)
+            finally:
+                self.connected = False
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "backend": "redis", "connected": self.connected}
@@ -4,14 +4,108 @@ Part of the DeCrypt backend services
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
+import time
+import uuid
+from collections import deque
 from typing import Dict, List, Set, Any, Optional
 from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
 
 logger = logging.getLogger(__name__)
 
+BACKPRESSURE_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue plus a writer task for one WebSocket, so a slow
+    client only ever delays its own messages.
+
+    When the queue is full the backpressure policy decides what happens:
+        drop_oldest  discard the oldest queued message
+        coalesce     replace a queued message with the same coalesce key
+                     (e.g. the previous token list), else drop the oldest
+        disconnect   close the connection as a slow consumer
+    """
+
+    def __init__(self, websocket: WebSocket, on_close, max_queue: int, policy: str, send_timeout: float):
+        self.websocket = websocket
+        self.on_close = on_close
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+
+        self.queue: deque = deque()  # (coalesce_key, payload, enqueued_at)
+        self.closed = False
+        self._ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "max_depth": 0}
+        self.latencies: deque = deque(maxlen=256)  # enqueue -> sent, seconds
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def enqueue(self, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a serialized message without waiting for the client"""
+        if self.closed:
+            return False
+
+        if coalesce_key is not None and self.policy == "coalesce":
+            for i, (key, _, enqueued_at) in enumerate(self.queue):
+                if key == coalesce_key:
+                    # Keep the original position (and age) so updates are not starved
+                    self.queue[i] = (key, payload, enqueued_at)
+                    self.stats["coalesced"] += 1
+                    return True
+
+        if len(self.queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                logger.warning("Disconnecting slow WebSocket consumer (send queue full)")
+                self.close()
+                asyncio.create_task(self.on_close(self.websocket, slow_consumer=True))
+                return False
+            self.queue.popleft()
+            self.stats["dropped"] += 1
+
+        self.queue.append((coalesce_key, payload, time.perf_counter()))
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self.queue))
+        self._ready.set()
+        return True
+
+    async def _run(self):
+        while not self.closed:
+            if not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            _, payload, enqueued_at = self.queue.popleft()
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await self.websocket.send_text(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"WebSocket send failed, closing connection: {e}")
+                self.close()
+                await self.on_close(self.websocket, slow_consumer=isinstance(e, asyncio.TimeoutError))
+                return
+
+            self.stats["sent"] += 1
+            self.latencies.append(time.perf_counter() - enqueued_at)
+
+    def close(self):
+        """Stop the writer; queued messages are discarded"""
+        self.closed = True
+        self.queue.clear()
+        self._ready.set()
+        if self.task and self.task is not asyncio.current_task():
+            self.task.cancel()
+
 class WebSocketService:
     """
     Service for managing WebSocket connections and real-time updates
@@ -27,6 +121,38 @@ class WebSocketService:
             "chat": set(),
             "education": set()
         }
+        
+        # Broadcasts go through per-connection queues drained by writer tasks
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.send_queue_size = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+        self.send_timeout = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+        self.backpressure_policy = os.getenv("WS_BACKPRESSURE_POLICY", "coalesce")
+        if self.backpressure_policy not in BACKPRESSURE_POLICIES:
+            logger.warning(f"Unknown WS_BACKPRESSURE_POLICY {self.backpressure_policy!r}, using coalesce")
+            self.backpressure_policy = "coalesce"
+        self.broadcast_stats = {"broadcasts": 0, "slow_consumers_disconnected": 0, "last_fanout_ms": None}
+        self.retired_stats = {"sent": 0, "dropped": 0, "coalesced": 0}
+        
+        # Optional cross-instance backplane (see initialize)
+        self.backplane = None
+        self._seen_message_ids: deque = deque(maxlen=4096)
+        self._seen_message_set: Set[str] = set()
+    
+    async def initialize(self, backplane=None):
+        """
+        Attach a backplane so broadcasts and per-user messages reach clients
+        on every instance. A backplane provides `start(handler)`,
+        `publish(channel, envelope) -> bool`, `stop()` and `get_stats()`;
+        see RedisBackplane. Without one, delivery stays in-process.
+        """
+        try:
+            self.backplane = backplane
+            if backplane:
+                await backplane.start(self._on_backplane_message)
+            logger.info(f"WebSocket service initialized ({'with' if backplane else 'without'} backplane)")
+        except Exception as e:
+            logger.error(f"Error initializing WebSocket backplane: {e}")
+            self.backplane = None
     
     async def connect(self, websocket: WebSocket, user_id: str, connection_type: str = "general"):
         """Accept a new WebSocket connection"""
@@ -45,6 +171,13 @@ class WebSocketService:
                 "last_activity": datetime.now().isoformat()
             }
             
+            sender = ConnectionSender(
+                websocket, self._on_sender_closed, self.send_queue_size,
+                self.backpressure_policy, self.send_timeout
+            )
+            self.senders[websocket] = sender
+            sender.start()
+            
             logger.info(f"User {user_id} connected via WebSocket ({connection_type})")
             return True
             
@@ -72,6 +205,8 @@ class WebSocketService:
             if websocket in self.connection_metadata:
                 del self.connection_metadata[websocket]
             
+            self._retire_sender(websocket)
+            
             logger.info(f"User {user_id} disconnected from WebSocket")
             
         except Exception as e:
@@ -88,20 +223,32 @@ class WebSocketService:
             return False
     
     async def send_to_user(self, user_id: str, message: Dict[str, Any]):
-        """Send a message to a specific user"""
+        """Send a message to a specific user, routing via the backplane if they are on another instance"""
         try:
             if user_id in self.user_connections:
                 websocket = self.user_connections[user_id]
                 return await self.send_personal_message(websocket, message)
+            if self.backplane:
+                return await self.backplane.publish(f"user:{user_id}", self._envelope(json.dumps(message)))
             return False
             
         except Exception as e:
             logger.error(f"Error sending message to user: {e}")
             return False
     
-    async def broadcast(self, message: Dict[str, Any], topic: Optional[str] = None):
-        """Broadcast a message to all connections or specific topic subscribers"""
+    async def broadcast(self, message: Dict[str, Any], topic: Optional[str] = None, coalesce_key: Optional[str] = None,
+                        message_id: Optional[str] = None):
+        """
+        Broadcast a message to all connections or specific topic subscribers
+        
+        The message is serialized once and queued on every connection; writer
+        tasks deliver it concurrently. Messages sharing a `coalesce_key` may
+        replace each other in a backed-up queue (latest wins). A deterministic
+        `message_id` lets the backplane drop the same update published by
+        several instances.
+        """
         try:
+            start = time.perf_counter()
             if topic and topic in self.subscriptions:
                 # Send to topic subscribers
                 connections = self.subscriptions[topic]
@@ -110,25 +257,55 @@ class WebSocketService:
                 connections = self.active_connections
             
             message_str = json.dumps(message)
-            disconnected = []
             
-            for connection in connections:
-                try:
-                    await connection.send_text(message_str)
-                except:
-                    # Mark for removal
-                    disconnected.append(connection)
+            if self.backplane:
+                # Every instance (this one included) delivers it to its own sockets
+                channel = f"topic:{topic}" if topic and topic in self.subscriptions else "all"
+                if await self.backplane.publish(channel, self._envelope(message_str, coalesce_key, message_id)):
+                    self.broadcast_stats["broadcasts"] += 1
+                    return True
+                logger.warning("Backplane unavailable, broadcasting to local connections only")
             
-            # Remove disconnected connections
-            for connection in disconnected:
-                await self._cleanup_connection(connection)
+            self._fan_out(connections, message_str, coalesce_key)
             
+            self.broadcast_stats["broadcasts"] += 1
+            self.broadcast_stats["last_fanout_ms"] = round((time.perf_counter() - start) * 1000, 3)
             return True
             
         except Exception as e:
             logger.error(f"Error broadcasting message: {e}")
             return False
     
+    def _fan_out(self, connections, message_str: str, coalesce_key: Optional[str] = None):
+        for connection in list(connections):
+            sender = self.senders.get(connection)
+            if sender:
+                sender.enqueue(message_str, coalesce_key)
+    
+    @staticmethod
+    def _envelope(message_str: str, coalesce_key: Optional[str] = None, message_id: Optional[str] = None) -> Dict[str, Any]:
+        return {"id": message_id or uuid.uuid4().hex, "payload": message_str, "coalesce_key": coalesce_key}
+    
+    async def _on_backplane_message(self, channel: str, envelope: Dict[str, Any]):
+        """Deliver a backplane message to this instance's sockets, at most once"""
+        message_id = envelope.get("id")
+        if message_id in self._seen_message_set:
+            return
+        if len(self._seen_message_ids) == self._seen_message_ids.maxlen:
+            self._seen_message_set.discard(self._seen_message_ids[0])
+        self._seen_message_ids.append(message_id)
+        self._seen_message_set.add(message_id)
+        
+        payload, coalesce_key = envelope["payload"], envelope.get("coalesce_key")
+        if channel.startswith("topic:"):
+            self._fan_out(self.subscriptions.get(channel[len("topic:"):], ()), payload, coalesce_key)
+        elif channel == "all":
+            self._fan_out(self.active_connections, payload, coalesce_key)
+        elif channel.startswith("user:"):
+            websocket = self.user_connections.get(channel[len("user:"):])
+            if websocket:
+                self._fan_out([websocket], payload)
+    
     async def subscribe_to_topic(self, websocket: WebSocket, topic: str):
         """Subscribe a connection to a specific topic"""
         try:
@@ -155,6 +332,24 @@ class WebSocketService:
             logger.error(f"Error unsubscribing from topic: {e}")
             return False
     
+    def _retire_sender(self, websocket: WebSocket):
+        """Stop a connection's writer, keeping its counters in the totals"""
+        sender = self.senders.pop(websocket, None)
+        if sender:
+            sender.close()
+            for key in ("sent", "dropped", "coalesced"):
+                self.retired_stats[key] += sender.stats[key]
+    
+    async def _on_sender_closed(self, websocket: WebSocket, slow_consumer: bool = False):
+        """Writer task gave up on a connection (send failed, timed out or queue overflowed)"""
+        if slow_consumer:
+            self.broadcast_stats["slow_consumers_disconnected"] += 1
+            try:
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+        await self._cleanup_connection(websocket)
+    
     async def _cleanup_connection(self, websocket: WebSocket):
         """Clean up a disconnected WebSocket connection"""
         try:
@@ -181,6 +376,8 @@ class WebSocketService:
             if websocket in self.connection_metadata:
                 del self.connection_metadata[websocket]
             
+            self._retire_sender(websocket)
+            
         except Exception as e:
             logger.error(f"Error cleaning up connection: {e}")
     
@@ -203,13 +400,49 @@ class WebSocketService:
                         meta["connection_type"] 
                         for meta in self.connection_metadata.values()
                     )
-                }
+                },
+                "send_queues": self.get_send_stats()
             }
             
         except Exception as e:
             logger.error(f"Error getting connection stats: {e}")
             return {}
     
+    def get_send_stats(self) -> Dict[str, Any]:
+        """Queue depth, drop and send-latency metrics across all connections"""
+        senders = list(self.senders.values())
+        depths = [len(sender.queue) for sender in senders]
+        latencies = sorted(latency for sender in senders for latency in sender.latencies)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+        
+        return {
+            **self.broadcast_stats,
+            "policy": self.backpressure_policy,
+            "max_queue_size": self.send_queue_size,
+            "connections": len(senders),
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "sent": self.retired_stats["sent"] + sum(sender.stats["sent"] for sender in senders),
+            "dropped": self.retired_stats["dropped"] + sum(sender.stats["dropped"] for sender in senders),
+            "coalesced": self.retired_stats["coalesced"] + sum(sender.stats["coalesced"] for sender in senders),
+            "send_latency_p50_ms": percentile(0.5),
+            "send_latency_p99_ms": percentile(0.99),
+            "backplane": self.backplane.get_stats() if self.backplane else None
+        }
+    
+    async def close(self):
+        """Stop the backplane and all writer tasks"""
+        if self.backplane:
+            await self.backplane.stop()
+        tasks = [sender.task for sender in self.senders.values() if sender.task]
+        for websocket in list(self.senders):
+            self._retire_sender(websocket)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
     async def send_token_update(self, token_data: Dict[str, Any]):
         """Send real-time token data update"""
         try:
@@ -219,7 +452,12 @@ class WebSocketService:
                 "timestamp": datetime.now().isoformat()
             }
             
-            return await self.broadcast(message, "tokens")
+            # A newer list for the same category supersedes a queued one. The id
+            # hashes the data (not the timestamp), so instances publishing the
+            # same list are delivered once
+            digest = hashlib.sha1(json.dumps(token_data, sort_keys=True, default=str).encode()).hexdigest()
+            return await self.broadcast(message, "tokens", coalesce_key=f"token_update:{token_data.get('category')}",
+                                        message_id=f"token_update:{digest}")
             
         except Exception as e:
             logger.error(f"Error sending token update: {e}")
@@ -11,7 +11,7 @@ from fastapi.testclient import TestClient
 from agents.coordinator import CoordinatorAgent
 from agents.educator_agent import EducatorAgent
 from agents.research_agent import ResearchAgent
-from agents.portfolio_agent import PortfolioAgent
+from agents.portfolio_agent import PortfolioAdvisorAgent
 from agents.trading_strategy_agent import TradingStrategyAgent
 from agents.web_search_agent import WebSearchAgent
 from agents.enhanced_langgraph_orchestrator import EnhancedLangGraphOrchestrator
@@ -53,7 +53,7 @@ class TestCoordinatorAgent:
     @pytest.mark.asyncio
     async def test_coordinator_routing_portfolio(self, coordinator):
         """Test coordinator routes portfolio questions to portfolio agent"""
-        with patch('agents.portfolio_agent.PortfolioAgent.process') as mock_portfolio:
+        with patch('agents.portfolio_agent.PortfolioAdvisorAgent.process') as mock_portfolio:
             mock_portfolio.return_value = "Portfolio analysis"
             
             result = await coordinator.route_message("Analyze my portfolio", "user123")
@@ -61,6 +61,53 @@ class TestCoordinatorAgent:
             assert "Portfolio analysis" in result
             mock_portfolio.assert_called_once()
 
+class TestComprehensiveTokenAnalysis:
+    """Test concurrent fan-out for comprehensive token analysis"""
+    
+    @pytest.fixture
+    def coordinator(self):
+        coordinator = CoordinatorAgent()
+        
+        async def slow_response(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return "stage result"
+        
+        for agent in (coordinator.research_agent, coordinator.web_search_agent,
+                      coordinator.social_sentiment_agent, coordinator.trading_strategy_agent):
+            agent.process = AsyncMock(side_effect=slow_response)
+        coordinator.educator_agent.process = AsyncMock(return_value="final analysis")
+        return coordinator
+    
+    @pytest.mark.asyncio
+    async def test_stages_run_concurrently(self, coordinator):
+        """Test independent stages overlap instead of adding up"""
+        start = asyncio.get_event_loop().time()
+        result = await coordinator.analyze_token_comprehensive(
+            "Analyze this token", "user123", 0, {"token_data": {"symbol": "AERO"}}
+        )
+        elapsed = asyncio.get_event_loop().time() - start
+        
+        assert result == "final analysis"
+        assert elapsed < 0.3  # sequential execution would take 0.4s+
+        coordinator.educator_agent.process.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_stage_timeout_degrades_to_partial_result(self, coordinator):
+        """Test a slow stage times out and the synthesis still runs"""
+        coordinator.stage_timeouts["web_search"] = 0.01
+        
+        events = [event async for event in coordinator.analyze_token_comprehensive_stream(
+            "Analyze this token", "user123", 0, {"token_data": {"symbol": "AERO"}}
+        )]
+        
+        states = {event["stage"]: event["state"] for event in events
+                  if event["type"] == "status" and event.get("state") != "started"}
+        assert states["web_search"] == "timeout"
+        assert states["research"] == "completed"
+        assert events[-1] == {"type": "result", "content": "final analysis"}
+        synthesis_context = coordinator.educator_agent.process.call_args.kwargs["context"]
+        assert "couldn't find recent news" in synthesis_context["web_research"]
+
 class TestEducatorAgent:
     """Test educator agent functionality"""
     
@@ -139,7 +186,7 @@ class TestPortfolioAgent:
     
     @pytest.fixture
     def portfolio_agent(self):
-        return PortfolioAgent()
+        return PortfolioAdvisorAgent()
     
     @pytest.mark.asyncio
     async def test_portfolio_agent_simulation(self, portfolio_agent):
@@ -236,6 +283,145 @@ class TestEnhancedLangGraphOrchestrator:
             assert len(chunks) > 0
             assert "Status" in chunks[0] or "Thinking" in chunks[0]
 
+class TestParallelSpecialists:
+    """Test concurrent specialist execution in the orchestrator"""
+    
+    @pytest.fixture
+    def orchestrator(self):
+        orchestrator = EnhancedLangGraphOrchestrator(None, None)
+        self.running = 0
+        self.peak = 0
+        
+        async def slow_process(*args, **kwargs):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.05)
+            self.running -= 1
+            return "agent response"
+        
+        for name in ("research", "web_search", "social_sentiment", "trading_strategy"):
+            agent = MagicMock()
+            agent.process = AsyncMock(side_effect=slow_process)
+            orchestrator.agents[name] = agent
+        return orchestrator
+    
+    def _state(self, **context):
+        return {
+            "user_id": "user123",
+            "messages": [{"content": "Analyze AERO"}],
+            "context": context,
+            "tool_results": [],
+            "user_profile": {},
+            "learning_level": 0,
+            "required_agents": ["research", "web_search", "social_sentiment", "trading_strategy"],
+            "completed_agents": [],
+            "agent_responses": {},
+            "current_agent": None
+        }
+    
+    def test_routes_to_parallel_node(self, orchestrator):
+        """Test multiple pending agents route to the fan-out node"""
+        assert orchestrator._enhanced_route_to_agents(self._state()) == "parallel_specialists"
+    
+    @pytest.mark.asyncio
+    async def test_responses_merged_in_required_order(self, orchestrator):
+        """Test all branches run and their results merge into the shared state"""
+        state = await orchestrator._parallel_specialists_node(self._state())
+        
+        assert state["completed_agents"] == ["research", "web_search", "social_sentiment", "trading_strategy"]
+        assert set(state["agent_responses"]) == set(state["completed_agents"])
+        assert self.peak == 4
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_per_request(self, orchestrator):
+        """Test the per-request cap limits concurrent branches"""
+        state = await orchestrator._parallel_specialists_node(self._state(max_agent_concurrency=2))
+        
+        assert len(state["completed_agents"]) == 4
+        assert self.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_branch_does_not_drop_others(self, orchestrator):
+        """Test a specialist that raises is skipped while the other branches merge"""
+        orchestrator.agents["web_search"].process = AsyncMock(side_effect=RuntimeError("upstream down"))
+        
+        state = await orchestrator._parallel_specialists_node(self._state())
+        
+        assert "web_search" not in state["agent_responses"]
+        assert {"research", "social_sentiment", "trading_strategy"} <= set(state["agent_responses"])
+
+class TestAnswerCacheStreaming:
+    """Test cached answers are replayed through the chat stream protocol"""
+    
+    @pytest.fixture
+    def orchestrator(self):
+        store = {}
+        redis_service = MagicMock()
+        redis_service.get_cached_ai_response = AsyncMock(side_effect=lambda key: store.get(key))
+        redis_service.cache_ai_response = AsyncMock(side_effect=lambda key, value: store.__setitem__(key, value) or True)
+        orchestrator = EnhancedLangGraphOrchestrator(None, redis_service)
+        
+        self.intent = "education"
+        coordinator = MagicMock()
+        coordinator.analyze_intent = AsyncMock(side_effect=lambda *args: self.intent)
+        coordinator._generate_suggestions = AsyncMock(return_value=["What is a wallet?"])
+        
+        self.calls = 0
+        
+        async def process_stream(**kwargs):
+            self.calls += 1
+            yield {"type": "chunk", "content": "A blockchain is "}
+            yield {"type": "chunk", "content": "a shared ledger."}
+            yield {"type": "done", "content": ""}
+        
+        educator = MagicMock()
+        educator.process_stream = process_stream
+        orchestrator.agents = {"coordinator": coordinator, "educator": educator, "web_search": educator}
+        return orchestrator
+    
+    async def _run(self, orchestrator, message, learning_level=0):
+        return [event async for event in orchestrator.process_message_stream(message, "user123", learning_level=learning_level)]
+    
+    @pytest.mark.asyncio
+    async def test_repeat_question_is_replayed(self, orchestrator):
+        """Test a normalized repeat skips the agent and keeps the chunk/complete protocol"""
+        await self._run(orchestrator, "What is a blockchain?")
+        events = await self._run(orchestrator, "what is a   BLOCKCHAIN")
+        
+        assert self.calls == 1
+        assert [e["type"] for e in events if e["type"] != "status"] == ["chunk", "complete"]
+        assert events[-2]["content"] == "A blockchain is a shared ledger."
+        assert events[-1]["cached"] is True
+        assert events[-1]["suggestions"] == ["What is a wallet?"]
+        assert orchestrator.answer_cache.get_stats()["hit_rate"] == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_level_bucket_and_time_sensitive_intents_miss(self, orchestrator):
+        """Test other learning-level buckets and web_search never reuse answers"""
+        await self._run(orchestrator, "What is a blockchain?")
+        await self._run(orchestrator, "What is a blockchain?", learning_level=60)
+        
+        self.intent = "web_search"
+        await self._run(orchestrator, "latest base news")
+        await self._run(orchestrator, "latest base news")
+        
+        assert self.calls == 4
+        assert orchestrator.answer_cache.get_stats()["skipped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_errored_stream_is_not_cached(self, orchestrator):
+        """Test an answer whose stream reported an error is not stored for replay"""
+        async def failing_stream(**kwargs):
+            self.calls += 1
+            yield {"type": "chunk", "content": "A blockchain is "}
+            yield {"type": "error", "content": "model unavailable"}
+        
+        orchestrator.agents["educator"].process_stream = failing_stream
+        await self._run(orchestrator, "What is a blockchain?")
+        await self._run(orchestrator, "What is a blockchain?")
+        
+        assert self.calls == 2
+
 class TestAgentIntegration:
     """Test agent integration and communication"""
     
@@ -4,8 +4,12 @@ Test suite for EAILI5 backend services
 
 import pytest
 import asyncio
+import os
+import time
 from unittest.mock import AsyncMock, patch, MagicMock
 import json
+import numpy as np
+from datetime import datetime, timedelta
 
 # Import services
 from services.openai_service import OpenAIService
@@ -15,7 +19,30 @@ from services.session_service import SessionService
 from services.redis_service import RedisService
 from services.bitquery_service import BitqueryService
 from services.tavily_service import TavilyService
+from services.coingecko_service import CoinGeckoService
 from services.websocket_service import WebSocketService
+from services.chat_generation_manager import ChatGenerationManager
+from services.stream_coalescer import StreamCoalescer
+from services.http_client import HTTPClientPool
+from services.rate_limiter import RateLimiter, parse_retry_after
+from services.single_flight import SingleFlight
+from services.token_refresh_service import TokenRefreshService
+from services.token_index import BaseTokenIndex
+from blockchain.rpc_executor import ThreadedWeb3
+from services.dex_price_service import DexPriceService
+from agents.memory.episodic_memory import EpisodicMemory
+from agents.rag_pipeline import RAGPipeline
+from services.vector_store import LocalVectorStore
+from services.embedding_cache import EmbeddingCache
+from services.answer_cache import SemanticAnswerCache
+from services.analytics_service import AnalyticsService
+from services.analytics_events import AnalyticsEventRecorder, analytics_events
+from services.progress_tracking_service import ProgressTrackingService
+from services.sentiment_service import SentimentService
+from services.reddit_client import ThreadedRedditClient
+from services.sentiment_scorer import SentimentScorer
+from services.sentiment_timeseries import SentimentTimeSeriesStore, SentimentSnapshotCollector
+from services.sentiment_anomaly import SentimentAnomalyDetector
 
 class TestOpenAIService:
     """Test OpenAI service functionality"""
@@ -392,6 +419,2066 @@ class TestWebSocketService:
             assert result == "Response"
             mock_process.assert_called_once_with("test message", "user123")
 
+class _FakeWebSocket:
+    """WebSocket stand-in that records sent frames, optionally slowly"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_code = None
+        self.accept = AsyncMock()
+    
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+    
+    async def close(self, code=1000):
+        self.closed_code = code
+
+class TestWebSocketSendQueues:
+    """Test per-connection send queues behind WebSocketService.broadcast"""
+    
+    async def _connect(self, service, websocket, user_id):
+        await service.connect(websocket, user_id, "tokens")
+        await service.subscribe_to_topic(websocket, "tokens")
+    
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_stall_others(self):
+        """Test a fast subscriber gets updates while a slow one is still sending"""
+        service = WebSocketService()
+        fast, slow = _FakeWebSocket(), _FakeWebSocket(delay=0.5)
+        await self._connect(service, fast, "fast")
+        await self._connect(service, slow, "slow")
+        
+        start = time.perf_counter()
+        for i in range(3):
+            await service.broadcast({"type": "tick", "n": i}, "tokens")
+        assert time.perf_counter() - start < 0.05
+        
+        await asyncio.sleep(0.05)
+        assert [m["n"] for m in fast.sent] == [0, 1, 2]
+        assert slow.sent == []
+        assert service.get_send_stats()["queued_messages"] == 2
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_coalesce_keeps_latest(self):
+        """Test queued token lists for the same category are replaced by newer ones"""
+        service = WebSocketService()
+        service.backpressure_policy = "coalesce"
+        slow = _FakeWebSocket(delay=0.05)
+        await self._connect(service, slow, "slow")
+        
+        await service.send_token_update({"category": "trending", "tokens": [1]})
+        await asyncio.sleep(0)  # writer picks up the first update
+        for version in (2, 3, 4):
+            await service.send_token_update({"category": "trending", "tokens": [version]})
+        await service.send_token_update({"category": "new", "tokens": [9]})
+        await asyncio.sleep(0.2)
+        
+        assert [m["data"]["tokens"] for m in slow.sent] == [[1], [4], [9]]
+        assert service.get_send_stats()["coalesced"] == 2
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_backpressure_policies(self):
+        """Test drop_oldest bounds the queue and disconnect removes the slow consumer"""
+        service = WebSocketService()
+        service.send_queue_size = 2
+        service.backpressure_policy = "drop_oldest"
+        dropping = _FakeWebSocket(delay=1)
+        await self._connect(service, dropping, "dropping")
+        service.backpressure_policy = "disconnect"
+        slow = _FakeWebSocket(delay=1)
+        await self._connect(service, slow, "slow")
+        await asyncio.sleep(0)
+        
+        for i in range(5):
+            await service.broadcast({"type": "tick", "n": i}, "tokens")
+        await asyncio.sleep(0.01)
+        
+        # 0-2 were dropped, 3 is in flight and only 4 is still queued
+        assert [payload for _, payload, _ in service.senders[dropping].queue] == [json.dumps({"type": "tick", "n": 4})]
+        assert slow not in service.senders
+        assert slow not in service.subscriptions["tokens"]
+        assert slow.closed_code == 1013
+        stats = service.get_send_stats()
+        assert stats["dropped"] == 3
+        assert stats["slow_consumers_disconnected"] == 1
+        await service.close()
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_fanout_benchmark(self):
+        """Benchmark: broadcast to 1000 subscribers with 1% slow clients"""
+        service = WebSocketService()
+        clients = [_FakeWebSocket(delay=1 if i % 100 == 0 else 0.001) for i in range(1000)]
+        for i, client in enumerate(clients):
+            await self._connect(service, client, f"user{i}")
+        
+        start = time.perf_counter()
+        for i in range(20):
+            await service.broadcast({"type": "tick", "n": i}, "tokens")
+        fanout = time.perf_counter() - start
+        fast = [c for c in clients if c.delay < 1]
+        while any(len(c.sent) < 20 for c in fast) and time.perf_counter() - start < 5:
+            await asyncio.sleep(0.01)
+        delivered = time.perf_counter() - start
+        
+        print(f"\n20 broadcasts x 1000 subscribers: {fanout * 1000:.1f}ms to enqueue, "
+              f"{delivered * 1000:.0f}ms until all fast clients had every message, stats {service.get_send_stats()}")
+        assert all(len(c.sent) == 20 for c in fast)
+        assert all(len(c.sent) <= 1 for c in clients if c.delay >= 1)
+        await service.close()
+
+class _MemoryBus:
+    """In-process pub/sub standing in for Redis between service instances"""
+    
+    def __init__(self):
+        self.handlers = []
+    
+    def backplane(self):
+        bus = self
+        
+        class _Backplane:
+            async def start(self, handler):
+                bus.handlers.append(handler)
+            
+            async def publish(self, channel, envelope):
+                for handler in bus.handlers:
+                    await handler(channel, json.loads(json.dumps(envelope)))
+                return True
+            
+            async def stop(self):
+                pass
+            
+            def get_stats(self):
+                return {}
+        
+        return _Backplane()
+
+class TestWebSocketBackplane:
+    """Test cross-instance delivery through a WebSocket backplane"""
+    
+    async def _instances(self, count):
+        bus = _MemoryBus()
+        services = []
+        for _ in range(count):
+            service = WebSocketService()
+            await service.initialize(bus.backplane())
+            services.append(service)
+        return services
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_and_user_messages_cross_instances(self):
+        """Test topic and per-user messages reach sockets on other instances exactly once"""
+        instance_a, instance_b = await self._instances(2)
+        local, remote = _FakeWebSocket(), _FakeWebSocket()
+        await instance_a.connect(local, "alice", "tokens")
+        await instance_a.subscribe_to_topic(local, "tokens")
+        await instance_b.connect(remote, "bob", "portfolio")
+        await instance_b.subscribe_to_topic(remote, "tokens")
+        
+        await instance_a.send_token_update({"category": "trending", "tokens": []})
+        assert await instance_a.send_portfolio_update("bob", {"total_value": 10})
+        await asyncio.sleep(0.01)
+        
+        assert [m["type"] for m in local.sent] == ["token_update"]
+        assert [m["type"] for m in remote.sent] == ["token_update", "portfolio_update"]
+        for service in (instance_a, instance_b):
+            await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_envelopes_delivered_once(self):
+        """Test an instance drops a message it has already delivered"""
+        service, = await self._instances(1)
+        client = _FakeWebSocket()
+        await service.connect(client, "alice", "tokens")
+        await service.subscribe_to_topic(client, "tokens")
+        
+        envelope = service._envelope(json.dumps({"type": "tick"}))
+        await service._on_backplane_message("topic:tokens", envelope)
+        await service._on_backplane_message("topic:tokens", envelope)
+        await asyncio.sleep(0.01)
+        
+        assert client.sent == [{"type": "tick"}]
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_same_token_update_from_every_replica_delivered_once(self):
+        """Test replicas publishing the same refreshed list reach each client once"""
+        services = await self._instances(3)
+        client = _FakeWebSocket()
+        await services[0].connect(client, "alice", "tokens")
+        await services[0].subscribe_to_topic(client, "tokens")
+        
+        for service in services:
+            await service.send_token_update({"category": "trending", "tokens": [{"symbol": "AERO"}]})
+        await asyncio.sleep(0.01)
+        await services[1].send_token_update({"category": "trending", "tokens": [{"symbol": "DEGEN"}]})
+        await asyncio.sleep(0.01)
+        
+        assert [m["data"]["tokens"][0]["symbol"] for m in client.sent] == ["AERO", "DEGEN"]
+        for service in services:
+            await service.close()
+    
+
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_redis_backplane(self):
+        """Test two instances exchange messages through a real Redis (REDIS_URL)"""
+        import redis.asyncio as redis
+        from services.websocket_backplane import RedisBackplane
+        
+        client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+        try:
+            await client.ping()
+        except Exception:
+            await client.aclose()
+            pytest.skip("Redis not available")
+        
+        instance_a, instance_b = WebSocketService(), WebSocketService()
+        await instance_a.initialize(RedisBackplane(client, prefix="ws_test"))
+        await instance_b.initialize(RedisBackplane(client, prefix="ws_test"))
+        remote = _FakeWebSocket()
+        await instance_b.connect(remote, "bob", "portfolio")
+        await asyncio.sleep(0.2)  # let both subscriptions register
+        
+        await instance_a.send_to_user("bob", {"type": "portfolio_update"})
+        await instance_a.broadcast({"type": "system_notification"})
+        await asyncio.sleep(0.5)
+        
+        assert [m["type"] for m in remote.sent] == ["portfolio_update", "system_notification"]
+        for service in (instance_a, instance_b):
+            await service.close()
+        await client.aclose()
+
+class _EndlessStream:
+    """OpenAI-style stream that keeps producing tokens until its response is closed"""
+    
+    def __init__(self):
+        self.response = MagicMock()
+        self.response.aclose = AsyncMock()
+        self.tokens = 0
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        await asyncio.sleep(0.01)
+        self.tokens += 1
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = "token "
+        chunk.choices[0].finish_reason = None
+        return chunk
+
+class TestChatGenerations:
+    """Test concurrent, cancellable chat generations"""
+    
+    @pytest.mark.asyncio
+    async def test_in_flight_limit(self):
+        """Test generations run concurrently up to the limit and duplicates are rejected"""
+        manager = ChatGenerationManager(max_in_flight=2)
+        release = asyncio.Event()
+        
+        assert manager.start("m1", release.wait())
+        assert not manager.start("m1", release.wait())
+        assert manager.start("m2", release.wait())
+        assert not manager.start("m3", release.wait())
+        assert manager.in_flight() == 2
+        
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert manager.in_flight() == 0
+        assert manager.stats == {"started": 2, "completed": 2, "cancelled": 0, "rejected": 2}
+    
+    @pytest.mark.asyncio
+    async def test_cancel_closes_upstream_stream(self):
+        """Test cancelling by messageId stops the generation and closes the OpenAI response"""
+        service = OpenAIService()
+        stream = _EndlessStream()
+        service.client = MagicMock()
+        service.client.chat.completions.create = AsyncMock(return_value=stream)
+        received = []
+        
+        async def generate():
+            async for chunk in service.generate_response_stream([{"role": "user", "content": "hi"}]):
+                received.append(chunk)
+        
+        manager = ChatGenerationManager()
+        manager.start("m1", generate())
+        await asyncio.sleep(0.05)
+        
+        assert manager.cancel("m1")
+        tokens_at_cancel = stream.tokens
+        await asyncio.sleep(0.05)
+        
+        assert received and stream.tokens == tokens_at_cancel
+        stream.response.aclose.assert_awaited_once()
+        assert manager.in_flight() == 0
+        assert manager.stats["cancelled"] == 1
+        assert not manager.cancel("m1")
+    
+    @pytest.mark.asyncio
+    async def test_cancel_returns_before_generation_unwinds(self):
+        """Test cancel does not wait on a slow unwind and acknowledges once it finishes"""
+        unwound = asyncio.Event()
+        sent = []
+        
+        async def generate():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                await asyncio.sleep(0.1)  # e.g. closing the upstream stream
+                unwound.set()
+        
+        async def acknowledge():
+            sent.append(unwound.is_set())
+        
+        manager = ChatGenerationManager()
+        manager.start("m1", generate())
+        await asyncio.sleep(0)
+        
+        assert manager.cancel("m1", acknowledge)
+        assert sent == [] and manager.in_flight() == 1
+        await asyncio.wait_for(unwound.wait(), 1)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        
+        assert sent == [True]
+        assert manager.in_flight() == 0
+
+async def _token_stream(tokens, delay=0.0, status_at=None):
+    """Orchestrator-style event stream: status, chunks, complete"""
+    yield {"type": "status", "agent": "educator", "message": "Thinking..."}
+    for i, token in enumerate(tokens):
+        if i == status_at:
+            yield {"type": "status", "agent": "educator", "message": "Still thinking..."}
+        await asyncio.sleep(delay)
+        yield {"type": "chunk", "content": token}
+    yield {"type": "complete", "suggestions": []}
+
+class TestStreamCoalescer:
+    """Test chunk coalescing for streamed chat output"""
+    
+    async def _collect(self, coalescer, events, window_ms=None):
+        return [event async for event in coalescer.coalesce(events, window_ms)]
+    
+    @pytest.mark.asyncio
+    async def test_merges_chunks_and_keeps_event_order(self):
+        """Test chunks merge between status/complete events without reordering"""
+        coalescer = StreamCoalescer(window_ms=50)
+        
+        frames = await self._collect(coalescer, _token_stream(["a", "b", "c", "d"], status_at=2))
+        
+        assert [(f["type"], f.get("content")) for f in frames] == [
+            ("status", None), ("chunk", "ab"), ("status", None), ("chunk", "cd"), ("complete", None)
+        ]
+        assert coalescer.stats["chunks_in"] == 4
+    
+    @pytest.mark.asyncio
+    async def test_flushes_on_window_and_bytes(self):
+        """Test a stalled stream still flushes after the window, and large buffers flush early"""
+        coalescer = StreamCoalescer(window_ms=20, max_bytes=4)
+        
+        async def stalled():
+            yield {"type": "chunk", "content": "Hel"}
+            await asyncio.sleep(0.1)
+            yield {"type": "chunk", "content": "lo"}
+        
+        start = time.perf_counter()
+        first = None
+        async for frame in coalescer.coalesce(stalled()):
+            first = first or (frame, time.perf_counter() - start)
+        assert first[0]["content"] == "Hel" and first[1] < 0.08
+        
+        frames = await self._collect(coalescer, _token_stream(["ab", "cd", "ef"]))
+        assert [f.get("content") for f in frames] == [None, "abcd", "ef", None]
+    
+    @pytest.mark.asyncio
+    async def test_negotiation(self):
+        """Test clients can disable or tune the window within limits"""
+        coalescer = StreamCoalescer(window_ms=40, max_window_ms=100)
+        
+        assert coalescer.negotiate(None) == 40
+        assert coalescer.negotiate(0) == 0
+        assert coalescer.negotiate(500) == 100
+        assert coalescer.negotiate("bogus") == 40
+        frames = await self._collect(coalescer, _token_stream(["a", "b"]), window_ms=0)
+        assert [f.get("content") for f in frames] == [None, "a", "b", None]
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_coalescing_benchmark(self):
+        """Benchmark: frames/sec and CPU for 50 concurrent 300-token streams, per-token vs 40ms windows"""
+        tokens = [f"tok{i} " for i in range(300)]
+        
+        async def run(window_ms):
+            coalescer = StreamCoalescer(window_ms=window_ms)
+            frames = 0
+            
+            async def client(message_id):
+                nonlocal frames
+                async for event in coalescer.coalesce(_token_stream(tokens, delay=0.002), window_ms):
+                    event["messageId"] = message_id
+                    # What send_json does per frame: encode, then an awaited ASGI send
+                    json.dumps(event).encode("utf-8")
+                    await asyncio.sleep(0)
+                    frames += 1
+            
+            wall, cpu = time.perf_counter(), time.process_time()
+            await asyncio.gather(*(client(f"m{i}") for i in range(50)))
+            return frames, time.perf_counter() - wall, time.process_time() - cpu
+        
+        results = {window: await run(window) for window in (0, 40)}
+        for window, (frames, wall, cpu) in results.items():
+            print(f"\nwindow {window}ms: {frames} frames, {frames / wall:.0f} frames/s, {cpu * 1000:.0f}ms CPU, {wall:.2f}s wall")
+        assert results[40][0] * 5 < results[0][0]
+
+class TestHTTPClientPool:
+    """Test shared HTTP client pool functionality"""
+    
+    @pytest.fixture
+    def client_pool(self):
+        return HTTPClientPool()
+    
+    @pytest.mark.asyncio
+    async def test_client_reused_across_requests(self, client_pool):
+        """Test the same pooled client is reused for a service"""
+        async with client_pool.client("coingecko") as first:
+            pass
+        async with client_pool.client("coingecko") as second:
+            pass
+        
+        assert first is second
+        assert not first.is_closed
+        stats = client_pool.get_pool_stats()["services"]["coingecko"]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["requests"] == 2
+        
+        await client_pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_in_flight_tracking(self, client_pool):
+        """Test in-flight counts are tracked while a client is borrowed"""
+        async with client_pool.client("tavily"):
+            assert client_pool.get_pool_stats()["total_in_flight"] == 1
+        
+        assert client_pool.get_pool_stats()["total_in_flight"] == 0
+        await client_pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_close_releases_clients(self, client_pool):
+        """Test closing the pool closes every client"""
+        await client_pool.initialize()
+        clients = list(client_pool.clients.values())
+        
+        await client_pool.close()
+        
+        assert client_pool.clients == {}
+        assert all(client.is_closed for client in clients)
+
+class TestRateLimiter:
+    """Test shared token-bucket rate limiter"""
+    
+    @pytest.fixture
+    def limiter(self):
+        limiter = RateLimiter()
+        limiter.configure("test_api", calls_per_minute=600, burst=2)  # 10 calls/second
+        return limiter
+    
+    @pytest.mark.asyncio
+    async def test_no_wait_when_bucket_has_tokens(self, limiter):
+        """Test calls within the burst budget are not delayed"""
+        start = time.monotonic()
+        await limiter.acquire("test_api")
+        await limiter.acquire("test_api")
+        
+        assert time.monotonic() - start < 0.05
+        assert limiter.stats["test_api"]["waits"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_waits_when_bucket_empty(self, limiter):
+        """Test calls wait for a refill once the bucket is empty"""
+        for _ in range(3):
+            await limiter.acquire("test_api")
+        
+        assert limiter.stats["test_api"]["waits"] == 1
+        assert limiter.stats["test_api"]["wait_seconds"] > 0.05
+    
+    @pytest.mark.asyncio
+    async def test_penalize_honours_retry_after(self, limiter):
+        """Test a 429 Retry-After blocks the bucket"""
+        await limiter.penalize("test_api", retry_after=0.2)
+        
+        start = time.monotonic()
+        await limiter.acquire("test_api")
+        
+        assert time.monotonic() - start >= 0.15
+        assert limiter.stats["test_api"]["throttled"] == 1
+    
+    def test_parse_retry_after(self):
+        """Test Retry-After header parsing"""
+        assert parse_retry_after("30") == 30.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+class _LeaseRedis:
+    """In-memory async Redis with key expiry, for the single-flight lock scripts"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def _get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and time.monotonic() >= expires:
+            self.data.pop(key, None)
+            return None
+        return value
+    
+    async def set(self, key, value, nx=False, px=None):
+        if nx and self._get(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+    
+    async def get(self, key):
+        return self._get(key)
+    
+    async def eval(self, script, numkeys, key, token, *args):
+        if self._get(key) != token:
+            return 0
+        if "PEXPIRE" in script:
+            self.data[key] = (token, time.monotonic() + int(args[0]) / 1000)
+        else:
+            del self.data[key]
+        return 1
+
+class TestSingleFlight:
+    """Test request coalescing for concurrent cache misses"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self):
+        """Test concurrent callers of the same key trigger a single fetch"""
+        flight = SingleFlight()
+        calls = 0
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return [{"symbol": "WETH"}]
+        
+        results = await asyncio.gather(*[flight.do("trending_tokens", fetch) for _ in range(10)])
+        
+        assert calls == 1
+        assert all(result == [{"symbol": "WETH"}] for result in results)
+        assert flight.stats["trending_tokens"]["coalesced"] == 9
+        assert flight.in_flight == {}
+    
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_callers(self):
+        """Test a failed fetch raises for every coalesced caller and is not cached"""
+        flight = SingleFlight()
+        
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+        
+        results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(3)], return_exceptions=True)
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.stats["key"]["errors"] == 1
+        assert "key" not in flight.in_flight
+    
+    @pytest.mark.asyncio
+    async def test_lease_renewed_while_slow_fetch_runs(self):
+        """Test a fetch slower than the lease keeps it, so other workers wait instead of refetching"""
+        redis_client = _LeaseRedis()
+        workers = [SingleFlight() for _ in range(2)]
+        for worker in workers:
+            worker.lease_seconds = 0.1
+            await worker.initialize(redis_client)
+        calls = 0
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.35)
+            return [{"symbol": "AERO"}]
+        
+        results = await asyncio.gather(*(worker.do("top15", fetch) for worker in workers))
+        
+        assert calls == 1
+        assert results == [[{"symbol": "AERO"}]] * 2
+        assert workers[1].stats["top15"]["coalesced_remote"] == 1
+        assert redis_client._get("single_flight:lock:top15") is None
+    
+
+    @pytest.mark.asyncio
+    async def test_coingecko_category_miss_coalesced(self):
+        """Test concurrent CoinGecko category requests hit the upstream once"""
+        service = CoinGeckoService()
+        service._fetch_trending_tokens = AsyncMock(return_value=[{"symbol": "AERO"}])
+        
+        results = await asyncio.gather(*[service.get_trending_tokens() for _ in range(5)])
+        
+        service._fetch_trending_tokens.assert_called_once()
+        assert all(result == [{"symbol": "AERO"}] for result in results)
+
+class TestTokenRefreshService:
+    """Test stale-while-revalidate token category refresh"""
+    
+    @pytest.fixture
+    def coingecko_service(self):
+        service = CoinGeckoService()
+        service._fetch_trending_tokens = AsyncMock(return_value=[{"symbol": "FRESH"}])
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self, coingecko_service):
+        """Test expired categories return stale data and refresh in the background"""
+        stale_time = datetime.now().timestamp() - coingecko_service.categories["trending"]["ttl"] - 1
+        coingecko_service.category_cache["trending_tokens"] = ([{"symbol": "STALE"}], stale_time)
+        
+        tokens = await coingecko_service.get_trending_tokens()
+        assert tokens == [{"symbol": "STALE"}]
+        
+        await coingecko_service.background_refreshes["trending"]
+        assert await coingecko_service.get_trending_tokens() == [{"symbol": "FRESH"}]
+        coingecko_service._fetch_trending_tokens.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_unknown_category_rejected(self, coingecko_service):
+        """Test an unknown category raises instead of serving or refreshing top15"""
+        for call in (coingecko_service.get_category_tokens, coingecko_service.refresh_category):
+            with pytest.raises(ValueError, match="Unknown token category 'memes'"):
+                await call("memes")
+        with pytest.raises(ValueError):
+            coingecko_service.get_category_age("memes")
+    
+
+    @pytest.mark.asyncio
+    async def test_refresh_pushes_to_token_subscribers(self, coingecko_service):
+        """Test refreshed categories are broadcast via send_token_update"""
+        websocket_service = MagicMock()
+        websocket_service.send_token_update = AsyncMock()
+        refresher = TokenRefreshService(coingecko_service, websocket_service)
+        
+        assert await refresher.refresh("trending") is True
+        
+        websocket_service.send_token_update.assert_called_once_with({
+            "category": "trending",
+            "tokens": [{"symbol": "FRESH"}]
+        })
+        assert refresher.stats["trending"]["refreshes"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_only_lease_holder_broadcasts(self, coingecko_service):
+        """Test every replica refreshes but only the leader pushes to subscribers"""
+        lease = {}
+        
+        async def eval_script(script, numkeys, key, owner, *args):
+            if "DEL" in script:
+                return lease.pop(key, None) and 1
+            holder = lease.setdefault(key, owner)
+            return int(holder == owner)
+        
+        redis_client = MagicMock()
+        redis_client.eval = AsyncMock(side_effect=eval_script)
+        replicas = []
+        for _ in range(2):
+            websocket_service = MagicMock()
+            websocket_service.send_token_update = AsyncMock()
+            refresher = TokenRefreshService(coingecko_service, websocket_service)
+            refresher.redis_client = redis_client
+            await refresher.renew_leadership()
+            await refresher.refresh("trending")
+            replicas.append(refresher)
+        
+        assert [r.is_leader for r in replicas] == [True, False]
+        assert [r.websocket_service.send_token_update.await_count for r in replicas] == [1, 0]
+        assert all(r.stats["trending"]["refreshes"] == 1 for r in replicas)
+        
+        # The leader leaving frees the lease for the other replica
+        await replicas[0].stop()
+        assert await replicas[1].renew_leadership() is True
+    
+
+    @pytest.mark.asyncio
+    async def test_only_due_categories_refreshed(self, coingecko_service):
+        """Test fresh categories are skipped by the scheduler"""
+        now = datetime.now().timestamp()
+        for config in coingecko_service.categories.values():
+            coingecko_service.category_cache[config["cache_key"]] = ([{"symbol": "OK"}], now)
+        coingecko_service.category_cache["trending_tokens"] = ([{"symbol": "OLD"}], now - 290)
+        refresher = TokenRefreshService(coingecko_service)
+        refresher.refresh = AsyncMock(return_value=True)
+        
+        await refresher.refresh_due_categories()
+        
+        refresher.refresh.assert_called_once_with("trending")
+
+class _HashRedis:
+    """In-memory async Redis whose HGETALL, like the real one, ignores insertion order"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    async def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+    
+    def pipeline(self, transaction=True):
+        client, commands = self, []
+        
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: commands.append((name, args, kwargs))
+            
+            async def execute(self):
+                return [client._run(name, *args, **kwargs) for name, args, kwargs in commands]
+        
+        return Pipeline()
+    
+    def _run(self, name, key, *args, mapping=None):
+        if name == "delete":
+            return int(self.data.pop(key, None) is not None)
+        if name == "set":
+            self.data[key] = args[0]
+            return True
+        if name == "get":
+            return self.data.get(key)
+        if name == "hset":
+            self.data.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+            return len(mapping)
+        if name == "hlen":
+            return len(self.data.get(key, {}))
+        if name == "hgetall":
+            return dict(sorted(self.data.get(key, {}).items(), key=lambda item: item[0][::-1]))
+        raise NotImplementedError(name)
+
+class TestBaseTokenIndex:
+    """Test indexed Base token lookups"""
+    
+    @pytest.fixture
+    def tokens(self):
+        return [
+            {"id": "weth", "symbol": "WETH", "name": "Wrapped Ether", "base_address": "0x4200000000000000000000000000000000000006"},
+            {"id": "aerodrome-finance", "symbol": "AERO", "name": "Aerodrome Finance", "base_address": "0x940181a94A35A4569E4529A3CDfB74e38FD98631"}
+        ]
+    
+    def test_lookups_are_case_insensitive(self, tokens):
+        """Test address, symbol and name indexes"""
+        index = BaseTokenIndex()
+        index.update(tokens)
+        
+        assert index.get_id_for_address("0x940181A94A35A4569E4529A3CDFB74E38FD98631") == "aerodrome-finance"
+        assert index.find_by_symbol("weth")[0]["id"] == "weth"
+        assert index.find_by_name("AERODROME FINANCE")[0]["symbol"] == "AERO"
+        assert index.get_id_for_address("0xunknown") is None
+    
+    def test_incremental_update(self, tokens):
+        """Test a refresh only touches changed entries and drops stale keys"""
+        index = BaseTokenIndex()
+        index.update(tokens)
+        
+        renamed = dict(tokens[1], symbol="AERO2")
+        changes = index.update([renamed])
+        
+        assert changes == {"upserted": ["aerodrome-finance"], "removed": ["weth"]}
+        assert index.find_by_symbol("AERO") == []
+        assert index.find_by_symbol("AERO2")[0]["id"] == "aerodrome-finance"
+        assert index.get_id_for_address(tokens[0]["base_address"]) is None
+    
+    @pytest.mark.asyncio
+    async def test_coingecko_id_lookup_uses_index(self, tokens):
+        """Test CoinGeckoService resolves addresses through the index"""
+        service = CoinGeckoService()
+        service.token_index.update(tokens)
+        service.get_base_token_list = AsyncMock()
+        
+        coingecko_id = await service.get_coingecko_id_for_address(tokens[0]["base_address"].upper())
+        
+        assert coingecko_id == "weth"
+        service.get_base_token_list.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_worker_loading_from_redis_keeps_list_order(self):
+        """Test a worker restoring the index from Redis serves the fetching worker's token order"""
+        coins = [{"id": f"coin-{i}", "symbol": f"C{i}", "platforms": {"base": f"0x{i:040x}"}} for i in (5, 1, 9, 3, 7, 2)]
+        response = MagicMock()
+        response.json.return_value = coins
+        redis_client = _HashRedis()
+        fetcher, loader = CoinGeckoService(), CoinGeckoService()
+        fetcher.redis_client = loader.redis_client = redis_client
+        fetcher._make_request_with_retry = AsyncMock(return_value=response)
+        loader._make_request_with_retry = AsyncMock()
+        
+        fetched = await fetcher.get_base_token_list()
+        loaded = await loader.get_base_token_list()
+        
+        assert [token["id"] for token in fetched] == [coin["id"] for coin in coins]
+        assert [token["id"] for token in loaded] == [token["id"] for token in fetched]
+        loader._make_request_with_retry.assert_not_called()
+    
+
+class TestThreadedWeb3:
+    """Test the thread-pool facade for blocking web3 calls"""
+    
+    async def _measure_loop_lag(self, blocking_call):
+        """Run blocking_call while a 10ms ticker measures the worst event-loop stall"""
+        max_lag = 0.0
+        running = True
+        
+        async def ticker():
+            nonlocal max_lag
+            while running:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                max_lag = max(max_lag, time.perf_counter() - start - 0.01)
+        
+        ticker_task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        await blocking_call()
+        running = False
+        await ticker_task
+        return max_lag
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_event_loop_lag_benchmark(self):
+        """Benchmark: a 200ms RPC stalls the loop when called inline, not via the pool"""
+        rpc = ThreadedWeb3("http://127.0.0.1:8545", max_workers=2)
+        
+        async def inline_call():
+            time.sleep(0.2)  # what a sync Web3 call inside `async def` does
+        
+        async def offloaded_call():
+            await rpc.call(time.sleep, 0.2)
+        
+        lag_before = await self._measure_loop_lag(inline_call)
+        lag_after = await self._measure_loop_lag(offloaded_call)
+        rpc.close()
+        
+        print(f"\nEvent loop lag: inline {lag_before * 1000:.1f}ms, offloaded {lag_after * 1000:.1f}ms")
+        assert lag_before >= 0.15
+        assert lag_after < 0.05
+    
+    @pytest.mark.asyncio
+    async def test_connectivity_check_is_cached(self):
+        """Test is_connected only hits the RPC once per TTL"""
+        rpc = ThreadedWeb3("http://127.0.0.1:8545", connection_check_ttl=60)
+        rpc.w3.is_connected = MagicMock(return_value=True)
+        
+        assert await rpc.is_connected() is True
+        assert await rpc.is_connected() is True
+        
+        rpc.w3.is_connected.assert_called_once()
+        assert rpc.stats["connection_checks"] == 1
+        rpc.close()
+
+class TestDexPriceBatch:
+    """Test batched Multicall3 pricing in DexPriceService"""
+    
+    TOKEN_A = "0x940181a94A35A4569E4529A3CDfB74e38FD98631"
+    TOKEN_B = "0x532f27101965dd16442E59d40670FaF5eBB142E4"
+    
+    @pytest.fixture
+    def dex_service(self):
+        service = DexPriceService()
+        with patch.object(ThreadedWeb3, "is_connected", AsyncMock(return_value=True)):
+            asyncio.run(service.initialize("http://127.0.0.1:8545"))
+        service.rpc.is_connected = AsyncMock(return_value=True)
+        yield service
+        service.rpc.close()
+    
+    def _quote(self, service, amount_out):
+        return (True, service.w3.codec.encode(["uint256", "uint160[]", "uint32[]", "uint256"], [amount_out, [], [], 0]))
+    
+    @pytest.mark.asyncio
+    async def test_prices_many_tokens_in_two_batches(self, dex_service):
+        """Test decimals and quotes are each fetched in one multicall"""
+        decimals = [(True, dex_service.w3.codec.encode(["uint8"], [18])), (True, dex_service.w3.codec.encode(["uint8"], [6]))]
+        quotes = [
+            self._quote(dex_service, 2000 * 10 ** 6),  # 1 WETH = $2000
+            self._quote(dex_service, 10 ** 15), (True, b""),   # token A: 0.001 WETH
+            (False, b""), self._quote(dex_service, 5 * 10 ** 5),  # token B: no WETH pool, $0.50 via USDC
+        ]
+        dex_service._multicall = AsyncMock(side_effect=[decimals, quotes])
+        
+        prices = await dex_service.get_token_prices_usd([self.TOKEN_A, self.TOKEN_B])
+        
+        assert dex_service._multicall.call_count == 2
+        assert prices[self.TOKEN_A.lower()] == pytest.approx(2.0)
+        assert prices[self.TOKEN_B.lower()] == pytest.approx(0.5)
+        assert dex_service.decimals_cache[self.TOKEN_B.lower()] == 6
+    
+    @pytest.mark.asyncio
+    async def test_invalid_address_only_skips_itself(self, dex_service):
+        """Test a malformed address gets None while the rest of the batch is priced"""
+        dex_service.decimals_cache[self.TOKEN_A.lower()] = 18
+        quotes = [self._quote(dex_service, 2000 * 10 ** 6), self._quote(dex_service, 10 ** 15), (True, b"")]
+        dex_service._multicall = AsyncMock(return_value=quotes)
+        
+        prices = await dex_service.get_token_prices_usd(["0xnot-an-address", self.TOKEN_A])
+        
+        assert prices["0xnot-an-address"] is None
+        assert prices[self.TOKEN_A.lower()] == pytest.approx(2.0)
+    
+
+    @pytest.mark.asyncio
+    async def test_decimals_cached_permanently(self, dex_service):
+        """Test known decimals skip the decimals batch"""
+        dex_service.decimals_cache[self.TOKEN_A.lower()] = 18
+        dex_service._multicall = AsyncMock(return_value=[(False, b""), (False, b""), (False, b"")])
+        
+        prices = await dex_service.get_token_prices_usd([self.TOKEN_A])
+        
+        dex_service._multicall.assert_called_once()
+        assert prices == {self.TOKEN_A.lower(): None}
+
+class TestTokenServiceBatchPrices:
+    """Test TokenService batch pricing"""
+    
+    @pytest.mark.asyncio
+    async def test_uncached_prices_fetched_in_one_batch(self):
+        """Test cached prices are reused and the rest are priced together"""
+        token_service = TokenService()
+        redis_service = MagicMock()
+        redis_service.get = AsyncMock(side_effect=lambda key: json.dumps("1.5") if key == "token_price:0xaaa" else None)
+        redis_service.setex = AsyncMock()
+        dex_price_service = MagicMock()
+        dex_price_service.get_token_prices_usd = AsyncMock(return_value={"0xbbb": 2.0, "0xccc": None})
+        await token_service.initialize(redis_service, dex_price_service=dex_price_service)
+        
+        prices = await token_service.get_token_prices(["0xAAA", "0xBBB", "0xCCC"])
+        
+        assert prices == {"0xaaa": 1.5, "0xbbb": 2.0}
+        dex_price_service.get_token_prices_usd.assert_called_once_with(["0xbbb", "0xccc"])
+        redis_service.setex.assert_called_once()
+
+class _LatencyRedis:
+    """Minimal in-memory async Redis client that counts network round trips"""
+    
+    def __init__(self, latency: float = 0.0):
+        self.data = {}
+        self.lists = {}
+        self.latency = latency
+        self.round_trips = 0
+    
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+    
+    async def get(self, key):
+        await self._round_trip()
+        return self.data.get(key)
+    
+    async def setex(self, key, ttl, value):
+        await self._round_trip()
+        self.data[key] = value
+    
+    async def mget(self, keys):
+        await self._round_trip()
+        return [self.data.get(key) for key in keys]
+    
+    async def lrange(self, key, start, stop):
+        await self._round_trip()
+        return list(self.lists.get(key, []))
+    
+    async def lpush(self, key, *values):
+        await self._round_trip()
+        self.lists.setdefault(key, [])[:0] = reversed(values)
+        return len(self.lists[key])
+    
+    async def expire(self, key, ttl):
+        await self._round_trip()
+        return True
+    
+    async def delete(self, *keys):
+        await self._round_trip()
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+    
+    def pipeline(self, transaction=True):
+        return _LatencyPipeline(self)
+
+
+class _LatencyPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    
+    def mget(self, keys):
+        self.commands.append(lambda: [self.client.data.get(key) for key in keys])
+    
+    def setex(self, key, ttl, value):
+        self.commands.append(lambda: self.client.data.__setitem__(key, value))
+    
+    def lrem(self, key, count, value):
+        def lrem():
+            items = self.client.lists.get(key, [])
+            if value in items:
+                items.remove(value)
+                return 1
+            return 0
+        self.commands.append(lrem)
+    
+    async def execute(self):
+        await self.client._round_trip()
+        return [command() for command in self.commands]
+
+
+class TestEpisodicMemoryBatching:
+    """Test episodic memory loads episodes with bulk Redis reads"""
+    
+    async def _seed(self, count, latency=0.0, days_old=0):
+        redis_service = RedisService()
+        redis_service.redis_client = _LatencyRedis()
+        memory = EpisodicMemory(redis_service)
+        for i in range(count):
+            await memory.store_episode("user1", "aha_moment" if i % 2 else "question",
+                                       f"learning about gas fees {i}", emotional_context="excited")
+        if days_old:
+            for key, value in redis_service.redis_client.data.items():
+                episode = json.loads(json.loads(value))
+                episode["timestamp"] = (datetime.now() - timedelta(days=days_old)).isoformat()
+                redis_service.redis_client.data[key] = json.dumps(json.dumps(episode))
+        redis_service.redis_client.latency = latency
+        redis_service.redis_client.round_trips = 0
+        return redis_service, memory
+    
+    @pytest.mark.asyncio
+    async def test_mget_chunks_in_one_round_trip(self):
+        """Test RedisService.mget decodes values and pipelines chunks"""
+        redis_service = RedisService()
+        redis_service.redis_client = _LatencyRedis()
+        redis_service.mget_chunk_size = 2
+        redis_service.redis_client.data = {"a": json.dumps(1), "c": json.dumps({"x": 3})}
+        
+        values = await redis_service.mget(["a", "b", "c"])
+        
+        assert values == [1, None, {"x": 3}]
+        assert redis_service.redis_client.round_trips == 1
+    
+    @pytest.mark.asyncio
+    async def test_context_build_has_constant_round_trips(self):
+        """Test episode views cost LRANGE + MGET regardless of list length"""
+        redis_service, memory = await self._seed(50)
+        
+        episodes = await memory.get_relevant_episodes("user1", "gas fees", max_episodes=3)
+        moments = await memory.get_learning_moments("user1")
+        
+        assert len(episodes) == 3
+        assert all(m["episode_type"] == "aha_moment" for m in moments)
+        assert redis_service.redis_client.round_trips == 4
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_batches_deletes(self):
+        """Test cleanup removes old episodes with one DEL and one pipeline"""
+        redis_service, memory = await self._seed(20, days_old=100)
+        
+        cleaned = await memory.cleanup_old_episodes("user1", days_old=90)
+        
+        assert cleaned == 20
+        assert redis_service.redis_client.data == {}
+        assert redis_service.redis_client.lists["user_episodes:user1"] == []
+        assert redis_service.redis_client.round_trips == 4
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_bulk_load_benchmark(self):
+        """Benchmark: 1k episodes at 0.2ms per round trip, per-key GETs vs LRANGE + MGET"""
+        redis_service, memory = await self._seed(1000, latency=0.0002)
+        client = redis_service.redis_client
+        
+        start = time.perf_counter()
+        episode_ids = await redis_service.lrange("user_episodes:user1", 0, -1)
+        for episode_id in episode_ids:
+            await redis_service.get(episode_id)
+        per_key_time, per_key_trips = time.perf_counter() - start, client.round_trips
+        
+        client.round_trips = 0
+        start = time.perf_counter()
+        episodes = await memory.load_episodes("user1")
+        bulk_time, bulk_trips = time.perf_counter() - start, client.round_trips
+        
+        print(f"\n1k episodes: per-key {per_key_trips} round trips / {per_key_time * 1000:.1f}ms, "
+              f"bulk {bulk_trips} round trips / {bulk_time * 1000:.1f}ms")
+        assert len(episodes) == 1000
+        assert per_key_trips == 1001
+        assert bulk_trips == 2
+        assert bulk_time < per_key_time
+
+class TestLocalVectorStore:
+    """Test the memory-mapped RAG vector store"""
+    
+    def _doc(self, doc_id, embedding, category="basics", difficulty_level=1):
+        return {"id": doc_id, "title": doc_id, "content": f"about {doc_id}", "category": category,
+                "difficulty_level": difficulty_level, "embedding": embedding}
+    
+    @pytest.mark.asyncio
+    async def test_top_k_with_filters(self, tmp_path):
+        """Test cosine ranking and category/difficulty filters"""
+        store = LocalVectorStore(data_dir=str(tmp_path), initial_capacity=2)
+        await store.initialize()
+        await store.add_documents([
+            self._doc("wallets-1", [1.0, 0.0, 0.0], category="wallets"),
+            self._doc("wallets-2", [0.9, 0.1, 0.0], category="wallets", difficulty_level=2),
+            self._doc("defi-1", [1.0, 0.05, 0.0], category="defi")
+        ])
+        
+        results = await store.similarity_search([1.0, 0.0, 0.0], limit=2)
+        assert [r["id"] for r in results] == ["wallets-1", "defi-1"]
+        assert results[0]["similarity_score"] == pytest.approx(1.0)
+        assert "embedding" not in results[0]
+        
+        filtered = await store.similarity_search([1.0, 0.0, 0.0], limit=5, filter={"category": "wallets", "difficulty_level": 2})
+        assert [r["id"] for r in filtered] == ["wallets-2"]
+        assert await store.similarity_search([1.0, 0.0, 0.0], filter={"category": "dex"}) == []
+        assert store.capacity == 4
+    
+    @pytest.mark.asyncio
+    async def test_upsert_and_reload(self, tmp_path):
+        """Test re-adding an id updates it in place and the store reopens from disk"""
+        store = LocalVectorStore(data_dir=str(tmp_path))
+        await store.initialize()
+        await store.add_documents([self._doc("a", [1.0, 0.0]), self._doc("b", [0.0, 1.0])])
+        await store.add_documents([self._doc("a", [0.0, 1.0], category="defi")])
+        store.close()
+        
+        reopened = LocalVectorStore(data_dir=str(tmp_path))
+        await reopened.initialize()
+        
+        assert reopened.count == 2
+        assert await reopened.similarity_search([1.0, 0.0], filter={"category": "basics"}, similarity_threshold=0.5) == []
+        results = await reopened.similarity_search([0.0, 1.0], filter={"category": "defi"})
+        assert results[0]["id"] == "a"
+    
+    @pytest.mark.asyncio
+    async def test_search_during_add_sees_only_written_rows(self, tmp_path):
+        """Test a search interleaved with an insert never returns a half-written row"""
+        store = LocalVectorStore(data_dir=str(tmp_path))
+        await store.initialize()
+        await store.add_documents([self._doc("a", [1.0, 0.0])])
+        seen = []
+        set_masks = store._set_masks
+        
+        def search_mid_insert(row, document):
+            seen.append(store.search([0.0, 1.0], limit=5))
+            set_masks(row, document)
+        
+        store._set_masks = search_mid_insert
+        await store.add_documents([self._doc("b", [0.0, 1.0])])
+        
+        assert [r["id"] for r in seen[0]] == ["a"]
+        assert (await store.similarity_search([0.0, 1.0], limit=1))[0]["id"] == "b"
+    
+
+    @pytest.mark.asyncio
+    async def test_rag_pipeline_retrieves_from_store(self, tmp_path):
+        """Test RAGPipeline add/retrieve round trip through the store"""
+        store = LocalVectorStore(data_dir=str(tmp_path))
+        await store.initialize()
+        embeddings = MagicMock()
+        embeddings.generate_embeddings = AsyncMock(return_value=[0.2, 0.4, 0.1])
+        redis_service = MagicMock()
+        redis_service.set = AsyncMock(return_value=True)
+        pipeline = RAGPipeline()
+        await pipeline.initialize(store, embeddings, redis_service)
+        
+        assert await pipeline.add_educational_content({"id": "gas", "title": "Gas fees", "content": "...", "category": "base"})
+        results = await pipeline.retrieve_relevant_content("what is gas", category="base")
+        
+        assert results[0]["id"] == "gas"
+        assert results[0]["similarity_score"] == pytest.approx(1.0)
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("size", [10_000, 100_000])
+    def test_search_latency_benchmark(self, tmp_path, size):
+        """Benchmark: per-query top-5 latency at 10k/100k documents (dimension 256)"""
+        rng = np.random.default_rng(0)
+        store = LocalVectorStore(data_dir=str(tmp_path), dimension=256)
+        categories = list(RAGPipeline().content_categories)
+        for start in range(0, size, 10_000):
+            vectors = rng.standard_normal((10_000, 256), dtype=np.float32)
+            asyncio.run(store.add_documents([
+                self._doc(f"doc-{start + i}", vector.tolist(), category=categories[(start + i) % len(categories)])
+                for i, vector in enumerate(vectors)
+            ]))
+        
+        queries = rng.standard_normal((50, 256), dtype=np.float32)
+        start = time.perf_counter()
+        for query in queries:
+            store.search(query, limit=5)
+        unfiltered_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        
+        start = time.perf_counter()
+        for query in queries:
+            results = store.search(query, limit=5, filter={"category": "defi"})
+        filtered_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        
+        print(f"\n{size} docs: {unfiltered_ms:.2f}ms/query, {filtered_ms:.2f}ms/query filtered")
+        assert store.count == size
+        assert all(r["category"] == "defi" for r in results)
+        assert unfiltered_ms < 500
+
+class TestEmbeddingBatching:
+    """Test batched, deduplicated and cached embedding generation"""
+    
+    async def _service(self, tmp_path, redis_client=None):
+        service = OpenAIService()
+        service.embedding_cache = EmbeddingCache(db_path=str(tmp_path / "embeddings.sqlite3"))
+        await service.initialize_embedding_cache(redis_client)
+        
+        async def create(model, input):
+            response = MagicMock()
+            response.data = [MagicMock(index=i, embedding=[float(len(text)), 0.5]) for i, text in enumerate(input)]
+            return response
+        
+        service.client = MagicMock()
+        service.client.embeddings.create = AsyncMock(side_effect=create)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_dedupes_and_batches_misses(self, tmp_path):
+        """Test duplicates are embedded once and misses split into request-sized batches"""
+        service = await self._service(tmp_path)
+        service.embedding_batch_size = 2
+        
+        embeddings = await service.generate_embeddings_batch(["a", "bb", "a", "", "ccc"])
+        
+        assert embeddings == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5], [], [3.0, 0.5]]
+        assert service.client.embeddings.create.await_count == 2
+        assert service.embedding_stats["deduplicated"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_keeps_earlier_batches_cached(self, tmp_path):
+        """Test batches embedded before a failure are returned and cached, so a retry only sends the rest"""
+        service = await self._service(tmp_path)
+        service.embedding_batch_size = 2
+        create = service.client.embeddings.create.side_effect
+        service.client.embeddings.create.side_effect = [await create("m", ["a", "bb"]), Exception("rate limited")]
+        
+        first = await service.generate_embeddings_batch(["a", "bb", "ccc"])
+        service.client.embeddings.create.side_effect = create
+        second = await service.generate_embeddings_batch(["a", "bb", "ccc"])
+        
+        assert first == [[1.0, 0.5], [2.0, 0.5], []]
+        assert second == [[1.0, 0.5], [2.0, 0.5], [3.0, 0.5]]
+        assert service.client.embeddings.create.await_args.kwargs["input"] == ["ccc"]
+        service.embedding_cache.close()
+    
+
+    @pytest.mark.asyncio
+    async def test_cache_is_keyed_by_model_and_persists(self, tmp_path):
+        """Test cached vectors skip the API, per model, across service restarts"""
+        service = await self._service(tmp_path)
+        await service.generate_embeddings_batch(["what is gas"], model="text-embedding-3-large")
+        service.embedding_cache.close()
+        
+        redis_client = _LatencyRedis()
+        restarted = await self._service(tmp_path, redis_client)
+        assert await restarted.generate_embeddings("what is gas", model="text-embedding-3-large") == [11.0, 0.5]
+        restarted.client.embeddings.create.assert_not_called()
+        assert restarted.embedding_cache.stats["disk_hits"] == 1
+        
+        # Disk hit was written back to Redis
+        assert await restarted.generate_embeddings("what is gas", model="text-embedding-3-large") == [11.0, 0.5]
+        assert restarted.embedding_cache.stats["redis_hits"] == 1
+        
+        await restarted.generate_embeddings("what is gas", model="text-embedding-3-small")
+        restarted.client.embeddings.create.assert_awaited_once()
+        restarted.embedding_cache.close()
+
+class TestSemanticAnswerCache:
+    """Test answer cache keys and paraphrase matching"""
+    
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        monkeypatch.setenv("LLM_CACHE_SEMANTIC", "true")
+        redis_service = RedisService()
+        redis_service.redis_client = _LatencyRedis()
+        vectors = {"what is a blockchain": [1.0, 0.0], "explain blockchains": [0.98, 0.05], "what is gas": [0.0, 1.0]}
+        embeddings = MagicMock()
+        embeddings.generate_embeddings = AsyncMock(side_effect=lambda text, model: vectors[text])
+        return SemanticAnswerCache(redis_service, embeddings)
+    
+    @pytest.mark.asyncio
+    async def test_paraphrase_hits_within_bucket(self, cache):
+        """Test a similar question in the same intent/bucket reuses the answer"""
+        await cache.store("What is a blockchain?", "education", 5, "A shared ledger.")
+        
+        hit = await cache.lookup("Explain blockchains", "education", 10)
+        
+        assert hit["content"] == "A shared ledger."
+        assert hit["match"] == "semantic"
+        assert await cache.lookup("What is gas?", "education", 10) is None
+        assert await cache.lookup("Explain blockchains", "education", 80) is None
+        assert cache.get_stats()["semantic_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_excluded_intents_are_not_stored(self, cache):
+        """Test time-sensitive intents bypass the cache"""
+        assert await cache.store("Is AERO pumping?", "social_sentiment", 0, "Maybe.") is False
+        assert await cache.lookup("Is AERO pumping?", "social_sentiment", 0) is None
+        assert cache.stats["skipped"] == 1
+
+class TestTavilyResultCache:
+    """Test cached, normalized and coalesced Tavily searches"""
+    
+    @pytest.fixture
+    def tavily(self):
+        service = TavilyService()
+        redis_service = RedisService()
+        redis_service.redis_client = _LatencyRedis()
+        service.redis_service = redis_service
+        
+        async def search_api(query, max_results, search_depth, include_answer):
+            await asyncio.sleep(0.01)
+            return {"results": [{"title": f"result {i}"} for i in range(max_results)], "answer": "summary"}
+        
+        service._search_api = AsyncMock(side_effect=search_api)
+        return service
+    
+    def test_query_normalization(self):
+        """Test case, punctuation and spacing do not change the key, word order and repeats do"""
+        assert TavilyService.normalize_query("AERO news, latest!") == TavilyService.normalize_query("  aero NEWS latest")
+        assert TavilyService.normalize_query("AERO news latest") != TavilyService.normalize_query("latest aero news")
+        assert TavilyService.normalize_query("AERO news") != TavilyService.normalize_query("AERO news news")
+        assert "site:reddit.com" in TavilyService.normalize_query("site:reddit.com AERO")
+    
+    @pytest.mark.asyncio
+    async def test_repeat_and_smaller_searches_hit_cache(self, tavily):
+        """Test a cached 10-result search serves a later 5-result search with its age"""
+        first = await tavily.search_with_metadata("AERO cryptocurrency news sentiment", max_results=10)
+        second = await tavily.search_with_metadata("aero cryptocurrency news, sentiment", max_results=5)
+        
+        assert first["cached"] is False and first["cache_age_seconds"] == 0
+        assert second["cached"] is True
+        assert second["cache_age_seconds"] >= 0
+        assert len(second["results"]) == 5
+        assert second["topic"] == "news"
+        tavily._search_api.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_searches_coalesce(self, tavily):
+        """Test simultaneous misses share one API call"""
+        results = await asyncio.gather(*[tavily.search("what is a blockchain") for _ in range(5)])
+        
+        assert all(len(r) == 5 for r in results)
+        tavily._search_api.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_topic_ttls_and_failures(self, tavily):
+        """Test per-topic TTLs are applied and empty responses are not cached"""
+        tavily.redis_service.cache_web_search = AsyncMock(return_value=True)
+        await tavily.search("how to use a wallet tutorial", topic=None)
+        assert tavily.redis_service.cache_web_search.await_args.kwargs["ttl"] == tavily.cache_ttls["education"]
+        
+        tavily._search_api = AsyncMock(return_value=None)
+        assert await tavily.search("base breaking news") == []
+        assert tavily.redis_service.cache_web_search.await_count == 1
+
+class TestAnalyticsAggregates:
+    """Test event-driven analytics counters replace keyspace scans"""
+    
+    @pytest.fixture
+    def redis_client(self, monkeypatch):
+        client = MagicMock()
+        client.pipe = MagicMock()
+        client.pipe.execute = AsyncMock(return_value=[])
+        client.pipeline.return_value = client.pipe
+        client.get = AsyncMock(return_value=None)
+        client.set = AsyncMock(return_value=True)
+        client.keys = AsyncMock(side_effect=AssertionError("KEYS must not be used"))
+        monkeypatch.setattr(analytics_events, "redis_client", client)
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_lesson_completion_updates_aggregates_once(self, redis_client):
+        """Test a new lesson records counters in one pipeline and repeats record nothing"""
+        progress = ProgressTrackingService()
+        await progress.initialize(None)
+        
+        assert await progress.update_lesson_completion("user1", "lesson-1", "defi") is True
+        assert await progress.update_lesson_completion("user1", "lesson-1", "defi") is False
+        
+        pipe = redis_client.pipe
+        pipe.execute.assert_awaited_once()
+        pipe.hincrby.assert_any_call(AnalyticsEventRecorder.COUNTERS_KEY, "lessons_completed", 1)
+        # first_lesson + defi_explorer achievements
+        pipe.hincrby.assert_any_call(AnalyticsEventRecorder.COUNTERS_KEY, "achievements_earned", 2)
+        pipe.zincrby.assert_called_once_with(AnalyticsEventRecorder.CATEGORIES_KEY, 1, "defi")
+        assert pipe.eval.call_args.args[-2:] == ("user1", 5)
+        pipe.pfadd.assert_any_call(analytics_events.active_key(datetime.now()), "user1")
+    
+    @pytest.mark.asyncio
+    async def test_reads_are_constant_time(self, redis_client):
+        """Test overview and engagement metrics read aggregates, never KEYS"""
+        redis_client.zcard = AsyncMock(return_value=4)
+        redis_client.hget = AsyncMock(side_effect=lambda key, field: {"lessons_completed": "10", "achievements_earned": "6"}.get(field))
+        redis_client.pfcount = AsyncMock(side_effect=lambda *keys: len(keys))
+        redis_client.zrevrange = AsyncMock(return_value=[("defi", 7.0)])
+        redis_client.pipe.execute = AsyncMock(side_effect=[["50", 4], [3]])
+        service = AnalyticsService()
+        await service.initialize(redis_client)
+        
+        overview = await service.get_platform_overview()
+        engagement = await service.get_user_engagement_metrics()
+        
+        assert overview["total_users"] == 4
+        assert overview["total_lessons_completed"] == 10
+        assert overview["average_learning_level"] == 12.5
+        assert overview["top_categories"] == [{"category": "defi", "users": 3, "lessons_completed": 7}]
+        assert engagement["daily_active_users"] == 1
+        assert engagement["weekly_active_users"] == 7
+        assert engagement["monthly_active_users"] == 30
+        assert engagement["lessons_per_user"] == 2.5
+        redis_client.keys.assert_not_called()
+
+class TestLeaderboards:
+    """Test sorted-set leaderboards"""
+    
+    @pytest.fixture
+    def redis_client(self):
+        client = MagicMock()
+        client.pipe = MagicMock()
+        client.pipe.execute = AsyncMock(return_value=[])
+        client.pipeline.return_value = client.pipe
+        client.get = AsyncMock(return_value=None)
+        client.set = AsyncMock(return_value=True)
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_points_update_every_period(self, redis_client):
+        """Test earned points go to the all_time set and the current hourly bucket in one pipeline"""
+        service = ProgressTrackingService()
+        await service.initialize(redis_client)
+        
+        await service.update_lesson_completion("user1", "lesson-1", "basics")
+        
+        keys = {call.args[0] for call in redis_client.pipe.zincrby.call_args_list}
+        assert keys == {"leaderboard:all_time", service._bucket_key()}
+        # first_lesson (10) + crypto_curious (25)
+        assert all(call.args[1:] == (35, "user1") for call in redis_client.pipe.zincrby.call_args_list)
+        assert redis_client.pipe.expire.call_args.args == (service._bucket_key(), 86400 * 7 + 3600)
+    
+    @pytest.mark.asyncio
+    async def test_rolling_windows_union_hourly_buckets(self, redis_client):
+        """Test daily/weekly boards are cached unions of the last 24/168 hourly buckets"""
+        redis_client.exists = AsyncMock(side_effect=[0, 1])
+        redis_client.zrevrange = AsyncMock(return_value=[])
+        service = ProgressTrackingService()
+        await service.initialize(redis_client)
+        now = datetime(2026, 3, 2, 0, 30)
+        
+        await service.get_leaderboard("daily")
+        await service.get_leaderboard("daily")
+        weekly = service._window_keys("weekly", now)
+        
+        union_key, buckets = redis_client.pipe.zunionstore.call_args.args
+        assert redis_client.pipe.zunionstore.call_count == 1
+        assert union_key == "leaderboard:daily" and len(buckets) == 24
+        assert redis_client.pipe.expire.call_args.args == ("leaderboard:daily", service.leaderboard_window_cache_ttl)
+        assert len(weekly) == 168 and weekly[0] == "leaderboard:hourly:2026-03-02T00"
+        assert weekly[1] == "leaderboard:hourly:2026-03-01T23" and weekly[-1] == "leaderboard:hourly:2026-02-23T01"
+    
+    @pytest.mark.asyncio
+    async def test_backfill_seeds_all_time_once(self, redis_client):
+        """Test stored progress seeds the all_time board (never lowering a score), once"""
+        stored = {
+            "progress:alice": json.dumps({"user_id": "alice", "total_points": 120, "learning_level": 40,
+                                          "achievements": ["a"], "completed_lessons": ["l1", "l2"]}),
+            "progress:bob": json.dumps({"user_id": "bob", "total_points": 0})
+        }
+        
+        async def scan_iter(match=None, count=None):
+            for key in stored:
+                yield key
+        
+        redis_client.scan_iter = scan_iter
+        redis_client.mget = AsyncMock(side_effect=lambda keys: [stored[key] for key in keys])
+        redis_client.set = AsyncMock(side_effect=[True, None])
+        service = ProgressTrackingService()
+        await service.initialize(redis_client)
+        
+        assert await service.backfill_leaderboard() == 1
+        assert await service.backfill_leaderboard() == 0
+        
+        zadd = redis_client.pipe.zadd.call_args
+        assert zadd.args == ("leaderboard:all_time", {"alice": 120}) and zadd.kwargs == {"gt": True}
+        rows = redis_client.pipe.hset.call_args.kwargs["mapping"]
+        assert json.loads(rows["alice"]) == {"level": 40, "achievements": 1, "lessons_completed": 2}
+    
+    @pytest.mark.asyncio
+    async def test_top_n_and_rank(self, redis_client):
+        """Test top-N rows and a user's rank come from the period's sorted set"""
+        redis_client.zrevrange = AsyncMock(return_value=[("alice", 120.0), ("bob", 80.0)])
+        redis_client.hmget = AsyncMock(return_value=[json.dumps({"level": 40, "achievements": 5, "lessons_completed": 8}), None])
+        redis_client.pipe.execute = AsyncMock(return_value=[41, 35.0, 1000])
+        redis_client.exists = AsyncMock(return_value=1)
+        service = ProgressTrackingService()
+        await service.initialize(redis_client)
+        
+        leaderboard = await service.get_leaderboard("weekly", limit=2)
+        rank = await service.get_user_rank("carol", "weekly")
+        
+        assert redis_client.zrevrange.await_args.args == ("leaderboard:weekly", 0, 1)
+        assert leaderboard[0] == {"rank": 1, "user_id": "alice", "points": 120, "level": 40, "achievements": 5, "lessons_completed": 8}
+        assert leaderboard[1]["lessons_completed"] == 0
+        assert rank == {"user_id": "carol", "period": "weekly", "rank": 42, "points": 35, "total_users": 1000}
+        assert await service.get_leaderboard("monthly") == []
+    
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_load_1m_users(self):
+        """Load test: top-10 and rank queries against 1M users in a real Redis (REDIS_URL)"""
+        import redis.asyncio as redis
+        
+        async def run():
+            client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+            try:
+                await client.ping()
+            except Exception:
+                await client.close()
+                pytest.skip("Redis not available")
+            
+            service = ProgressTrackingService()
+            service.leaderboard_prefix = "leaderboard_loadtest"
+            service.leaderboard_users_key = "leaderboard_loadtest:users"
+            await service.initialize(client)
+            key = service._leaderboard_key("all_time")
+            try:
+                for start in range(0, 1_000_000, 20_000):
+                    pipe = client.pipeline(transaction=False)
+                    pipe.zadd(key, {f"user{i}": (i * 7919) % 1_000_003 for i in range(start, start + 20_000)})
+                    pipe.hset(service.leaderboard_users_key, mapping={
+                        f"user{i}": json.dumps({"level": i % 100}) for i in range(start, start + 20_000)
+                    })
+                    await pipe.execute()
+                
+                # Incremental update of one user while the set is large
+                await service._update_leaderboards("user42", {"learning_level": 5, "achievements": [], "completed_lessons": []}, 10)
+                
+                timings = {"top10": [], "rank": []}
+                for i in range(500):
+                    start = time.perf_counter()
+                    top = await service.get_leaderboard("all_time", limit=10)
+                    timings["top10"].append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    rank = await service.get_user_rank(f"user{i * 1999}")
+                    timings["rank"].append(time.perf_counter() - start)
+                
+                for name, samples in timings.items():
+                    samples.sort()
+                    print(f"\n1M users {name}: p50 {samples[250] * 1000:.2f}ms, p99 {samples[495] * 1000:.2f}ms")
+                    assert samples[495] < 0.05
+                assert len(top) == 10 and top[0]["points"] >= top[-1]["points"]
+                assert rank["total_users"] == 1_000_000
+            finally:
+                await client.delete(key, service.leaderboard_users_key, service._bucket_key())
+                await client.close()
+        
+        asyncio.run(run())
+
+class _BlockingReddit:
+    """PRAW stand-in whose searches block the calling thread like real HTTP"""
+    
+    def __init__(self, delay=0.2, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+    
+    def subreddit(self, name):
+        reddit = self
+        
+        class _Subreddit:
+            def search(self, query, time_filter="day", limit=10):
+                reddit.calls += 1
+                time.sleep(reddit.delay)
+                if name in reddit.fail:
+                    raise RuntimeError("503")
+                post = MagicMock(title=f"{query} to the moon", selftext="bullish", score=10,
+                                 num_comments=2, created_utc=0, url="https://reddit.com/x")
+                return iter([post])
+        
+        return _Subreddit()
+
+class TestRedditIngestion:
+    """Test Reddit searches run off the event loop"""
+    
+    def _service(self, reddit):
+        service = SentimentService(MagicMock(), MagicMock())
+        service.reddit = ThreadedRedditClient(reddit_factory=lambda: reddit, max_workers=5, timeout=1, cache_ttl=60)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Test a sentiment request with slow subreddit searches does not stall the loop"""
+        reddit = _BlockingReddit(delay=0.2, fail=("defi",))
+        service = self._service(reddit)
+        max_lag = 0.0
+        running = True
+        
+        async def probe():
+            nonlocal max_lag
+            while running:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+        
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        result = await service._get_reddit_sentiment_enhanced("AERO")
+        elapsed = time.perf_counter() - start
+        running = False
+        await probe_task
+        
+        assert max_lag < 0.05
+        assert elapsed < 0.5  # five 200ms searches ran concurrently
+        assert result["reddit_posts"] == 4
+        service.reddit.close()
+    
+    @pytest.mark.asyncio
+    async def test_cache_and_timeouts(self):
+        """Test listings are cached, identical searches coalesce and slow subreddits time out"""
+        reddit = _BlockingReddit(delay=0.05)
+        client = ThreadedRedditClient(reddit_factory=lambda: reddit, max_workers=2, timeout=1, cache_ttl=60)
+        
+        await asyncio.gather(client.search("ethereum", "AERO"), client.search("ethereum", "aero"))
+        await client.search("Ethereum", "AERO ")
+        assert reddit.calls == 1
+        assert client.stats["coalesced"] == 1 and client.stats["cache_hits"] == 1
+        
+        reddit.delay = 0.3
+        client.timeout = 0.1
+        posts = await client.search_many(["bitcoin"], "AERO")
+        assert posts == {"bitcoin": []}
+        assert client.stats["timeouts"] == 1
+        client.close()
+
+class TestSentimentScorer:
+    """Test batch sentiment scoring"""
+    
+    @pytest.fixture
+    def scorer(self):
+        service = SentimentService(MagicMock(), MagicMock())
+        return service.scorer
+    
+    def test_keyword_scores_use_word_boundaries(self, scorer):
+        """Test keywords match whole words, once per distinct keyword"""
+        texts = [
+            "Bullish! moon moon, listing soon",      # 3 positive
+            "bank drug pumpkin",                     # no keywords ('ban', 'rug', 'pump' are substrings)
+            "Massive SELL-OFF after the hack, but a rally is coming",
+            ""
+        ]
+        
+        counts = scorer.keyword_counts(texts)
+        scores = scorer.keyword_scores(texts)
+        
+        assert counts.tolist() == [[3, 0], [0, 0], [1, 2], [0, 0]]
+        assert scores.dtype == np.float64
+        np.testing.assert_allclose(scores, [1.0, 0.0, -1 / 3, 0.0])
+    
+    @pytest.mark.asyncio
+    async def test_batch_matches_per_text_scoring(self, scorer):
+        """Test offloaded batches agree with VADER + keyword scoring text by text"""
+        texts = [f"post {i}: this token is great, bullish on the launch" if i % 2 else f"post {i}: terrible rug, bearish" for i in range(20)]
+        
+        scores = await scorer.score_batch(texts)
+        
+        expected = [
+            (scorer.vader_analyzer.polarity_scores(text)["compound"] + scorer.keyword_scores([text])[0]) / 2
+            for text in texts
+        ]
+        np.testing.assert_allclose(scores["combined"], expected)
+        assert scores["combined"].shape == (20,)
+        assert scorer.stats["offloaded_batches"] == 1
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_scoring_benchmark_10k(self, scorer):
+        """Micro-benchmark: 10k posts, per-post substring scan + VADER vs batch scorer (threads and processes)"""
+        # 80-word posts over a 3k-word vocabulary, ~3% sentiment keywords
+        rng = np.random.default_rng(7)
+        vocabulary = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), size=rng.integers(2, 10))) for _ in range(3000)]
+        keywords = scorer.positive_keywords + scorer.negative_keywords
+        texts = [
+            " ".join(keywords[rng.integers(len(keywords))] if rng.random() < 0.03 else vocabulary[rng.integers(3000)] for _ in range(80))
+            for _ in range(10_000)
+        ]
+        
+        start = time.perf_counter()
+        for text in texts:
+            lower = text.lower()
+            sum(1 for keyword in scorer.positive_keywords if keyword in lower)
+            sum(1 for keyword in scorer.negative_keywords if keyword in lower)
+        substring_keywords = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        scorer.keyword_counts(texts)
+        batch_keywords = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        legacy = [scorer.vader_analyzer.polarity_scores(text)["compound"] for text in texts]
+        legacy_total = time.perf_counter() - start + substring_keywords
+        
+        start = time.perf_counter()
+        threaded = await scorer.score_batch(texts)
+        threaded_total = time.perf_counter() - start
+        
+        processes = SentimentScorer(scorer.positive_keywords, scorer.negative_keywords, processes=4, process_batch_size=1000)
+        await processes.score_batch(texts[:1000])  # start the workers
+        start = time.perf_counter()
+        pooled = await processes.score_batch(texts)
+        pooled_total = time.perf_counter() - start
+        processes.close()
+        
+        print(f"\n10k posts: keywords {substring_keywords * 1000:.0f}ms substring vs {batch_keywords * 1000:.0f}ms batch word sets; "
+              f"full scoring {legacy_total * 1000:.0f}ms per-post vs {threaded_total * 1000:.0f}ms batch thread "
+              f"vs {pooled_total * 1000:.0f}ms 4-process pool")
+        assert len(legacy) == threaded["combined"].shape[0] == 10_000
+        np.testing.assert_allclose(pooled["combined"], threaded["combined"])
+
+class TestSentimentTimeSeries:
+    """Test the sentiment snapshot store and collector"""
+    
+    @staticmethod
+    def _sentiment(score, reddit_posts=4):
+        return {
+            "sentiment_metrics": {"overall_score": score, "total_volume": 100},
+            "platform_breakdown": {
+                "news": {"available": True, "sentiment": score, "mentions": 2},
+                "reddit": {"available": True, "sentiment": -score, "posts": reddit_posts},
+                "coingecko": {"available": True, "engagement_score": 5}
+            }
+        }
+    
+    @pytest.mark.asyncio
+    async def test_snapshots_roll_up_per_resolution(self):
+        """Test snapshots are averaged into 5m/1h/1d buckets and read back in order"""
+        store = SentimentTimeSeriesStore()
+        base = 1_700_000_000 - 1_700_000_000 % 86400  # UTC midnight
+        for minute, score in [(0, 0.2), (2, 0.4), (7, -0.6), (65, 1.0)]:
+            ts = base + minute * 60
+            await store.append("0xABC", store.build_snapshot(self._sentiment(score), ts))
+        now = base + 70 * 60
+        
+        five = await store.get_series("0xabc", hours=2, resolution="5m", now=now)
+        hourly = await store.get_series("0xabc", hours=2, resolution="1h", now=now)
+        daily = await store.get_series("0xabc", hours=24, resolution="1d", now=now)
+        raw = await store.get_series("0xabc", hours=2, resolution="raw", now=now)
+        
+        assert [p["samples"] for p in five["points"]] == [2, 1, 1]
+        assert five["points"][0]["sentiment_score"] == pytest.approx(0.3)
+        assert five["points"][0]["platforms"] == {"news": {"score": 0.3, "volume": 2.0}, "reddit": {"score": -0.3, "volume": 4.0}}
+        assert [p["samples"] for p in hourly["points"]] == [3, 1]
+        assert hourly["points"][0]["min_score"] == -0.6 and hourly["points"][0]["max_score"] == 0.4
+        assert daily["points"][0]["samples"] == 4
+        assert daily["points"][0]["sentiment_score"] == pytest.approx(0.25)
+        assert len(raw["points"]) == 4
+        assert five["points"][0]["timestamp"] < five["points"][-1]["timestamp"]
+    
+    @pytest.mark.asyncio
+    async def test_platform_averages_ignore_snapshots_without_it(self):
+        """Test a platform missing from some snapshots averages over the ones that had it"""
+        store = SentimentTimeSeriesStore()
+        base = 1_700_000_000 - 1_700_000_000 % 3600
+        with_reddit = self._sentiment(0.2)
+        with_reddit["platform_breakdown"]["reddit"] = {"available": True, "sentiment": 0.8, "posts": 10}
+        without_reddit = self._sentiment(0.2)
+        without_reddit["platform_breakdown"]["reddit"] = {"available": False}
+        await store.append("0xabc", store.build_snapshot(with_reddit, base))
+        await store.append("0xabc", store.build_snapshot(without_reddit, base + 60))
+        
+        hourly = await store.get_series("0xabc", hours=1, resolution="1h", now=base + 120)
+        
+        assert hourly["points"][0]["samples"] == 2
+        assert hourly["points"][0]["platforms"]["reddit"] == {"score": 0.8, "volume": 10.0}
+        assert hourly["points"][0]["platforms"]["news"]["volume"] == 2.0
+    
+
+    @pytest.mark.asyncio
+    async def test_retention_and_resolution_choice(self):
+        """Test old buckets are trimmed per resolution and the window picks the resolution"""
+        store = SentimentTimeSeriesStore()
+        store.resolutions["5m"]["retention"] = 3600
+        base = 1_700_000_000
+        for hour in range(4):
+            await store.append("0xabc", store.build_snapshot(self._sentiment(0.1), base + hour * 3600))
+        
+        assert len(store._memory["0xabc"]["5m"]) == 2
+        assert len(store._memory["0xabc"]["1h"]) == 4
+        assert store.choose_resolution(0.5) == "5m"
+        assert store.choose_resolution(24) == "1h"  # 5m retention shortened to 1h
+        assert store.choose_resolution(24 * 90) == "1d"
+    
+    @pytest.mark.asyncio
+    async def test_timeline_served_from_store(self):
+        """Test the timeline seeds a new token once, then reads only the store"""
+        service = SentimentService(MagicMock(), MagicMock())
+        service.get_multi_platform_sentiment = AsyncMock(return_value=self._sentiment(0.5))
+        
+        first = await service.get_sentiment_time_series("0xabc", hours=24)
+        second = await service.get_sentiment_time_series("0xabc", hours=24)
+        
+        assert service.get_multi_platform_sentiment.await_count == 1
+        assert first["resolution"] == "5m"
+        assert second["time_series"][0]["sentiment_score"] == 0.5
+        assert await service.timeseries.tracked_tokens() == ["0xabc"]
+    
+    @pytest.mark.asyncio
+    async def test_collector_snapshots_tracked_tokens_once_per_interval(self):
+        """Test the collector fetches each tracked token once per interval"""
+        service = SentimentService(MagicMock(), MagicMock())
+        service.get_multi_platform_sentiment = AsyncMock(return_value=self._sentiment(0.1))
+        collector = SentimentSnapshotCollector(service, interval=300)
+        await service.timeseries.track("0xaaa")
+        await service.timeseries.track("0xbbb")
+        
+        await collector.collect_tracked()
+        await collector.collect_tracked()
+        
+        assert service.get_multi_platform_sentiment.await_count == 2
+        assert collector.get_stats()["snapshots"] == 2
+        assert collector.get_stats()["skipped"] == 2
+    
+    @pytest.mark.integration
+    def test_redis_rollups_match_memory(self):
+        """Test the Lua rollup in a real Redis (REDIS_URL) agrees with the memory backend"""
+        import redis.asyncio as redis
+        
+        async def run():
+            client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+            try:
+                await client.ping()
+            except Exception:
+                await client.close()
+                pytest.skip("Redis not available")
+            
+            memory = SentimentTimeSeriesStore()
+            store = SentimentTimeSeriesStore(prefix="sentiment_ts_test")
+            await store.initialize(client)
+            base = 1_700_000_000
+            try:
+                for minute, score in [(0, 0.2), (2, 0.4), (7, -0.6), (65, 1.0)]:
+                    snapshot = store.build_snapshot(self._sentiment(score), base + minute * 60)
+                    await store.append("0xabc", snapshot)
+                    await memory.append("0xabc", snapshot)
+                for resolution in ("raw", "5m", "1h", "1d"):
+                    expected = await memory.get_series("0xabc", 48, resolution, now=base + 4200)
+                    assert await store.get_series("0xabc", 48, resolution, now=base + 4200) == expected
+            finally:
+                await client.delete(*[store._key("0xabc", name) for name in ("raw", "5m", "1h", "1d")])
+                await client.close()
+        
+        asyncio.run(run())
+
+class TestSentimentAnomalyDetector:
+    """Test streaming z-score anomaly detection"""
+    
+    @staticmethod
+    def _snapshot(score, volume, reddit_score=0.0):
+        return {"t": 0, "score": score, "volume": volume, "platforms": {"reddit": {"score": reddit_score, "volume": volume / 2}}}
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_is_exact_welford(self):
+        """Test young baselines equal the exact mean/variance, then decay"""
+        detector = SentimentAnomalyDetector()
+        detector.windows = [10]
+        rng = np.random.default_rng(7)
+        values = rng.normal(0.2, 0.1, 30)
+        
+        for i, value in enumerate(values):
+            await detector.observe("0xabc", self._snapshot(float(value), 100.0))
+            if i == 4:
+                state = dict(detector._memory["0xabc"])
+        
+        assert state["score:10:mean"] == pytest.approx(values[:5].mean())
+        assert state["score:10:var"] == pytest.approx(values[:5].var())
+        final = detector._memory["0xabc"]
+        assert final["score:n"] == 30
+        assert final["score:10:mean"] != pytest.approx(values.mean())
+    
+    @pytest.mark.asyncio
+    async def test_spikes_flagged_against_baseline(self):
+        """Test only values far outside the baseline are flagged, once warmed up"""
+        detector = SentimentAnomalyDetector()
+        rng = np.random.default_rng(1)
+        for i in range(detector.min_samples - 1):
+            await detector.observe("0xabc", self._snapshot(float(rng.normal(0.1, 0.05)), float(rng.normal(200, 20))))
+        
+        assert await detector.detect("0xabc", self._snapshot(0.9, 1000)) == []  # still warming up
+        
+        for i in range(50):
+            await detector.observe("0xabc", self._snapshot(float(rng.normal(0.1, 0.05)), float(rng.normal(200, 20))))
+        normal = await detector.detect("0xabc", self._snapshot(0.12, 210, reddit_score=0.0))
+        spike = await detector.detect("0xabc", self._snapshot(-0.8, 1000, reddit_score=0.0))
+        
+        assert normal == []
+        assert {a["metric"] for a in spike} == {"score", "volume", "reddit.volume"}
+        by_metric = {a["metric"]: a for a in spike}
+        assert by_metric["score"]["type"] == "sentiment_drop"
+        assert by_metric["volume"]["type"] == "volume_spike"
+        assert by_metric["volume"]["severity"] == "high"
+        assert all(abs(a["z_score"]) >= detector.z_threshold for a in spike)
+        assert await detector.detect("0xunknown", self._snapshot(0.9, 1000)) == []
+    
+    @pytest.mark.asyncio
+    async def test_service_learns_from_collected_snapshots(self):
+        """Test snapshots feed the baselines and the analysis reports z-score anomalies"""
+        service = SentimentService(MagicMock(), MagicMock())
+        breakdown = {"reddit": {"available": True, "sentiment": 0.1, "posts": 10}}
+        for i in range(20):
+            service.get_multi_platform_sentiment = AsyncMock(return_value={
+                "sentiment_metrics": {"overall_score": 0.1 + (i % 3) * 0.01, "total_volume": 100 + i % 5},
+                "platform_breakdown": breakdown
+            })
+            assert await service.record_sentiment_snapshot("0xabc")
+        
+        anomalies = await service._detect_sentiment_anomalies(
+            "0xabc", {"overall_score": 0.11, "total_volume": 900}, breakdown
+        )
+        
+        assert [a["type"] for a in anomalies] == ["volume_spike"]
+        assert service.anomaly_detector.get_stats()["updates"] == 20
+    
+    @pytest.mark.integration
+    def test_redis_baselines_match_memory(self):
+        """Test the Lua update in a real Redis (REDIS_URL) agrees with the memory backend"""
+        import redis.asyncio as redis
+        
+        async def run():
+            client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+            try:
+                await client.ping()
+            except Exception:
+                await client.close()
+                pytest.skip("Redis not available")
+            
+            memory = SentimentAnomalyDetector()
+            detector = SentimentAnomalyDetector(prefix="sentiment_anomaly_test")
+            await detector.initialize(client)
+            try:
+                for i in range(40):
+                    snapshot = self._snapshot(0.1 * (i % 4), 100.0 + i)
+                    await detector.observe("0xabc", snapshot)
+                    await memory.observe("0xabc", snapshot)
+                state = await detector._load_state("0xabc")
+                assert state.keys() == memory._memory["0xabc"].keys()
+                for field, value in memory._memory["0xabc"].items():
+                    assert state[field] == pytest.approx(value)
+            finally:
+                await client.delete(detector._key("0xabc"))
+                await client.close()
+        
+        asyncio.run(run())
+
+class TestSentimentResultCache:
+    """Test the shared multi-platform sentiment cache"""
+    
+    @pytest.fixture
+    def service(self):
+        service = SentimentService(MagicMock(), MagicMock())
+        
+        async def analyze(token_address, token_symbol=None):
+            await asyncio.sleep(0.05)
+            return {"sentiment_metrics": {"overall_score": 0.4, "total_volume": 10}, "token_symbol": token_symbol}
+        
+        service._analyze_multi_platform_sentiment = AsyncMock(side_effect=analyze)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_analysis(self, service):
+        """Test concurrent and repeat callers are served by one analysis, with freshness"""
+        results = await asyncio.gather(*(service.get_multi_platform_sentiment("0xABC", "ABC") for _ in range(5)))
+        again = await service.get_multi_platform_sentiment("0xabc")
+        
+        assert service._analyze_multi_platform_sentiment.await_count == 1
+        assert all(result["sentiment_metrics"]["overall_score"] == 0.4 for result in results)
+        assert all(result["cached"] is False for result in results)
+        assert again["cached"] is True and again["cache_age_seconds"] < service.cache_ttl
+        assert service.get_cache_stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_symbol_mismatch_and_force_refresh_recompute(self, service):
+        """Test a different symbol or a forced refresh bypasses the cached entry"""
+        await service.get_multi_platform_sentiment("0xabc", "ABC")
+        other = await service.get_multi_platform_sentiment("0xabc", "XYZ")
+        await service.get_multi_platform_sentiment("0xabc", "XYZ", force_refresh=True)
+        lowercase = await service.get_multi_platform_sentiment("0xabc", "abc")
+        
+        assert other["token_symbol"] == "XYZ"
+        assert lowercase["cached"] is True and lowercase["token_symbol"] == "ABC"
+        assert service._analyze_multi_platform_sentiment.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_symbol_less_refresh_keeps_symbol_entry(self, service):
+        """Test collector refreshes without a symbol update the entry symbol-aware callers read"""
+        await service.get_multi_platform_sentiment("0xabc", "ABC")
+        assert await service.record_sentiment_snapshot("0xabc")
+        result = await service.get_multi_platform_sentiment("0xabc", "ABC")
+        
+        assert result["cached"] is True
+        assert [call.args for call in service._analyze_multi_platform_sentiment.await_args_list] == [("0xabc", "ABC")] * 2
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_refreshing(self, service):
+        """Test an expired entry is returned at once and refreshed in the background"""
+        await service.get_multi_platform_sentiment("0xabc", "ABC")
+        entry = service._cache[service._cache_key("0xabc", "ABC")]
+        entry["fetched_at"] -= service.cache_ttl + 1
+        
+        stale = await service.get_multi_platform_sentiment("0xabc", "ABC")
+        await asyncio.gather(*service._background_refreshes.values())
+        
+        assert stale["cached"] is True and stale["cache_age_seconds"] > service.cache_ttl
+        assert service._analyze_multi_platform_sentiment.await_count == 2
+        assert await service.get_cache_age("0xabc") < 1
+    
+    @pytest.mark.asyncio
+    async def test_reddit_tool_reads_cached_breakdown(self, service):
+        """Test the Reddit agent tool reuses the cached analysis when given an address"""
+        from agents.tools.social_sentiment_tools import SocialSentimentTools
+        reddit = {"available": True, "sentiment": 0.3, "posts": 7, "engagement": 40, "top_posts": [{"title": "AERO"}]}
+        service._analyze_multi_platform_sentiment.side_effect = None
+        service._analyze_multi_platform_sentiment.return_value = {"platform_breakdown": {"reddit": reddit}}
+        service._get_reddit_sentiment_enhanced = AsyncMock()
+        tools = SocialSentimentTools(service)
+        
+        await service.get_multi_platform_sentiment("0xabc", "ABC")
+        result = await tools.fetch_reddit_sentiment("ABC", token_address="0xABC")
+        
+        assert result["sentiment_score"] == 0.3 and result["posts_count"] == 7
+        assert result["posts"] == [{"title": "AERO"}]
+        assert service._analyze_multi_platform_sentiment.await_count == 1
+        service._get_reddit_sentiment_enhanced.assert_not_awaited()
+    
+
+    @pytest.mark.asyncio
+    async def test_hot_tokens_refreshed_before_expiry(self, service):
+        """Test the collector refreshes cold or expiring top15/trending tokens only"""
+        coingecko = MagicMock()
+        coingecko.categories = {"top15": {"cache_key": "top"}, "trending": {"cache_key": "trend"}}
+        coingecko.category_cache = {
+            "top": ([{"address": "0xAAA", "symbol": "AAA"}, {"address": "0xbbb", "symbol": "BBB"}], 0),
+            "trend": ([{"address": "0xaaa", "symbol": "AAA"}], 0)
+        }
+        service.coingecko_service = coingecko
+        await service.get_multi_platform_sentiment("0xbbb", "BBB")
+        collector = SentimentSnapshotCollector(service)
+        
+        await collector.refresh_hot_tokens()
+        
+        assert collector.hot_tokens() == {"0xaaa": "AAA", "0xbbb": "BBB"}
+        assert [call.args for call in service._analyze_multi_platform_sentiment.await_args_list] == [("0xbbb", "BBB"), ("0xaaa", "AAA")]
+        assert collector.get_stats()["hot_refreshes"] == 1
+
 class TestServiceIntegration:
     """Test service integration"""
     